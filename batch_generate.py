@@ -0,0 +1,95 @@
+"""
+Batch generation script for the Spring Test App.
+Generates and exports test sequences for every part in a parts list CSV.
+"""
+import os
+import sys
+import logging
+import argparse
+
+from services.settings_service import SettingsService
+from services.sequence_generator import SequenceGenerator
+from services.batch_service import load_parts_csv
+from utils.constants import FILE_FORMATS
+
+
+def print_result(result):
+    """Print the outcome of a single part."""
+    if result.success:
+        print(f"[{result.source}] {result.part_number}: {result.file_path}")
+    else:
+        print(f"[failed] {result.part_number}: {result.error}")
+
+
+def batch_generate(parts_csv, output_dir, concurrency=None, export_format="CSV",
+                   test_type=None, rate_limit=1.0, api_key=None):
+    """Generate sequences for all parts in a parts list.
+
+    Args:
+        parts_csv: Path to the parts list CSV file.
+        output_dir: Directory to export the sequences to.
+        concurrency: Maximum number of parts in progress at once, or None for
+            one less than the API client's workers.
+        export_format: Export format name.
+        test_type: Test type for parts that do not specify one.
+        rate_limit: Maximum average API calls per second.
+        api_key: API key to use. Read from the app settings if not given.
+
+    Returns:
+        Number of parts that failed.
+    """
+    try:
+        parts = load_parts_csv(parts_csv)
+    except (IOError, ValueError) as e:
+        print(f"Error reading parts list: {e}")
+        return 1
+
+    if not api_key:
+        api_key = SettingsService().get_api_key()
+
+    sequence_generator = SequenceGenerator()
+    sequence_generator.set_api_key(api_key)
+
+    print(f"Generating sequences for {len(parts)} parts...")
+    run = sequence_generator.generate_batch(
+        parts,
+        output_dir,
+        concurrency=concurrency,
+        export_format=export_format,
+        test_type=test_type,
+        requests_per_second=rate_limit,
+        on_result=print_result
+    )
+    run.wait()
+    report = run.report
+
+    print(f"Done: {len(report.succeeded)} succeeded, {len(report.failed)} failed. "
+          f"Report written to {os.path.join(output_dir, 'batch_report.json')}")
+    return len(report.failed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate test sequences for a parts list")
+    parser.add_argument("parts_csv", help="Parts list CSV file")
+    parser.add_argument("--output-dir", default="batch_output", help="Directory to export sequences to")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Parts to process at once (default: all but one API worker)")
+    parser.add_argument("--format", default="CSV", choices=list(FILE_FORMATS.keys()), help="Export format")
+    parser.add_argument("--test-type", choices=["Compression", "Tension"], help="Test type for parts without one")
+    parser.add_argument("--rate-limit", type=float, default=1.0, help="Maximum API calls per second")
+    parser.add_argument("--api-key", help="API key (defaults to the key saved in the app settings)")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    failed = batch_generate(
+        args.parts_csv,
+        args.output_dir,
+        concurrency=args.concurrency,
+        export_format=args.format,
+        test_type=args.test_type,
+        rate_limit=args.rate_limit,
+        api_key=args.api_key
+    )
+    sys.exit(1 if failed else 0)
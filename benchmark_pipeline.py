@@ -0,0 +1,161 @@
+"""
+Benchmark script for the Spring Test App.
+Load-tests the generation pipeline against a local mock endpoint or a recorded cassette.
+"""
+import os
+import asyncio
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+from services.export_service import ExportService
+from models.data_models import TestSequence
+from utils.api_client import APIClient
+from utils.mock_server import MockCompletionServer
+from utils.replay import Cassette, RecordingAdapter, ReplayAdapter
+from utils.request_executor import RequestExecutor, PRIORITY_BATCH
+from utils.transport import CancellableHTTPAdapter
+
+
+def percentile(values, percent):
+    """Get a percentile of a list of values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(percent / 100.0 * (len(values) - 1))))]
+
+
+def run_benchmark(requests_count=200, concurrency=16, cassette_path=None, record_path=None,
+                  latency=0.0, latency_scale=1.0, export=False, api_key="benchmark", use_asyncio=False):
+    """Send generation requests through the pipeline and report the throughput.
+
+    Args:
+        requests_count: Number of requests to send.
+        concurrency: Number of requests in flight at once.
+        cassette_path: Replay responses from this cassette instead of a server.
+        record_path: Record the exchanges to this cassette.
+        latency: Latency of the mock endpoint in seconds.
+        latency_scale: Multiplier for recorded latencies when replaying.
+        export: Export every generated sequence to a temporary directory.
+        api_key: API key to send (only needed against a real endpoint).
+        use_asyncio: Send the requests as coroutines on one event loop instead of the executor.
+
+    Returns:
+        Dictionary of benchmark results.
+    """
+    api_client = APIClient(api_key, executor=RequestExecutor(concurrency))
+    api_client.response_cache = None  # Every request must go through the transport
+    api_client.async_max_connections = concurrency
+
+    server = None
+    if cassette_path:
+        api_client.set_transport(ReplayAdapter(Cassette(cassette_path), latency_scale, strict=False))
+    else:
+        server = MockCompletionServer(latency=latency).start()
+        api_client.endpoint = server.url
+        # Keep enough pooled connections for every worker
+        if record_path:
+            api_client.set_transport(RecordingAdapter(Cassette(record_path), pool_maxsize=concurrency))
+        else:
+            api_client.set_transport(CancellableHTTPAdapter(pool_maxsize=concurrency))
+
+    export_service = ExportService()
+    export_dir = tempfile.mkdtemp(prefix="benchmark_") if export else None
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def request_parameters(index):
+        return {"prompt": f"Generate a compression test sequence (request {index})"}
+
+    def record(index, parameters, start_time, response, error_msg):
+        rows = response.rows
+        if rows and export_dir:
+            sequence = TestSequence(rows=rows, parameters=parameters)
+            export_service.export_sequence(sequence, os.path.join(export_dir, f"sequence_{index}.csv"), "CSV")
+        with lock:
+            if rows:
+                latencies.append(time.perf_counter() - start_time)
+            else:
+                failures.append(error_msg or "No sequence data in response")
+
+    def job(index):
+        start_time = time.perf_counter()
+        parameters = request_parameters(index)
+        response, error_msg = api_client.run_request(parameters, max_retries=1)
+        record(index, parameters, start_time, response, error_msg)
+
+    async def async_job(index):
+        start_time = time.perf_counter()
+        parameters = request_parameters(index)
+        response, error_msg = await api_client.agenerate_sequence(parameters, max_retries=1)
+        record(index, parameters, start_time, response, error_msg)
+
+    async def run_async():
+        try:
+            await asyncio.gather(*(async_job(i) for i in range(requests_count)))
+        finally:
+            await api_client.aclose()
+
+    start_time = time.perf_counter()
+    if use_asyncio:
+        asyncio.run(run_async())
+    else:
+        handles = [api_client.executor.submit(lambda i=i: job(i), PRIORITY_BATCH) for i in range(requests_count)]
+        for handle in handles:
+            handle.wait()
+    elapsed = time.perf_counter() - start_time
+    transport_stats = api_client.get_transport_stats()
+
+    if server:
+        server.stop()
+    api_client.executor.shutdown()
+
+    return {
+        "requests": requests_count,
+        "succeeded": len(latencies),
+        "failed": len(failures),
+        "elapsed_s": elapsed,
+        "requests_per_second": requests_count / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "connections_opened": transport_stats.get("connections_opened", 0),
+        "connection_reuse_rate": transport_stats.get("reuse_rate", 0.0),
+        "first_error": failures[0] if failures else ""
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the sequence generation pipeline offline")
+    parser.add_argument("--requests", type=int, default=200, help="Number of requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--replay", metavar="CASSETTE", help="Replay responses from a cassette file")
+    parser.add_argument("--record", metavar="CASSETTE", help="Record the exchanges to a cassette file")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock endpoint latency in seconds")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Scale recorded latencies when replaying")
+    parser.add_argument("--export", action="store_true", help="Export every sequence to a temporary directory")
+    parser.add_argument("--asyncio", action="store_true", help="Send the requests as coroutines on one event loop")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    results = run_benchmark(
+        requests_count=args.requests,
+        concurrency=args.concurrency,
+        cassette_path=args.replay,
+        record_path=args.record,
+        latency=args.latency,
+        latency_scale=args.latency_scale,
+        export=args.export,
+        use_asyncio=args.asyncio
+    )
+
+    for key, value in results.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    sys.exit(1 if results["failed"] else 0)
@@ -15,6 +15,8 @@ from services.settings_service import SettingsService
 from services.sequence_generator import SequenceGenerator
 from services.chat_service import ChatService
 from services.export_service import ExportService, TemplateManager
+from services.offline_queue import OfflineQueue
+from services.sequence_index import SequenceIndex
 
 # Import UI components
 from ui.main_window import create_main_window
@@ -68,8 +70,11 @@ def main():
     api_key = settings_service.get_api_key()
     
     # Create sequence generator with API key
-    sequence_generator = SequenceGenerator()
+    sequence_generator = SequenceGenerator(offline_queue=OfflineQueue(), template_manager=TemplateManager(),
+                                           sequence_index=SequenceIndex())
     sequence_generator.set_api_key(api_key)
+    sequence_generator.stream_responses = settings_service.get_stream_responses()
+    sequence_generator.api_client.start_warmup()  # Connect while the window is being built
     
     # Set spring specifications from settings
     spring_specification = settings_service.get_spring_specification()
@@ -192,6 +192,73 @@ class SpringSpecification:
         return text
 
 
+@dataclass
+class BatchPartResult:
+    """Outcome of generating the sequence for one part in a batch."""
+    part_number: str
+    success: bool
+    file_path: str = ""
+    error: str = ""
+    source: str = ""  # "local", "index", "api" or "resumed"
+    duration_s: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a dictionary."""
+        return {
+            "part_number": self.part_number,
+            "success": self.success,
+            "file_path": self.file_path,
+            "error": self.error,
+            "source": self.source,
+            "duration_s": self.duration_s
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BatchPartResult':
+        """Create a BatchPartResult instance from a dictionary."""
+        return cls(
+            part_number=data["part_number"],
+            success=data.get("success", False),
+            file_path=data.get("file_path", ""),
+            error=data.get("error", ""),
+            source=data.get("source", ""),
+            duration_s=data.get("duration_s", 0.0)
+        )
+
+
+@dataclass
+class BatchReport:
+    """Per-part report of a batch generation run."""
+    results: List[BatchPartResult] = field(default_factory=list)
+    started_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+    
+    @property
+    def succeeded(self) -> List[BatchPartResult]:
+        """Results of the parts that were generated successfully."""
+        return [r for r in self.results if r.success]
+    
+    @property
+    def failed(self) -> List[BatchPartResult]:
+        """Results of the parts that failed."""
+        return [r for r in self.results if not r.success]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report to a dictionary."""
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "total": len(self.results),
+            "succeeded": len(self.succeeded),
+            "failed": len(self.failed),
+            "results": [r.to_dict() for r in self.results]
+        }
+    
+    def to_json(self, indent: int = 2) -> str:
+        """Convert the report to a JSON string."""
+        return json.dumps(self.to_dict(), indent=indent)
+
+
 @dataclass
 class AppSettings:
     """Application settings that can be saved and loaded."""
@@ -0,0 +1,239 @@
+"""
+Batch service for the Spring Test App.
+Contains functions for loading parts lists and tracking batch generation progress.
+"""
+import csv
+import json
+import os
+import re
+import threading
+from typing import Dict, Any, List, Optional
+
+from models.data_models import SpringSpecification, SetPoint, BatchPartResult, BatchReport
+
+# Accepted parts list column names, keyed by normalized header
+COLUMN_ALIASES = {
+    "partnumber": "part_number",
+    "partno": "part_number",
+    "part": "part_number",
+    "partname": "part_name",
+    "name": "part_name",
+    "id": "part_id",
+    "partid": "part_id",
+    "freelength": "free_length_mm",
+    "freelengthmm": "free_length_mm",
+    "wiredia": "wire_dia_mm",
+    "wirediamm": "wire_dia_mm",
+    "wirediameter": "wire_dia_mm",
+    "wirediametermm": "wire_dia_mm",
+    "od": "outer_dia_mm",
+    "odmm": "outer_dia_mm",
+    "outerdia": "outer_dia_mm",
+    "outerdiameter": "outer_dia_mm",
+    "outerdiametermm": "outer_dia_mm",
+    "coils": "coil_count",
+    "coilcount": "coil_count",
+    "noofcoils": "coil_count",
+    "safetylimit": "safety_limit_n",
+    "safetylimitn": "safety_limit_n",
+    "testtype": "test_type",
+}
+
+# Set point columns, e.g. "Set Point-1 mm", "set_point_1_load_n", "SP2 Tolerance"
+SET_POINT_COLUMN = re.compile(r'^(?:setpoint|sp)(\d+)(mm|position|positionmm|load|loadn|tolerance|tolerancepercent)?$')
+
+# Name of the journal file used to resume interrupted batches
+JOURNAL_FILE_NAME = "batch_journal.jsonl"
+
+
+def _normalize_header(header: str) -> str:
+    """Normalize a column header for alias lookup."""
+    return re.sub(r'[^a-z0-9]', '', header.lower())
+
+
+def load_parts_csv(file_path: str) -> List[Dict[str, Any]]:
+    """Load a parts list from a CSV file.
+
+    Each row becomes a dictionary with a "specification" (SpringSpecification)
+    and an optional "test_type". Set points are read from numbered columns
+    such as "Set Point-1 mm", "Set Point-1 Load N" and "Set Point-1 Tolerance".
+
+    Args:
+        file_path: Path to the CSV file.
+
+    Returns:
+        List of part dictionaries.
+
+    Raises:
+        ValueError: If a row is missing its part number, has invalid numbers,
+            or repeats a part number (each part is exported to a file named
+            after it, so a repeat would overwrite the earlier part's sequence).
+    """
+    parts = []
+    file_names = {}  # Export file name -> (line number, part number) of the part using it
+
+    with open(file_path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for line_number, row in enumerate(reader, 2):
+            values = {}
+            set_points = {}
+
+            for header, value in row.items():
+                if header is None or value is None or not value.strip():
+                    continue
+                value = value.strip()
+                key = _normalize_header(header)
+
+                match = SET_POINT_COLUMN.match(key)
+                if match:
+                    index = int(match.group(1))
+                    field_name = match.group(2) or "mm"
+                    if field_name.startswith("load"):
+                        field_name = "load_n"
+                    elif field_name.startswith("tolerance"):
+                        field_name = "tolerance_percent"
+                    else:
+                        field_name = "position_mm"
+                    set_points.setdefault(index, {})[field_name] = value
+                elif key in COLUMN_ALIASES:
+                    values[COLUMN_ALIASES[key]] = value
+
+            if not values.get("part_number"):
+                raise ValueError(f"Line {line_number}: missing part number")
+            if not set_points:
+                raise ValueError(f"Line {line_number}: no set points for part {values['part_number']}")
+
+            # Compared case-insensitively, as on Windows file systems
+            file_name = safe_file_name(values["part_number"]).lower()
+            if file_name in file_names:
+                other_line, other_part = file_names[file_name]
+                if other_part == values["part_number"]:
+                    raise ValueError(f"Line {line_number}: duplicate part number {other_part} "
+                                     f"(also on line {other_line})")
+                raise ValueError(f"Line {line_number}: part number {values['part_number']} has the same "
+                                 f"export file name as {other_part} on line {other_line}")
+            file_names[file_name] = (line_number, values["part_number"])
+
+            try:
+                specification = SpringSpecification(
+                    part_name=values.get("part_name", values["part_number"]),
+                    part_number=values["part_number"],
+                    part_id=int(float(values.get("part_id", 0))),
+                    free_length_mm=float(values.get("free_length_mm", 0)),
+                    coil_count=float(values.get("coil_count", 0)),
+                    wire_dia_mm=float(values.get("wire_dia_mm", 0)),
+                    outer_dia_mm=float(values.get("outer_dia_mm", 0)),
+                    set_points=[
+                        SetPoint(
+                            position_mm=float(sp["position_mm"]),
+                            load_n=float(sp["load_n"]),
+                            tolerance_percent=float(sp.get("tolerance_percent", 10.0))
+                        )
+                        for _, sp in sorted(set_points.items())
+                        if "position_mm" in sp and "load_n" in sp
+                    ],
+                    safety_limit_n=float(values.get("safety_limit_n", 0))
+                )
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"Line {line_number}: invalid value ({str(e)})")
+
+            parts.append({
+                "specification": specification,
+                "test_type": values.get("test_type", "").capitalize() or None
+            })
+
+    return parts
+
+
+class BatchJournal:
+    """Append-only journal of finished parts, used to resume interrupted batches."""
+
+    def __init__(self, output_dir: str):
+        """Initialize the journal.
+
+        Args:
+            output_dir: Batch output directory the journal lives in.
+        """
+        self.file_path = os.path.join(output_dir, JOURNAL_FILE_NAME)
+        self._lock = threading.Lock()
+
+    def load_completed(self) -> Dict[str, BatchPartResult]:
+        """Get the parts already generated successfully by earlier runs.
+
+        Parts whose exported file no longer exists are treated as not done.
+
+        Returns:
+            Dictionary of part number -> result.
+        """
+        completed = {}
+        if not os.path.exists(self.file_path):
+            return completed
+
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = BatchPartResult.from_dict(json.loads(line))
+                except (ValueError, KeyError):
+                    # A crash can leave a partial last line
+                    continue
+                if result.success and os.path.exists(result.file_path):
+                    completed[result.part_number] = result
+                else:
+                    completed.pop(result.part_number, None)
+
+        return completed
+
+    def record(self, result: BatchPartResult) -> None:
+        """Append a part result and flush it to disk.
+
+        Args:
+            result: The part result to record.
+        """
+        with self._lock:
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result.to_dict()) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class BatchRun:
+    """Handle for a batch running in the background."""
+
+    def __init__(self, report: BatchReport):
+        """Initialize the handle.
+
+        Args:
+            report: Report the batch adds its part results to.
+        """
+        self.report = report
+        self.cancelled = False
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        """Whether every part has finished and the report was written."""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the batch to finish.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            True if the batch finished.
+        """
+        return self._done.wait(timeout)
+
+    def cancel(self) -> None:
+        """Stop starting new parts. Parts already in progress still finish."""
+        self.cancelled = True
+
+    def _finish(self) -> None:
+        """Mark the batch as finished."""
+        self._done.set()
+
+
+def safe_file_name(name: str) -> str:
+    """Make a part number safe to use as a file name."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip("._") or "part"
@@ -5,8 +5,10 @@ Contains classes and functions for exporting sequences to different formats.
 import os
 import pandas as pd
 import json
+import logging
 from typing import Dict, Any, Optional, List, Union, Tuple
-from models.data_models import TestSequence
+from models.data_models import TestSequence, SpringSpecification
+from services.sequence_template import CompiledTemplate, TemplateError
 
 
 class ExportService:
@@ -160,7 +162,16 @@ class ExportService:
 from typing import Tuple, Dict, List, Optional, Any
 
 class TemplateManager:
-    """Manager for sequence templates."""
+    """Manager for sequence templates.
+    
+    Template cells may contain placeholders such as {free_length}, {L1},
+    {safety_limit} or {tolerance(sp1)}, which are filled in from a spring
+    specification. Templates are compiled on first use and the compiled
+    form is kept until the template changes. A template whose parameters
+    name a "Test Type" is used for plain requests of that test type.
+    Templates without placeholders, such as those saved before placeholders
+    were supported, are only used when asked for by name.
+    """
     
     def __init__(self, templates_dir: str = "templates"):
         """Initialize the template manager.
@@ -171,6 +182,7 @@ class TemplateManager:
         self.templates_dir = templates_dir
         self._ensure_templates_dir()
         self.templates = self._load_templates()
+        self._compiled: Dict[str, Optional[CompiledTemplate]] = {}
     
     def _ensure_templates_dir(self) -> None:
         """Ensure the templates directory exists."""
@@ -228,6 +240,7 @@ class TemplateManager:
             
             # Add to templates
             self.templates[name] = sequence
+            self._compiled.pop(name, None)
             
             return True
         except Exception:
@@ -254,6 +267,7 @@ class TemplateManager:
             
             # Remove from templates
             del self.templates[name]
+            self._compiled.pop(name, None)
             
             return True
         except Exception:
@@ -284,4 +298,67 @@ class TemplateManager:
         Returns:
             Dictionary of template name -> TestSequence.
         """
-        return self.templates 
\ No newline at end of file
+        return self.templates
+    
+    def get_compiled(self, name: str) -> Optional[CompiledTemplate]:
+        """Get a compiled template, compiling it on first use.
+        
+        Args:
+            name: Template name.
+            
+        Returns:
+            The compiled template, or None if not found or invalid.
+        """
+        if name not in self._compiled:
+            template = self.templates.get(name)
+            compiled = None
+            if template is not None:
+                try:
+                    compiled = CompiledTemplate(name, template.rows, template.parameters.get("Test Type"))
+                except TemplateError as e:
+                    logging.warning(str(e))
+            self._compiled[name] = compiled
+        return self._compiled[name]
+    
+    def instantiate(self, name: str, specification: SpringSpecification,
+                    speeds: Optional[Dict[str, float]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Fill in a template for a specification.
+        
+        Args:
+            name: Template name.
+            specification: Spring specification.
+            speeds: Speeds for the {threshold_speed}, {movement_speed} and {contact_force} placeholders.
+            
+        Returns:
+            Sequence rows, or None if the template is missing, invalid or
+            needs values the specification does not provide.
+        """
+        compiled = self.get_compiled(name)
+        if compiled is None:
+            return None
+        try:
+            return compiled.instantiate(specification, speeds)
+        except TemplateError as e:
+            logging.info(str(e))
+            return None
+    
+    def find_templates(self, test_type: str, set_point_count: int) -> List[str]:
+        """Find the templates covering a test type and number of set points.
+        
+        Args:
+            test_type: "Compression" or "Tension".
+            set_point_count: Number of enabled set points in the specification.
+            
+        Templates without placeholders are skipped: they hold the positions and
+        loads of the spring they were saved from, so they do not fit other springs.
+        
+        Returns:
+            Names of the templates for the test type that measure exactly that many set points.
+        """
+        names = []
+        for name in self.templates:
+            compiled = self.get_compiled(name)
+            if (compiled is not None and compiled.keys and compiled.test_type == test_type
+                    and compiled.set_points == set_point_count):
+                names.append(name)
+        return sorted(names)
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Offline queue service for the Spring Test App.
+Contains a durable queue of generation requests that could not reach the API.
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Replay attempts before a queued request is given up
+OFFLINE_MAX_ATTEMPTS = 5
+
+# Seconds between checks for a reachable endpoint
+OFFLINE_RETRY_INTERVAL = 30
+
+
+@dataclass
+class QueuedRequest:
+    """A generation request waiting for the API to become reachable."""
+    request_id: int
+    parameters: Dict[str, Any]  # Includes the spring specification at the time of the request
+    created_at: float
+    attempts: int = 0
+    last_error: str = ""
+
+    @property
+    def prompt(self) -> str:
+        """The operator's message."""
+        return str(self.parameters.get("prompt", ""))
+
+
+class OfflineQueue:
+    """SQLite-backed queue of generation requests, kept across restarts."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """Initialize the queue.
+
+        Args:
+            db_path: Path of the database file, or None for offline_queue.db in appdata.
+        """
+        if db_path is None:
+            data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "appdata")
+            db_path = os.path.join(data_dir, "offline_queue.db")
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS requests ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "parameters TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "last_error TEXT NOT NULL DEFAULT '')"
+            )
+
+    def enqueue(self, parameters: Dict[str, Any]) -> int:
+        """Store a request.
+
+        Args:
+            parameters: Request parameters, including the spring specification.
+
+        Returns:
+            ID of the queued request.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO requests (parameters, created_at) VALUES (?, ?)",
+                (json.dumps(parameters, default=str), time.time())
+            )
+        logging.info(f"Queued request {cursor.lastrowid} until the API is reachable")
+        return cursor.lastrowid
+
+    def pending(self) -> List[QueuedRequest]:
+        """Get the queued requests, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, parameters, created_at, attempts, last_error FROM requests ORDER BY id"
+            ).fetchall()
+        return [self._to_request(row) for row in rows]
+
+    def next_pending(self) -> Optional[QueuedRequest]:
+        """Get the oldest queued request, or None if the queue is empty."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, parameters, created_at, attempts, last_error FROM requests ORDER BY id LIMIT 1"
+            ).fetchone()
+        return self._to_request(row) if row else None
+
+    def record_failure(self, request_id: int, error: str) -> int:
+        """Record a failed replay of a queued request.
+
+        Args:
+            request_id: ID of the request.
+            error: Error message of the attempt.
+
+        Returns:
+            Number of replay attempts so far.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE requests SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (error, request_id)
+            )
+            row = self._conn.execute("SELECT attempts FROM requests WHERE id = ?", (request_id,)).fetchone()
+        return row[0] if row else 0
+
+    def remove(self, request_id: int) -> None:
+        """Remove a request from the queue.
+
+        Args:
+            request_id: ID of the request.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM requests WHERE id = ?", (request_id,))
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+
+    @staticmethod
+    def _to_request(row) -> QueuedRequest:
+        """Create a queued request from a database row."""
+        request_id, parameters, created_at, attempts, last_error = row
+        return QueuedRequest(request_id, json.loads(parameters), created_at, attempts, last_error)
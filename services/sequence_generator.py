@@ -2,11 +2,237 @@
 Sequence generator service for the Spring Test App.
 Contains classes and functions for generating test sequences.
 """
-import pandas as pd
-from typing import Dict, Any, Optional, List, Tuple, Callable
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple, Callable, Union
 from utils.api_client import APIClient
-from models.data_models import TestSequence, SpringSpecification
-from PyQt5.QtCore import QObject, pyqtSignal
+from utils.response_parser import ParsedResponse
+from utils.constants import FILE_FORMATS
+from utils.constants import DEFAULT_TEMPERATURE
+from utils.request_executor import RateLimiter, PRIORITY_INTERACTIVE, PRIORITY_BATCH, PRIORITY_CANDIDATE
+from utils.metrics import RequestTrace, get_metrics_recorder, span
+from utils.text_parser import is_sequence_request
+from models.data_models import (TestSequence, SpringSpecification, SetPoint,
+                                BatchPartResult, BatchReport)
+from services.batch_service import BatchJournal, BatchRun, safe_file_name
+from services.sequence_validator import SequenceValidator, ValidationResult
+from services.sequence_repair import SequenceRepairer
+from services.offline_queue import OfflineQueue, QueuedRequest, OFFLINE_MAX_ATTEMPTS, OFFLINE_RETRY_INTERVAL
+from services.sequence_index import SequenceIndex, EXAMPLE_COUNT
+from utils.prompt_builder import format_sequence_example
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# Requests mentioning any of these need the LLM rather than the standard pattern
+FREE_FORM_PATTERN = re.compile(
+    r'\b(?:analy[sz]e|explain|compare|why|what|how|modify|change|adjust|instead|without|'
+    r'skip|remove|add|extra|custom|cycles?|delay|repeat|loop|peak|rate|existing|previous|'
+    r'last|above|current)\b|\?',
+    re.IGNORECASE
+)
+
+# Tolerance applied to the measured free length (mm)
+FREE_LENGTH_TOLERANCE_MM = 1.0
+
+# Clearance from free length used for the return moves, as a fraction of free length
+RETURN_CLEARANCE_FRACTION = 0.1
+
+# Number of scragging cycles in the standard pattern
+SCRAG_CYCLES = 2
+
+# Temperature added for each further best-of-N candidate
+CANDIDATE_TEMPERATURE_STEP = 0.15
+
+# Corrected sequences requested when a generated sequence fails validation
+VALIDATION_RETRIES = 1
+
+# Executor workers a batch leaves free so interactive requests never wait behind it
+BATCH_RESERVED_WORKERS = 1
+
+
+class StandardSequenceSynthesizer:
+    """Rule-based builder for the standard test sequence pattern.
+    
+    Builds ZF -> TH -> FL(P) -> Mv(P) -> Mv(P) -> Scrag -> Mv(P) -> TH -> FL(P)
+    -> (Mv(P) -> Fr(P)) per set point -> Mv(P) -> PMsg locally from a spring
+    specification, without calling the API.
+    """
+    
+    def infer_test_type(self, parameters: Dict[str, Any],
+                        specification: SpringSpecification) -> Optional[str]:
+        """Determine the test type for a request.
+        
+        Args:
+            parameters: Dictionary of spring parameters.
+            specification: Spring specification.
+            
+        Returns:
+            "Compression" or "Tension", or None if it cannot be determined.
+        """
+        test_type = parameters.get("Test Type")
+        if test_type in ("Compression", "Tension"):
+            return test_type
+        
+        # Fall back to the side of the free length the set points are on
+        positions = [sp.position_mm for sp in self._enabled_set_points(specification)]
+        if positions and all(p < specification.free_length_mm for p in positions):
+            return "Compression"
+        if positions and all(p > specification.free_length_mm for p in positions):
+            return "Tension"
+        return None
+    
+    def can_synthesize(self, parameters: Dict[str, Any],
+                       specification: Optional[SpringSpecification]) -> bool:
+        """Check whether a request is an unambiguous standard sequence request.
+        
+        Args:
+            parameters: Dictionary of spring parameters.
+            specification: Spring specification.
+            
+        Returns:
+            True if the sequence can be built locally.
+        """
+        if not specification or not specification.enabled or specification.free_length_mm <= 0:
+            return False
+        
+        set_points = self._enabled_set_points(specification)
+        if not set_points or any(sp.position_mm <= 0 or sp.load_n <= 0 for sp in set_points):
+            return False
+        
+        prompt = self.request_text(parameters, specification)
+        if not prompt or FREE_FORM_PATTERN.search(prompt) or not is_sequence_request(prompt):
+            return False
+        
+        test_type = self.infer_test_type(parameters, specification)
+        if test_type is None:
+            return False
+        
+        # Set points must lie on the side of the free length the test type moves to
+        free_length = specification.free_length_mm
+        if test_type == "Compression" and any(sp.position_mm >= free_length for sp in set_points):
+            return False
+        if test_type == "Tension" and any(sp.position_mm <= free_length for sp in set_points):
+            return False
+        
+        # Leave anything close to the safety limit to the LLM and the operator
+        if specification.safety_limit_n and any(
+            sp.load_n * (1 + sp.tolerance_percent / 100) > specification.safety_limit_n for sp in set_points
+        ):
+            return False
+        
+        return True
+    
+    @staticmethod
+    def request_text(parameters: Dict[str, Any], specification: SpringSpecification) -> str:
+        """Get the operator's own words from a request.
+        
+        Only these decide the intent, not the prepended specification text.
+        
+        Args:
+            parameters: Dictionary of spring parameters.
+            specification: Spring specification.
+            
+        Returns:
+            The request without the specification text.
+        """
+        return str(parameters.get("prompt", "")).replace(specification.to_prompt_text(), "").strip()
+    
+    def synthesize(self, specification: SpringSpecification, test_type: str,
+                   speeds: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Build the standard sequence rows.
+        
+        Args:
+            specification: Spring specification.
+            test_type: "Compression" or "Tension".
+            speeds: Speeds from SequenceGenerator.calculate_optimal_speeds.
+            
+        Returns:
+            List of sequence row dictionaries.
+        """
+        free_length = specification.free_length_mm
+        compression = test_type == "Compression"
+        
+        # Visit set points from the least to the most deflected
+        set_points = sorted(self._enabled_set_points(specification),
+                            key=lambda sp: sp.position_mm, reverse=compression)
+        
+        # Return moves stay clear of the spring so the contact search starts free
+        clearance = round(free_length * RETURN_CLEARANCE_FRACTION, 1)
+        return_position = free_length + clearance if compression else free_length - clearance
+        
+        threshold_speed = self._format_number(speeds["threshold_speed"])
+        movement_speed = self._format_number(speeds["movement_speed"])
+        contact_force = self._format_number(speeds["contact_force"])
+        free_length_tolerance = self._format_tolerance(
+            free_length, free_length - FREE_LENGTH_TOLERANCE_MM, free_length + FREE_LENGTH_TOLERANCE_MM
+        )
+        
+        rows = []
+        
+        def add(cmd, description, condition="", unit="", tolerance="", speed=""):
+            rows.append({
+                "Row": f"R{len(rows):02d}",
+                "CMD": cmd,
+                "Description": description,
+                "Condition": condition,
+                "Unit": unit,
+                "Tolerance": tolerance,
+                "Speed rpm": speed
+            })
+            return len(rows) - 1
+        
+        # Initial free length measurement
+        add("ZF", "Zero Force")
+        add("TH", "Search Contact", contact_force, "N", "", threshold_speed)
+        add("FL(P)", "Measure Free Length-Position", "", "mm", free_length_tolerance)
+        
+        # Scragging between the first and the most deflected set point
+        scrag_row = add("Mv(P)", "L1", self._format_number(set_points[0].position_mm), "mm", "", movement_speed)
+        if len(set_points) > 1:
+            scrag_row = add("Mv(P)", f"L{len(set_points)}",
+                            self._format_number(set_points[-1].position_mm), "mm", "", movement_speed)
+        add("Scrag", "Scragging", f"R{scrag_row:02d},{SCRAG_CYCLES}")
+        add("Mv(P)", "Move to Position", self._format_number(return_position), "mm", "", movement_speed)
+        
+        # Re-measure free length after scragging
+        add("TH", "Search Contact", contact_force, "N", "", threshold_speed)
+        add("FL(P)", "Measure Free Length-Position", "", "mm", free_length_tolerance)
+        
+        # Force at each set point
+        for index, sp in enumerate(set_points, 1):
+            add("Mv(P)", f"L{index}", self._format_number(sp.position_mm), "mm", "", movement_speed)
+            margin = sp.load_n * sp.tolerance_percent / 100
+            add("Fr(P)", "Force @ Position", "", "N",
+                self._format_tolerance(sp.load_n, sp.load_n - margin, sp.load_n + margin))
+        
+        add("Mv(P)", "Move to Position", self._format_number(return_position), "mm", "", movement_speed)
+        add("PMsg", "User Message", "Test Completed")
+        
+        return rows
+    
+    @staticmethod
+    def _enabled_set_points(specification: SpringSpecification) -> List[SetPoint]:
+        """Get the enabled set points of a specification."""
+        return [sp for sp in specification.set_points if sp.enabled]
+    
+    @staticmethod
+    def _format_number(value: float) -> str:
+        """Format a number without trailing zeros (e.g. 58.0 -> "58", 21.24 -> "21.24")."""
+        return f"{round(float(value), 2):g}"
+    
+    @classmethod
+    def _format_tolerance(cls, nominal: float, minimum: float, maximum: float) -> str:
+        """Format a tolerance as "nominal(min,max)"."""
+        return (f"{cls._format_number(nominal)}"
+                f"({cls._format_number(minimum)},{cls._format_number(maximum)})")
+
+
+def _candidate_rank(result: Optional[ValidationResult]) -> float:
+    """Rank a best-of-N candidate by its validation score; responses without a sequence rank last."""
+    return result.score if result is not None else -1.0
 
 
 class SequenceGenerator(QObject):
@@ -14,14 +240,26 @@ class SequenceGenerator(QObject):
     
     # Define signals
     sequence_generated = pyqtSignal(object, str)  # TestSequence, error_message
+    replayed_sequence_generated = pyqtSignal(object, str)  # Result of a replayed queued request, error_message
     progress_updated = pyqtSignal(int)            # Progress percentage (0-100)
     status_updated = pyqtSignal(str)              # Status message
+    row_generated = pyqtSignal(dict)              # Sequence row streamed from the API
+    timings = pyqtSignal(dict)                    # Phase timings of a finished request
+    request_queued = pyqtSignal(int, str)         # Queued request ID, error that made the API unreachable
+    api_key_validated = pyqtSignal(bool, str)     # Key is valid, message
     
-    def __init__(self, api_client: Optional[APIClient] = None):
+    def __init__(self, api_client: Optional[APIClient] = None,
+                 offline_queue: Optional[OfflineQueue] = None,
+                 template_manager=None,
+                 sequence_index: Optional[SequenceIndex] = None):
         """Initialize the sequence generator.
         
         Args:
             api_client: API client to use.
+            offline_queue: Queue for requests made while the API is unreachable, or None to fail them.
+            template_manager: TemplateManager whose templates are preferred for standard requests.
+            sequence_index: Index of validated sequences; the nearest one is rescaled and
+                reused instead of calling the API, and new ones are added to it.
         """
         super().__init__()
         
@@ -35,6 +273,39 @@ class SequenceGenerator(QObject):
         self.history = []
         self.last_sequence = None
         self.last_parameters = None  # Add this line to store the last parameters
+        
+        # Stream responses so rows can be shown while the API is still generating (off unless enabled in settings)
+        self.stream_responses = False
+        
+        # Build standard sequences locally instead of calling the API
+        self.use_local_synthesis = True
+        self.synthesizer = StandardSequenceSynthesizer()
+        self.template_manager = template_manager
+        self.sequence_index = sequence_index
+        
+        # Show the model this many validated sequences of similar springs (0 disables it)
+        self.few_shot_examples = EXAMPLE_COUNT
+        if sequence_index is not None:
+            self.api_client.example_provider = self._few_shot_examples
+        
+        # Per-request phase timings
+        self.metrics = get_metrics_recorder()
+        
+        # Generate this many candidates in parallel and keep the best one (1 disables it)
+        self.best_of_n = 1
+        self.validator = SequenceValidator()
+        self.repairer = SequenceRepairer(self.validator)  # Fixes near-misses without another request
+        self._candidate_handles = []
+        
+        # Keep requests that cannot reach the API and send them once it is back
+        self.offline_queue = offline_queue
+        self._replaying = False
+        self._replay_timer = None
+        if offline_queue is not None:
+            self._replay_timer = QTimer(self)
+            self._replay_timer.timeout.connect(self.replay_offline_queue)
+            self._replay_timer.start(OFFLINE_RETRY_INTERVAL * 1000)
+            QTimer.singleShot(0, self.replay_offline_queue)  # Requests left over from the last session
     
     def set_api_key(self, api_key: str) -> None:
         """Set the API key for the API client.
@@ -44,6 +315,13 @@ class SequenceGenerator(QObject):
         """
         self.api_client.set_api_key(api_key)
     
+    def validate_api_key(self) -> None:
+        """Check the API key in the background and emit api_key_validated with the result.
+        
+        Keys seen working or rejected by recent requests are not probed again.
+        """
+        self.api_client.validate_api_key_async(self.api_key_validated.emit)
+    
     def set_spring_specification(self, specification: SpringSpecification) -> None:
         """Set the spring specification to use for sequence generation.
         
@@ -60,40 +338,38 @@ class SequenceGenerator(QObject):
         """
         return self.spring_specification
     
-    def _prepare_parameters_with_specification(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    def _prepare_parameters_with_specification(self, parameters: Dict[str, Any],
+                                               specification: Optional[SpringSpecification] = None) -> Dict[str, Any]:
         """Prepare parameters with spring specification data.
         
         Args:
             parameters: Original parameters dictionary.
+            specification: Specification to use instead of the current one.
             
         Returns:
             Updated parameters with spring specification.
         """
-        if not self.spring_specification or not self.spring_specification.enabled:
+        specification = specification or self.spring_specification
+        if not specification or not specification.enabled:
             return parameters
         
         # Create a new parameters dictionary to avoid modifying the original
         updated_params = parameters.copy()
         
         # Calculate optimal speeds based on spring characteristics
-        speeds = self.calculate_optimal_speeds(self.spring_specification)
+        speeds = self.calculate_optimal_speeds(specification)
         
-        # Add spring specification as context
-        if 'prompt' in updated_params:
-            spec_text = self.spring_specification.to_prompt_text()
-            updated_params['prompt'] = f"{spec_text}\n\n{updated_params['prompt']}"
-        
-        # Add additional parameters
+        # Add the specification as structured data - the prompt builder renders it once
         updated_params['spring_specification'] = {
-            'part_name': self.spring_specification.part_name,
-            'part_number': self.spring_specification.part_number,
-            'part_id': self.spring_specification.part_id,
-            'free_length_mm': self.spring_specification.free_length_mm,
-            'coil_count': self.spring_specification.coil_count,
-            'wire_dia_mm': self.spring_specification.wire_dia_mm,
-            'outer_dia_mm': self.spring_specification.outer_dia_mm,
-            'safety_limit_n': self.spring_specification.safety_limit_n,
-            'unit': self.spring_specification.unit,
+            'part_name': specification.part_name,
+            'part_number': specification.part_number,
+            'part_id': specification.part_id,
+            'free_length_mm': specification.free_length_mm,
+            'coil_count': specification.coil_count,
+            'wire_dia_mm': specification.wire_dia_mm,
+            'outer_dia_mm': specification.outer_dia_mm,
+            'safety_limit_n': specification.safety_limit_n,
+            'unit': specification.unit,
             'set_points': [
                 {
                     'position_mm': sp.position_mm,
@@ -101,7 +377,7 @@ class SequenceGenerator(QObject):
                     'tolerance_percent': sp.tolerance_percent,
                     'enabled': sp.enabled
                 }
-                for sp in self.spring_specification.set_points if sp.enabled
+                for sp in specification.set_points if sp.enabled
             ],
             'optimal_speeds': speeds
         }
@@ -260,7 +536,8 @@ class SequenceGenerator(QObject):
         logger.debug(f"  Movement speed: {movement_speed} rpm")
         logger.debug(f"  Contact force: {contact_force} N")
     
-    def generate_sequence(self, parameters: Dict[str, Any]) -> Tuple[Optional[TestSequence], str]:
+    def generate_sequence(self, parameters: Dict[str, Any],
+                          bypass_cache: bool = False) -> Tuple[Optional[TestSequence], str]:
         """Generate a test sequence based on parameters (synchronous version).
         
         Note: This method is kept for backward compatibility but should be avoided
@@ -268,6 +545,7 @@ class SequenceGenerator(QObject):
         
         Args:
             parameters: Dictionary of spring parameters.
+            bypass_cache: Skip the response cache and force a new request.
             
         Returns:
             Tuple of (TestSequence object, error message if any)
@@ -278,16 +556,29 @@ class SequenceGenerator(QObject):
         # Add spring specification to parameters
         parameters_with_spec = self._prepare_parameters_with_specification(parameters)
         
-        # Generate sequence
-        df, response_text = self.api_client.generate_sequence(parameters_with_spec)
+        # Build standard sequences locally, or reuse the sequence of a similar spring
+        sequence = (self._synthesize_sequence(parameters, parameters_with_spec)
+                    or self._reuse_neighbour(parameters, parameters_with_spec))
+        if sequence is not None:
+            return sequence, ""
+        
+        # Generate sequence, asking for a correction if it fails validation
+        specification, test_type = self._validation_context(parameters_with_spec)
+        response, error_msg, result = self._generate_validated(
+            lambda params: self.api_client.generate_sequence(params, bypass_cache=bypass_cache),
+            parameters_with_spec, specification, test_type
+        )
         
         # If generation failed, return error
-        if df.empty:
-            return None, response_text
+        if not response.has_sequence:
+            return None, error_msg or response.chat_text
+        
+        if not result.errors:
+            self._remember_sequence(parameters_with_spec, response.rows, specification, test_type)
         
         # Create TestSequence object
         sequence = TestSequence(
-            rows=df.to_dict('records'),
+            rows=response.rows,
             parameters=parameters_with_spec
         )
         
@@ -301,46 +592,609 @@ class SequenceGenerator(QObject):
         
         return sequence, ""
     
-    def generate_sequence_async(self, parameters: Dict[str, Any]) -> None:
+    def generate_sequence_async(self, parameters: Dict[str, Any], bypass_cache: bool = False,
+                                trace: Optional[RequestTrace] = None) -> None:
         """Generate a test sequence based on parameters asynchronously.
         
+        Phase timings are recorded on the trace and, once the result has been
+        delivered to the sequence_generated receivers, written to the metrics
+        file and emitted through the timings signal.
+        
         Args:
             parameters: Dictionary of spring parameters.
+            bypass_cache: Skip the response cache and force a new request.
+            trace: Trace started by the caller, or None to start one here.
         """
+        trace = trace or RequestTrace()
+        self._cancel_candidates()  # A new request supersedes unfinished candidates
+        
         # Save parameters for reference
         self.last_parameters = parameters.copy()
         
         # Add spring specification to parameters
-        parameters_with_spec = self._prepare_parameters_with_specification(parameters)
+        with trace.span("prepare_parameters"):
+            parameters_with_spec = self._prepare_parameters_with_specification(parameters)
+        
+        # Build standard sequences locally without a network round-trip
+        with trace.span("local_synthesis"):
+            sequence = self._synthesize_sequence(parameters, parameters_with_spec)
+        if sequence is not None:
+            trace.attributes["source"] = "local"
+            self.status_updated.emit("Generated standard sequence locally")
+            self.progress_updated.emit(100)
+            with trace.span("deliver"):
+                self.sequence_generated.emit(sequence, "")
+            self._finish_trace(trace)
+            return
+        
+        # Rescale the sequence of a similar spring instead of calling the API
+        with trace.span("neighbour_lookup"):
+            sequence = self._reuse_neighbour(parameters, parameters_with_spec)
+        if sequence is not None:
+            trace.attributes["source"] = "index"
+            self.status_updated.emit("Reused the sequence of a similar spring")
+            self.progress_updated.emit(100)
+            with trace.span("deliver"):
+                self.sequence_generated.emit(sequence, "")
+            self._finish_trace(trace)
+            return
+        
+        trace.attributes["source"] = "api"
+        
+        # Race several candidates for sequence requests and keep the first good one
+        if self.best_of_n > 1 and is_sequence_request(str(parameters.get("prompt", ""))):
+            self._generate_candidates(parameters_with_spec, bypass_cache, trace)
+            return
         
         # Start async generation
+        specification, test_type = self._validation_context(parameters_with_spec)
+        
+        def on_generated(response, error_msg):
+            if self._queue_if_offline(parameters_with_spec, response, error_msg, trace):
+                return
+            if response.has_sequence:
+                with trace.span("validate"):
+                    response, result = self._check_sequence(response, specification, test_type, trace)
+                self._record_validation(trace, result)
+                if result.errors and VALIDATION_RETRIES > 0:
+                    self._request_correction(parameters_with_spec, response, result,
+                                             specification, test_type, trace, VALIDATION_RETRIES)
+                    return
+                if not result.errors:
+                    self._remember_sequence(parameters_with_spec, response.rows, specification, test_type)
+            self._on_sequence_generated(response, error_msg, trace)
+        
         self.api_client.generate_sequence_async(
             parameters_with_spec,
-            self._on_sequence_generated,
+            on_generated,
             self.progress_updated.emit,  # Forward progress signal
-            self.status_updated.emit     # Forward status signal
+            self.status_updated.emit,    # Forward status signal
+            bypass_cache=bypass_cache,
+            stream=self.stream_responses,
+            row_callback=self.row_generated.emit,  # Forward streamed rows
+            trace=trace
+        )
+    
+    def _generate_candidates(self, parameters_with_spec: Dict[str, Any], bypass_cache: bool,
+                             trace: RequestTrace) -> None:
+        """Generate best_of_n candidates concurrently and deliver the best one.
+        
+        Candidates use increasing temperatures. Each is scored by the local
+        validator as it arrives; the first one that clears the quality bar is
+        delivered and the others are cancelled. If none does, the highest
+        scoring candidate is delivered once all have finished.
+        
+        Args:
+            parameters_with_spec: Parameters with spring specification data.
+            bypass_cache: Skip the response cache and force new requests.
+            trace: Trace of the request.
+        """
+        self._cancel_candidates()
+        self.api_client.cancel_current_operation()
+        
+        specification, test_type = self._validation_context(parameters_with_spec)
+        start_time = time.perf_counter()
+        state = {"pending": self.best_of_n, "best": None, "done": False, "error": ""}
+        handles = []
+        
+        def finish(response, result, temperature):
+            state["done"] = True
+            for handle in handles:
+                handle.cancel()
+            if handles is self._candidate_handles:
+                self._candidate_handles = []
+            
+            trace.add("candidates", time.perf_counter() - start_time)
+            trace.attributes["candidates"] = self.best_of_n
+            if result is not None:
+                trace.attributes["candidate_score"] = result.score
+                trace.attributes["candidate_temperature"] = temperature
+                if not result.errors:
+                    self._remember_sequence(parameters_with_spec, response.rows, specification, test_type)
+            if response is not None and not response.is_empty:
+                self.api_client.remember(parameters_with_spec)
+                self._on_sequence_generated(response, "", trace)
+            elif self._queue_if_offline(parameters_with_spec, response or ParsedResponse(), state["error"], trace):
+                return
+            else:
+                self._on_sequence_generated(response or ParsedResponse(), state["error"], trace)
+        
+        def on_candidate(response, error_msg, temperature):
+            if state["done"]:
+                return
+            state["pending"] -= 1
+            
+            result = None
+            if response.has_sequence:
+                response, result = self._check_sequence(response, specification, test_type, trace)
+            elif error_msg:
+                state["error"] = error_msg
+            
+            best = state["best"]
+            if not response.is_empty and (best is None or _candidate_rank(result) > _candidate_rank(best[1])):
+                state["best"] = best = (response, result, temperature)
+            
+            if result is not None and result.acceptable:
+                finish(response, result, temperature)
+            elif state["pending"] == 0:
+                finish(*(best or (None, None, None)))
+        
+        self.status_updated.emit(f"Generating {self.best_of_n} candidate sequences...")
+        for index in range(self.best_of_n):
+            temperature = round(min(1.0, DEFAULT_TEMPERATURE + index * CANDIDATE_TEMPERATURE_STEP), 2)
+            handles.append(self.api_client.generate_sequence_async(
+                parameters_with_spec,
+                lambda response, error_msg, t=temperature: on_candidate(response, error_msg, t),
+                self.progress_updated.emit if index == 0 else None,  # One progress bar for all
+                temperature=temperature,
+                bypass_cache=bypass_cache,
+                priority=PRIORITY_CANDIDATE,
+                use_chat_memory=False  # Only the chosen candidate is remembered
+            ))
+        if not state["done"]:
+            self._candidate_handles = handles
+    
+    def _validation_context(self, parameters: Dict[str, Any],
+                            specification: Optional[SpringSpecification] = None
+                            ) -> Tuple[Optional[SpringSpecification], Optional[str]]:
+        """Get the specification and test type a generated sequence is validated against.
+        
+        Args:
+            parameters: Parameters of the request.
+            specification: Specification to use instead of the current one.
+            
+        Returns:
+            Tuple of (specification or None if disabled, test type or None if unknown).
+        """
+        specification = specification or self.spring_specification
+        if not specification or not specification.enabled:
+            test_type = parameters.get("Test Type")
+            return None, test_type if test_type in ("Compression", "Tension") else None
+        return specification, self.synthesizer.infer_test_type(parameters, specification)
+    
+    @staticmethod
+    def _correction_parameters(parameters_with_spec: Dict[str, Any],
+                               result: ValidationResult) -> Dict[str, Any]:
+        """Build the parameters of a request for a corrected sequence.
+        
+        Args:
+            parameters_with_spec: Parameters of the original request.
+            result: Validation result of the sequence that was returned.
+            
+        Returns:
+            Parameters whose prompt lists the problems to fix.
+        """
+        corrected = dict(parameters_with_spec)
+        corrected["prompt"] = (
+            f"{parameters_with_spec.get('prompt', '')}\n\n"
+            f"The previous sequence for this request had these problems:\n{result.describe()}\n"
+            "Generate the complete corrected sequence."
+        )
+        return corrected
+    
+    def _check_sequence(self, response: ParsedResponse, specification: Optional[SpringSpecification],
+                        test_type: Optional[str], trace: Optional[RequestTrace] = None
+                        ) -> Tuple[ParsedResponse, ValidationResult]:
+        """Validate a response's sequence and repair what can be fixed locally.
+        
+        Args:
+            response: Parsed API response with sequence rows.
+            specification: Specification to validate against.
+            test_type: Test type to validate against.
+            trace: Trace to record the applied fixes on, if any.
+            
+        Returns:
+            Tuple of (response with the repaired rows, their validation result).
+        """
+        result = self.validator.validate(response.rows, specification, test_type)
+        if not result.diagnostics:
+            return response, result
+        
+        repair = self.repairer.repair(response.rows, specification, test_type, result)
+        if not repair.repaired or repair.validation.score < result.score:
+            return response, result
+        
+        logging.info("Repaired generated sequence: " + "; ".join(fix.message for fix in repair.fixes))
+        if trace is not None:
+            trace.attributes["repairs"] = trace.attributes.get("repairs", []) + [fix.code for fix in repair.fixes]
+        return ParsedResponse(response.chat_text, repair.rows, response.parse_error), repair.validation
+    
+    @staticmethod
+    def _record_validation(trace: Optional[RequestTrace], result: ValidationResult) -> None:
+        """Record a validation result on a trace."""
+        if trace is not None:
+            trace.attributes["validation_score"] = result.score
+            trace.attributes["validation_errors"] = len(result.errors)
+    
+    def _generate_validated(self, request: Callable[[Dict[str, Any]], Tuple[ParsedResponse, str]],
+                            parameters_with_spec: Dict[str, Any],
+                            specification: Optional[SpringSpecification],
+                            test_type: Optional[str]
+                            ) -> Tuple[ParsedResponse, str, Optional[ValidationResult]]:
+        """Send a request and ask for a corrected sequence while the result fails validation.
+        
+        Problems the repairer can fix are fixed locally; the model is only
+        asked again for the ones it cannot.
+        
+        Args:
+            request: Function sending parameters and returning (response, error message).
+            parameters_with_spec: Parameters with spring specification data.
+            specification: Specification to validate against.
+            test_type: Test type to validate against.
+            
+        Returns:
+            Tuple of (response, error message, validation result or None if
+            the response has no sequence). The best-scoring sequence is kept.
+        """
+        response, error_msg = request(parameters_with_spec)
+        if not response.has_sequence:
+            return response, error_msg, None
+        
+        response, result = self._check_sequence(response, specification, test_type)
+        for _ in range(VALIDATION_RETRIES):
+            if not result.errors:
+                break
+            logging.info(f"Generated sequence failed validation, requesting a correction:\n{result.describe()}")
+            corrected, _ = request(self._correction_parameters(parameters_with_spec, result))
+            if not corrected.has_sequence:
+                break
+            corrected, corrected_result = self._check_sequence(corrected, specification, test_type)
+            if corrected_result.score < result.score:
+                break
+            response, result = corrected, corrected_result
+        return response, error_msg, result
+    
+    def _request_correction(self, parameters_with_spec: Dict[str, Any], response: ParsedResponse,
+                            result: ValidationResult, specification: Optional[SpringSpecification],
+                            test_type: Optional[str], trace: RequestTrace, retries: int) -> None:
+        """Ask for a corrected sequence and deliver it, or the original if it is no better.
+        
+        Args:
+            parameters_with_spec: Parameters with spring specification data.
+            response: Response whose sequence failed validation.
+            result: Its validation result.
+            specification: Specification to validate against.
+            test_type: Test type to validate against.
+            trace: Trace of the request.
+            retries: Corrections that may still be requested.
+        """
+        self.status_updated.emit(f"Sequence has {len(result.errors)} problem(s) - requesting a correction...")
+        start_time = time.perf_counter()
+        
+        def on_corrected(corrected, error_msg):
+            trace.add("validation_retry", time.perf_counter() - start_time)
+            if corrected.has_sequence:
+                corrected, corrected_result = self._check_sequence(corrected, specification, test_type, trace)
+                if corrected_result.score >= result.score:
+                    self._record_validation(trace, corrected_result)
+                    if corrected_result.errors and retries > 1:
+                        self._request_correction(parameters_with_spec, corrected, corrected_result,
+                                                 specification, test_type, trace, retries - 1)
+                    else:
+                        if not corrected_result.errors:
+                            self._remember_sequence(parameters_with_spec, corrected.rows,
+                                                    specification, test_type)
+                        self._on_sequence_generated(corrected, "", trace)
+                    return
+            self._on_sequence_generated(response, "", trace)
+        
+        self.api_client.generate_sequence_async(
+            self._correction_parameters(parameters_with_spec, result),
+            on_corrected,
+            self.progress_updated.emit,
+            priority=PRIORITY_INTERACTIVE,  # Cancelled by the operator's next request
+            use_chat_memory=False           # The original request is already in the conversation
+        )
+    
+    def _queue_if_offline(self, parameters_with_spec: Dict[str, Any], response: ParsedResponse,
+                          error_msg: str, trace: Optional[RequestTrace] = None) -> bool:
+        """Queue a failed request for replay if it failed because the API is unreachable.
+        
+        Args:
+            parameters_with_spec: Parameters with spring specification data.
+            response: Parsed API response.
+            error_msg: Error message of the request.
+            trace: Trace of the request, if any.
+            
+        Returns:
+            True if the request was queued, False if it should be reported as usual.
+        """
+        if (self.offline_queue is None or not error_msg or not response.is_empty
+                or not self.api_client.router.is_unreachable()):
+            return False
+        
+        request_id = self.offline_queue.enqueue(parameters_with_spec)
+        if trace is not None:
+            trace.attributes["queued"] = request_id
+            self._finish_trace(trace)
+        self.status_updated.emit("API unreachable - request queued")
+        self.request_queued.emit(request_id, error_msg)
+        return True
+    
+    def replay_offline_queue(self) -> None:
+        """Send the oldest queued request if an endpoint may be reachable.
+        
+        Requests are replayed one at a time, oldest first; each success
+        starts the next one, so the queue drains as soon as the API is back.
+        """
+        if self.offline_queue is None or self._replaying:
+            return
+        if self.api_client.router.retry_in() > 0:
+            return  # Every circuit is open - wait for the next check
+        
+        queued = self.offline_queue.next_pending()
+        if queued is None:
+            return
+        
+        self._replaying = True
+        logging.info(f"Replaying queued request {queued.request_id} (attempt {queued.attempts + 1})")
+        self.status_updated.emit(f"Sending queued request ({len(self.offline_queue)} waiting)...")
+        self.api_client.generate_sequence_async(
+            queued.parameters,
+            lambda response, error_msg: self._on_replay_finished(queued, response, error_msg),
+            priority=PRIORITY_BATCH,    # Never cancels the operator's current request
+            use_chat_memory=False       # The conversation has moved on since the request was made
+        )
+    
+    def _on_replay_finished(self, queued: QueuedRequest, response: ParsedResponse, error_msg: str) -> None:
+        """Handle the result of a replayed request.
+        
+        Args:
+            queued: The replayed request.
+            response: Parsed API response.
+            error_msg: Error message if any.
+        """
+        self._replaying = False
+        
+        if not response.is_empty:
+            self.offline_queue.remove(queued.request_id)
+            if response.chat_text:
+                self.replayed_sequence_generated.emit(response, error_msg)
+            else:
+                self.replayed_sequence_generated.emit(self._build_sequence(response, queued.parameters), error_msg)
+            self.replay_offline_queue()
+            return
+        
+        attempts = self.offline_queue.record_failure(queued.request_id, error_msg)
+        if attempts >= OFFLINE_MAX_ATTEMPTS and not self.api_client.router.is_unreachable():
+            # The API answers but keeps rejecting this request - give it up
+            self.offline_queue.remove(queued.request_id)
+            logging.warning(f"Dropped queued request {queued.request_id} after {attempts} attempts: {error_msg}")
+            self.replayed_sequence_generated.emit(None, f"Queued request could not be sent: {error_msg}")
+            self.replay_offline_queue()
+    
+    def _cancel_candidates(self) -> None:
+        """Cancel the candidates of an unfinished best-of-N request."""
+        handles, self._candidate_handles = self._candidate_handles, []
+        for handle in handles:
+            handle.cancel()
+    
+    def _finish_trace(self, trace: RequestTrace) -> None:
+        """Record a finished request's timings and emit them.
+        
+        Args:
+            trace: The finished trace.
+        """
+        timings = trace.finish()
+        self.metrics.record(timings)
+        self.timings.emit(timings)
+    
+    def _synthesize_sequence(self, parameters: Dict[str, Any],
+                             parameters_with_spec: Dict[str, Any],
+                             specification: Optional[SpringSpecification] = None,
+                             record: bool = True) -> Optional[TestSequence]:
+        """Build the sequence locally if the request follows the standard pattern.
+        
+        Args:
+            parameters: Original parameters dictionary.
+            parameters_with_spec: Parameters with spring specification data.
+            specification: Specification to use instead of the current one.
+            record: Whether to store the sequence as the last sequence and in history.
+            
+        Returns:
+            The synthesized sequence, or None if the request needs the API.
+        """
+        if not self.use_local_synthesis:
+            return None
+        
+        specification = specification or self.spring_specification
+        if not self.synthesizer.can_synthesize(parameters, specification):
+            return None
+        
+        test_type = self.synthesizer.infer_test_type(parameters, specification)
+        speeds = self.calculate_optimal_speeds(specification)
+        
+        # The operator's own templates take precedence over the built-in pattern
+        template_name, rows = self._instantiate_matching_template(specification, test_type, speeds)
+        
+        sequence = TestSequence(
+            rows=rows or self.synthesizer.synthesize(specification, test_type, speeds),
+            parameters=parameters_with_spec,
+            name=template_name
         )
+        
+        # Save sequence for reference
+        if record:
+            self.last_sequence = sequence
+            self.add_to_history(sequence)
+        
+        return sequence
     
-    def _on_sequence_generated(self, df: pd.DataFrame, error_msg: str) -> None:
+    def _instantiate_matching_template(self, specification: SpringSpecification, test_type: str,
+                                       speeds: Dict[str, float]) -> Tuple[Optional[str], Optional[List[Dict[str, Any]]]]:
+        """Fill in the first template for the test type and set points that passes validation.
+        
+        Args:
+            specification: Spring specification.
+            test_type: "Compression" or "Tension".
+            speeds: Speeds from calculate_optimal_speeds.
+            
+        Returns:
+            Tuple of (template name, rows), or (None, None) if no template fits.
+        """
+        if self.template_manager is None:
+            return None, None
+        
+        set_point_count = sum(1 for sp in specification.set_points if sp.enabled)
+        for name in self.template_manager.find_templates(test_type, set_point_count):
+            rows = self.template_manager.instantiate(name, specification, speeds)
+            if rows is None:
+                continue
+            result = self.validator.validate(rows, specification, test_type)
+            if result.errors:
+                logging.info(f"Template '{name}' does not fit this specification:\n{result.describe()}")
+                continue
+            return name, rows
+        return None, None
+    
+    def _reuse_neighbour(self, parameters: Dict[str, Any],
+                         parameters_with_spec: Dict[str, Any],
+                         specification: Optional[SpringSpecification] = None,
+                         record: bool = True) -> Optional[TestSequence]:
+        """Rescale the validated sequence of the nearest similar spring, if there is one.
+        
+        Args:
+            parameters: Original parameters dictionary.
+            parameters_with_spec: Parameters with spring specification data.
+            specification: Specification to use instead of the current one.
+            record: Whether to store the sequence as the last sequence and in history.
+            
+        Returns:
+            The rescaled sequence, or None if no stored sequence is close
+            enough or the rescaled one fails validation.
+        """
+        if self.sequence_index is None:
+            return None
+        
+        specification, test_type = self._validation_context(parameters_with_spec, specification)
+        if specification is None or test_type is None:
+            return None
+        request = self.synthesizer.request_text(parameters, specification)
+        if not is_sequence_request(request):
+            return None
+        
+        neighbour = self.sequence_index.lookup(specification, test_type, request)
+        if neighbour is None:
+            return None
+        
+        rows = neighbour.rescale(specification)
+        result = self.validator.validate(rows, specification, test_type)
+        if result.errors:
+            logging.info(f"Nearest stored sequence does not fit this specification:\n{result.describe()}")
+            return None
+        logging.info(f"Reused stored sequence {neighbour.entry_id} (distance {neighbour.distance:.3f})")
+        
+        sequence = TestSequence(rows=rows, parameters=parameters_with_spec)
+        if record:
+            self.last_sequence = sequence
+            self.add_to_history(sequence)
+        return sequence
+    
+    def _few_shot_examples(self, parameters: Dict[str, Any]) -> List[str]:
+        """Format the validated sequences of the most similar springs as prompt examples.
+        
+        Called by the API client while it builds a request's prompt.
+        
+        Args:
+            parameters: Parameters of the request, with spring specification data.
+            
+        Returns:
+            Examples, most similar first; none for requests that are not for a sequence.
+        """
+        spec_data = parameters.get("spring_specification")
+        if not spec_data or self.few_shot_examples <= 0:
+            return []
+        
+        specification = SpringSpecification.from_dict(spec_data)
+        test_type = self.synthesizer.infer_test_type(parameters, specification)
+        if test_type is None or not is_sequence_request(self.synthesizer.request_text(parameters, specification)):
+            return []
+        
+        neighbours = self.sequence_index.examples(specification, test_type, self.few_shot_examples)
+        return [format_sequence_example(n.request, n.specification, n.rows) for n in neighbours]
+    
+    def _remember_sequence(self, parameters_with_spec: Dict[str, Any], rows: List[Dict[str, Any]],
+                           specification: Optional[SpringSpecification], test_type: Optional[str]) -> None:
+        """Add a generated sequence that passed validation to the sequence index.
+        
+        Args:
+            parameters_with_spec: Parameters the sequence was generated from.
+            rows: Sequence rows.
+            specification: Specification the sequence was validated against.
+            test_type: Test type the sequence was validated against.
+        """
+        if (self.sequence_index is None or specification is None or not specification.enabled
+                or test_type is None):
+            return
+        request = self.synthesizer.request_text(parameters_with_spec, specification)
+        if is_sequence_request(request):
+            self.sequence_index.add(specification, test_type, request, rows)
+    
+    def _on_sequence_generated(self, response: ParsedResponse, error_msg: str,
+                               trace: Optional[RequestTrace] = None) -> None:
         """Handle sequence generation completion.
         
         Args:
-            df: Generated DataFrame.
+            response: Parsed API response.
             error_msg: Error message if any.
+            trace: Trace of the request, if any.
         """
-        # Check if this is a chat message (has a CHAT row)
-        if not df.empty and "CHAT" in df["Row"].values:
-            # For chat messages, just pass the DataFrame directly
-            self.sequence_generated.emit(df, error_msg)
+        # Check if this is a chat message (has conversational text)
+        if response.chat_text:
+            # For chat messages, just pass the response directly
+            with span(trace, "deliver"):
+                self.sequence_generated.emit(response, error_msg)
+            if trace is not None:
+                self._finish_trace(trace)
             return
+        
+        with span(trace, "sequence_build"):
+            sequence = self._build_sequence(response)
+        
+        # Emit signal
+        with span(trace, "deliver"):
+            self.sequence_generated.emit(sequence, error_msg)
+        if trace is not None:
+            self._finish_trace(trace)
+    
+    def _build_sequence(self, response: ParsedResponse,
+                        parameters: Optional[Dict[str, Any]] = None) -> Optional[TestSequence]:
+        """Create a sequence from a parsed response and store it.
+        
+        Args:
+            response: Parsed API response.
+            parameters: Parameters the sequence was generated from, or None for the last parameters.
             
+        Returns:
+            The sequence, or None if the response has no sequence rows.
+        """
         sequence = None
         
-        if not df.empty:
+        if response.has_sequence:
             # Create TestSequence object
             sequence = TestSequence(
-                rows=df.to_dict('records'),
-                parameters=self.last_parameters
+                rows=response.rows,
+                parameters=parameters if parameters is not None else self.last_parameters
             )
             
             # Save sequence for reference
@@ -351,13 +1205,216 @@ class SequenceGenerator(QObject):
             if len(self.history) > 10:  # Keep history limited
                 self.history = self.history[-10:]
         
-        # Emit signal
-        self.sequence_generated.emit(sequence, error_msg)
+        return sequence
     
     def cancel_current_operation(self) -> None:
         """Cancel the current operation."""
+        self._cancel_candidates()
         self.api_client.cancel_current_operation()
     
+    def get_queued_requests(self) -> List[QueuedRequest]:
+        """Get the requests waiting for the API to become reachable.
+        
+        Returns:
+            Queued requests, oldest first.
+        """
+        return self.offline_queue.pending() if self.offline_queue is not None else []
+    
+    def generate_batch(self, specs: List[Union[SpringSpecification, Dict[str, Any]]],
+                       output_dir: str,
+                       concurrency: Optional[int] = None,
+                       export_service=None,
+                       export_format: str = "CSV",
+                       test_type: Optional[str] = None,
+                       requests_per_second: float = 1.0,
+                       on_result: Optional[Callable[[BatchPartResult], None]] = None,
+                       on_finished: Optional[Callable[[BatchReport], None]] = None) -> BatchRun:
+        """Start generating and exporting sequences for a list of parts.
+        
+        Parts are processed on the API client's executor at batch priority, and
+        at most all but BATCH_RESERVED_WORKERS of its workers are used, so an
+        interactive request always has a free worker. Standard sequences are
+        built locally; the rest share one rate limiter for API calls. Each
+        sequence is exported as soon as it is ready and recorded in a journal
+        in the output directory, so running the same batch again skips the
+        parts that already finished. This call returns at once; each finished
+        part starts the next one.
+        
+        Args:
+            specs: Spring specifications, or part dictionaries from load_parts_csv.
+            output_dir: Directory to export sequences and the report to.
+            concurrency: Maximum number of parts in progress at once, or None
+                for as many as the reserved workers allow.
+            export_service: Export service to use. A new one is created if not given.
+            export_format: Export format name (see ExportService.get_supported_formats).
+            test_type: Test type for parts that do not specify one.
+            requests_per_second: Average rate of API calls across the batch.
+            on_result: Optional function to call with each part result as it completes.
+            on_finished: Optional function to call with the report once the batch is done.
+            
+        Returns:
+            Handle to wait for or cancel the batch; its report fills in as parts finish.
+        """
+        if export_service is None:
+            from services.export_service import ExportService
+            export_service = ExportService()
+        
+        os.makedirs(output_dir, exist_ok=True)
+        journal = BatchJournal(output_dir)
+        completed = journal.load_completed()
+        
+        executor = self.api_client.executor
+        max_concurrency = max(1, executor.max_workers - BATCH_RESERVED_WORKERS)
+        concurrency = max(1, min(concurrency or max_concurrency, max_concurrency))
+        
+        report = BatchReport()
+        run = BatchRun(report)
+        lock = threading.Lock()
+        rate_limiter = RateLimiter(requests_per_second, burst=concurrency)
+        pending = []
+        in_progress = [0]
+        
+        def deliver(result: BatchPartResult) -> None:
+            with lock:
+                report.results.append(result)
+            if on_result:
+                on_result(result)
+        
+        def finish() -> None:
+            report.finished_at = datetime.now()
+            
+            # Write the report next to the exported sequences
+            try:
+                with open(os.path.join(output_dir, "batch_report.json"), "w") as f:
+                    f.write(report.to_json())
+            except IOError as e:
+                logging.error(f"Error writing batch report: {str(e)}")
+            
+            run._finish()
+            if on_finished:
+                on_finished(report)
+        
+        def start_next() -> bool:
+            # Called with the lock held; returns True once nothing is left to run
+            while pending and not run.cancelled and in_progress[0] < concurrency:
+                specification, part_test_type = pending.pop(0)
+                in_progress[0] += 1
+                executor.submit(lambda s=specification, t=part_test_type: run_part(s, t),
+                                priority=PRIORITY_BATCH)
+            return in_progress[0] == 0
+        
+        def run_part(specification: SpringSpecification, part_test_type: Optional[str]) -> None:
+            try:
+                result = self._generate_batch_part(
+                    specification, part_test_type, output_dir, export_service, export_format, rate_limiter
+                )
+                if result.success:
+                    journal.record(result)
+                deliver(result)
+            finally:
+                with lock:
+                    in_progress[0] -= 1
+                    finished = start_next()
+                if finished:
+                    finish()
+        
+        for spec in specs:
+            if isinstance(spec, dict):
+                specification = spec["specification"]
+                part_test_type = spec.get("test_type") or test_type
+            else:
+                specification = spec
+                part_test_type = test_type
+            
+            # Skip parts finished by an earlier run
+            previous = completed.get(specification.part_number)
+            if previous is not None:
+                previous.source = "resumed"
+                deliver(previous)
+                continue
+            
+            pending.append((specification, part_test_type))
+        
+        with lock:
+            finished = start_next()
+        if finished:
+            finish()
+        
+        return run
+    
+    def _generate_batch_part(self, specification: SpringSpecification, test_type: Optional[str],
+                             output_dir: str, export_service, export_format: str,
+                             rate_limiter: RateLimiter) -> BatchPartResult:
+        """Generate and export the sequence for a single part of a batch.
+        
+        Args:
+            specification: Spring specification of the part.
+            test_type: "Compression", "Tension" or None to infer it.
+            output_dir: Directory to export the sequence to.
+            export_service: Export service to use.
+            export_format: Export format name.
+            rate_limiter: Rate limiter shared by the batch for API calls.
+            
+        Returns:
+            Result for the part.
+        """
+        start_time = time.monotonic()
+        part_number = specification.part_number
+        
+        def failure(error: str, source: str) -> BatchPartResult:
+            return BatchPartResult(part_number, False, error=error, source=source,
+                                   duration_s=time.monotonic() - start_time)
+        
+        try:
+            prompt = f"Generate a {test_type} test sequence" if test_type else "Generate a test sequence"
+            parameters = {
+                "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "prompt": prompt
+            }
+            if test_type:
+                parameters["Test Type"] = test_type
+            parameters_with_spec = self._prepare_parameters_with_specification(parameters, specification)
+            
+            # Standard sequences and springs like ones generated before need no API call
+            source = "local"
+            sequence = self._synthesize_sequence(parameters, parameters_with_spec, specification, record=False)
+            if sequence is None:
+                source = "index"
+                sequence = self._reuse_neighbour(parameters, parameters_with_spec, specification, record=False)
+            
+            if sequence is None:
+                source = "api"
+                
+                def request(params):
+                    rate_limiter.acquire()
+                    return self.api_client.run_request(params)
+                
+                validation_spec, validation_type = self._validation_context(parameters, specification)
+                response, error_msg, result = self._generate_validated(
+                    request, parameters_with_spec, validation_spec, validation_type
+                )
+                if not response.has_sequence:
+                    return failure(error_msg or "No sequence data in response", source)
+                if result.errors:
+                    # Nobody reviews batch output before it is exported
+                    return failure(f"Sequence failed validation:\n{result.describe()}", source)
+                self._remember_sequence(parameters_with_spec, response.rows, validation_spec, validation_type)
+                sequence = TestSequence(rows=response.rows, parameters=parameters_with_spec)
+            
+            sequence.name = part_number
+            extension = FILE_FORMATS.get(export_format, ".csv")
+            file_path = os.path.join(output_dir, safe_file_name(part_number) + extension)
+            
+            success, error_msg = export_service.export_sequence(sequence, file_path, export_format)
+            if not success:
+                return failure(error_msg, source)
+            
+            return BatchPartResult(part_number, True, file_path=file_path, source=source,
+                                   duration_s=time.monotonic() - start_time)
+        except Exception as e:
+            logging.error(f"Error generating batch part {part_number}: {str(e)}")
+            return failure(str(e), "error")
+    
     def get_last_sequence(self) -> Optional[TestSequence]:
         """Get the last generated sequence.
         
@@ -392,7 +1449,7 @@ class SequenceGenerator(QObject):
         """Validate a sequence.
         
         Args:
-            sequence: Sequence to validate.
+            sequence: Sequence rows to validate.
             
         Returns:
             Tuple of (is_valid, error_message)
@@ -408,7 +1465,11 @@ class SequenceGenerator(QObject):
             if col not in sequence[0]:
                 return False, f"Missing required column: {col}"
         
-        # More validation could be added here
+        # Check the commands and the specification limits
+        specification, test_type = self._validation_context(self.last_parameters or {})
+        result = self.validator.validate(sequence, specification, test_type)
+        if result.errors:
+            return False, result.describe()
         
         return True, ""
     
@@ -420,8 +1481,28 @@ class SequenceGenerator(QObject):
             parameters: Dictionary of parameters to fill in.
             
         Returns:
-            Generated sequence, or None if template not found.
+            Generated sequence, or None if template not found or it needs
+            values the specification does not provide.
         """
-        # This would load predefined templates and fill in the parameters
-        # For now, just return None
-        return None 
\ No newline at end of file
+        if self.template_manager is None:
+            return None
+        
+        # The specification in the parameters, if any, otherwise the current one
+        spec_data = parameters.get("spring_specification")
+        specification = SpringSpecification.from_dict(spec_data) if spec_data else self.spring_specification
+        if specification is None:
+            return None
+        
+        rows = self.template_manager.instantiate(template_name, specification,
+                                                 self.calculate_optimal_speeds(specification))
+        if rows is None:
+            return None
+        
+        sequence = TestSequence(
+            rows=rows,
+            parameters=self._prepare_parameters_with_specification(parameters, specification),
+            name=template_name
+        )
+        self.last_sequence = sequence
+        self.add_to_history(sequence)
+        return sequence
\ No newline at end of file
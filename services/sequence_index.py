@@ -0,0 +1,445 @@
+"""
+Sequence index module for the Spring Test App.
+Contains the nearest-neighbour index of validated sequences and the rescaling
+of a neighbour's sequence to a new specification.
+"""
+import os
+import re
+import json
+import math
+import time
+import heapq
+import bisect
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.data_models import SpringSpecification, SetPoint
+from services.sequence_validator import TOLERANCE_PATTERN
+
+# Try to import numpy for vectorised distances
+try:
+    import numpy as np
+    NUMPY_SUPPORT = True
+except ImportError:
+    NUMPY_SUPPORT = False
+    logging.info("numpy not installed. Sequence index lookups will use plain Python.")
+
+# Largest distance at which a stored sequence is reused. Features are
+# logarithms, so 0.05 is roughly a 5% difference in one dimension.
+NEIGHBOUR_MAX_DISTANCE = 0.05
+
+# Sequences of similar springs shown to the model as examples, and how far
+# their specifications may be from the request's
+EXAMPLE_COUNT = 3
+EXAMPLE_MAX_DISTANCE = 0.5
+
+# Windows with more candidates than this are narrowed on further features
+NARROW_WINDOW_SIZE = 512
+
+# Two positions closer than this (mm) are the same set point
+POSITION_MATCH_MM = 0.01
+
+# Operator requests are compared without case, spacing or trailing punctuation
+REQUEST_SPACING = re.compile(r'\s+')
+
+
+def specification_features(specification: SpringSpecification) -> Tuple[float, ...]:
+    """Get the feature vector of a specification.
+
+    The numeric fields of SpringSpecification.to_dict are used as
+    logarithms, so distances are relative and springs of any size compare
+    alike: free length first (the index is sorted on it), then wire
+    diameter, outer diameter, coil count and the position and load of each
+    enabled set point.
+
+    Args:
+        specification: Spring specification.
+
+    Returns:
+        Tuple of features.
+    """
+    data = specification.to_dict()
+    values = [data["free_length_mm"], data["wire_dia_mm"], data["outer_dia_mm"], data["coil_count"]]
+    for sp in data["set_points"]:
+        if sp["enabled"]:
+            values.extend((sp["position_mm"], sp["load_n"]))
+    return tuple(math.log(max(float(value), 1e-6)) for value in values)
+
+
+def request_signature(request: str) -> str:
+    """Normalise an operator request so rewordings in case and spacing match."""
+    return REQUEST_SPACING.sub(" ", request).strip().rstrip(".!").lower()
+
+
+@dataclass
+class Neighbour:
+    """A stored sequence close to a looked-up specification."""
+    entry_id: int
+    distance: float
+    specification: SpringSpecification  # Specification the sequence was validated for
+    rows: List[Dict[str, Any]]
+    request: str = ""  # Normalised request the sequence was generated for
+
+    def rescale(self, specification: SpringSpecification) -> List[Dict[str, Any]]:
+        """Rescale the sequence to another specification (see rescale_sequence)."""
+        return rescale_sequence(self.rows, self.specification, specification)
+
+
+class _Partition:
+    """Entries sharing a test type, unit, set point count and request, sorted on free length."""
+
+    def __init__(self):
+        self.keys: List[float] = []                # First feature of each entry, ascending
+        self.features: List[Tuple[float, ...]] = []
+        self.ids: List[int] = []
+        self._matrix = None                        # numpy copy of features, rebuilt after inserts
+
+    def insert(self, entry_id: int, features: Tuple[float, ...]) -> None:
+        index = bisect.bisect_right(self.keys, features[0])
+        self.keys.insert(index, features[0])
+        self.features.insert(index, features)
+        self.ids.insert(index, entry_id)
+        self._matrix = None
+
+    def load(self, entries: List[Tuple[int, Tuple[float, ...]]]) -> None:
+        """Add many (entry ID, features) pairs at once, sorting once instead of per entry."""
+        merged = sorted(list(zip(self.ids, self.features)) + entries, key=lambda entry: entry[1][0])
+        self.ids = [entry_id for entry_id, _ in merged]
+        self.features = [features for _, features in merged]
+        self.keys = [features[0] for features in self.features]
+        self._matrix = None
+
+    def find(self, features: Tuple[float, ...]) -> Optional[int]:
+        """Get the ID of an entry with exactly these features, if any."""
+        low = bisect.bisect_left(self.keys, features[0])
+        high = bisect.bisect_right(self.keys, features[0])
+        for index in range(low, high):
+            if self.features[index] == features:
+                return self.ids[index]
+        return None
+
+    def nearest(self, features: Tuple[float, ...], max_distance: float,
+                count: int = 1) -> List[Tuple[int, float]]:
+        """Find the nearest entries within max_distance.
+
+        Only entries whose free length feature is within max_distance can
+        be that close, so the search is limited to a window of the sorted keys.
+        Large windows, e.g. many springs of one free length, are narrowed the
+        same way on the following features before distances are computed.
+
+        Returns:
+            Up to count (entry ID, distance) pairs, nearest first.
+        """
+        low = bisect.bisect_left(self.keys, features[0] - max_distance)
+        high = bisect.bisect_right(self.keys, features[0] + max_distance)
+        if low >= high:
+            return []
+
+        if NUMPY_SUPPORT:
+            if self._matrix is None:
+                # Column-major, so narrowing on one feature reads contiguous memory
+                self._matrix = np.array(self.features, dtype=np.float64, order="F")
+            query = np.array(features)
+            candidates = np.arange(low, high)
+            for column in range(1, len(features)):
+                if len(candidates) <= NARROW_WINDOW_SIZE:
+                    break
+                values = self._matrix[candidates, column] if column > 1 else self._matrix[low:high, column]
+                candidates = candidates[np.abs(values - query[column]) <= max_distance]
+            deltas = self._matrix[candidates] - query
+            distances = np.einsum("ij,ij->i", deltas, deltas)
+            within = np.flatnonzero(distances <= max_distance * max_distance)
+            if len(within) > count:
+                within = within[np.argpartition(distances[within], count - 1)[:count]]
+            found = [(int(candidates[i]), math.sqrt(float(distances[i]))) for i in within]
+        else:
+            found = [(index, math.dist(self.features[index], features)) for index in range(low, high)]
+            found = [(index, distance) for index, distance in found if distance <= max_distance]
+            found = heapq.nsmallest(count, found, key=lambda entry: entry[1])
+
+        return sorted(((self.ids[index], distance) for index, distance in found), key=lambda entry: entry[1])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class SequenceIndex:
+    """Nearest-neighbour index of validated sequences by spring specification.
+
+    Sequences are stored in SQLite with the specification and request they
+    were validated for; the feature vectors are kept in memory, partitioned
+    by test type, unit, set point count and request, and sorted on free
+    length. A lookup only scores the entries whose free length is within
+    range, which takes well under a millisecond at 100k entries.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_distance: float = NEIGHBOUR_MAX_DISTANCE):
+        """Initialize the index and load the stored entries.
+
+        Args:
+            db_path: Path of the database file, or None for sequence_index.db in appdata.
+            max_distance: Largest distance at which a stored sequence is reused.
+        """
+        if db_path is None:
+            data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "appdata")
+            db_path = os.path.join(data_dir, "sequence_index.db")
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_distance = max_distance
+        self._partitions: Dict[Tuple[str, str, int, str], _Partition] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sequences ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "test_type TEXT NOT NULL, "
+                "unit TEXT NOT NULL, "
+                "set_points INTEGER NOT NULL, "
+                "request TEXT NOT NULL, "
+                "features TEXT NOT NULL, "
+                "specification TEXT NOT NULL, "
+                "rows TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            stored = self._conn.execute(
+                "SELECT id, test_type, unit, set_points, request, features FROM sequences"
+            ).fetchall()
+
+        # Features are stored with the entries, so loading needs no specification parsing
+        entries: Dict[Tuple[str, str, int, str], List[Tuple[int, Tuple[float, ...]]]] = {}
+        for entry_id, test_type, unit, set_points, request, features in stored:
+            entries.setdefault((test_type, unit, set_points, request), []).append(
+                (entry_id, tuple(json.loads(features))))
+        for key, partition_entries in entries.items():
+            self._partitions.setdefault(key, _Partition()).load(partition_entries)
+
+    @staticmethod
+    def _partition_key(specification: SpringSpecification, test_type: str,
+                       request: str) -> Tuple[str, str, int, str]:
+        """Get the key of the partition a specification belongs to."""
+        set_point_count = sum(1 for sp in specification.set_points if sp.enabled)
+        return test_type, specification.unit, set_point_count, request
+
+    def _partition(self, specification: SpringSpecification, test_type: str, request: str) -> _Partition:
+        """Get the partition of a specification, creating it if needed."""
+        key = self._partition_key(specification, test_type, request)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = _Partition()
+        return partition
+
+    def add(self, specification: SpringSpecification, test_type: str, request: str,
+            rows: List[Dict[str, Any]]) -> int:
+        """Store a validated sequence.
+
+        A sequence for an identical specification and request replaces the
+        stored one.
+
+        Args:
+            specification: Specification the sequence was validated for.
+            test_type: "Compression" or "Tension".
+            request: The operator's request, without the specification text.
+            rows: Sequence rows.
+
+        Returns:
+            ID of the entry.
+        """
+        request = request_signature(request)
+        features = specification_features(specification)
+        with self._lock, self._conn:
+            partition = self._partition(specification, test_type, request)
+            entry_id = partition.find(features)
+            if entry_id is not None:
+                self._conn.execute(
+                    "UPDATE sequences SET specification = ?, rows = ?, created_at = ? WHERE id = ?",
+                    (json.dumps(specification.to_dict()), json.dumps(rows), time.time(), entry_id)
+                )
+                return entry_id
+
+            _, unit, set_points, _ = self._partition_key(specification, test_type, request)
+            cursor = self._conn.execute(
+                "INSERT INTO sequences (test_type, unit, set_points, request, features, specification, rows, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (test_type, unit, set_points, request, json.dumps(features),
+                 json.dumps(specification.to_dict()), json.dumps(rows), time.time())
+            )
+            partition.insert(cursor.lastrowid, features)
+        return cursor.lastrowid
+
+    def lookup(self, specification: SpringSpecification, test_type: str, request: str,
+               max_distance: Optional[float] = None) -> Optional[Neighbour]:
+        """Find the stored sequence for the nearest specification.
+
+        Args:
+            specification: Specification to find a sequence for.
+            test_type: "Compression" or "Tension".
+            request: The operator's request, without the specification text.
+            max_distance: Largest distance to accept, or None for the index default.
+
+        Returns:
+            The nearest entry, or None if none is within max_distance.
+        """
+        max_distance = self.max_distance if max_distance is None else max_distance
+        with self._lock:
+            partition = self._partitions.get(
+                self._partition_key(specification, test_type, request_signature(request)))
+            found = partition.nearest(specification_features(specification), max_distance) if partition else []
+            if not found:
+                return None
+            return self._neighbour(*found[0])
+
+    def examples(self, specification: SpringSpecification, test_type: str,
+                 count: int = EXAMPLE_COUNT, max_distance: float = EXAMPLE_MAX_DISTANCE) -> List[Neighbour]:
+        """Find the stored sequences for the most similar specifications, whatever their request.
+
+        Args:
+            specification: Specification to find sequences for.
+            test_type: "Compression" or "Tension".
+            count: Largest number of sequences to return.
+            max_distance: Largest distance to accept.
+
+        Returns:
+            Up to count entries, nearest first.
+        """
+        features = specification_features(specification)
+        test_type, unit, set_points, _ = self._partition_key(specification, test_type, "")
+        with self._lock:
+            found = []
+            for key, partition in self._partitions.items():
+                if key[:3] == (test_type, unit, set_points):
+                    found.extend(partition.nearest(features, max_distance, count))
+            found.sort(key=lambda entry: entry[1])
+            return [self._neighbour(entry_id, distance) for entry_id, distance in found[:count]]
+
+    def _neighbour(self, entry_id: int, distance: float) -> Neighbour:
+        """Load a stored entry; the caller holds the lock."""
+        request, spec_json, rows_json = self._conn.execute(
+            "SELECT request, specification, rows FROM sequences WHERE id = ?", (entry_id,)
+        ).fetchone()
+        return Neighbour(entry_id, distance, SpringSpecification.from_dict(json.loads(spec_json)),
+                         json.loads(rows_json), request)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(partition) for partition in self._partitions.values())
+
+
+class _AnchorMap:
+    """Piecewise-linear map through (source, target) anchor values.
+
+    Values beyond the outermost anchors continue from them at a fixed scale.
+    """
+
+    def __init__(self, anchors: List[Tuple[float, float]], scale: float):
+        anchors = sorted(anchors)
+        self.sources = [anchors[0][0]]
+        self.targets = [anchors[0][1]]
+        for source, target in anchors[1:]:
+            if source - self.sources[-1] > 1e-9:  # Keep the first of equal sources
+                self.sources.append(source)
+                self.targets.append(target)
+        self.scale = scale
+
+    def __call__(self, value: float) -> float:
+        index = bisect.bisect_left(self.sources, value)
+        if index == 0:
+            return self.targets[0] + (value - self.sources[0]) * self.scale
+        if index == len(self.sources):
+            return self.targets[-1] + (value - self.sources[-1]) * self.scale
+        s0, s1 = self.sources[index - 1], self.sources[index]
+        t0, t1 = self.targets[index - 1], self.targets[index]
+        return t0 + (value - s0) * (t1 - t0) / (s1 - s0)
+
+
+def rescale_sequence(rows: List[Dict[str, Any]], source: SpringSpecification,
+                     target: SpringSpecification) -> List[Dict[str, Any]]:
+    """Rescale a sequence validated for one specification to a similar one.
+
+    Positions are mapped through the free length and the set point
+    positions, so set point moves land exactly on the new set points and
+    other moves keep their place relative to them. Forces measured at a set
+    point get the new set point's load and tolerance; other forces are
+    mapped through the set point loads. Free length tolerances move with the
+    free length. Speeds and contact forces are kept.
+
+    Args:
+        rows: Sequence rows for the source specification; they are not modified.
+        source: Specification the rows were validated for.
+        target: Specification to rescale to, with as many enabled set points.
+
+    Returns:
+        Rescaled rows.
+    """
+    source_points = [sp for sp in source.set_points if sp.enabled]
+    target_points = [sp for sp in target.set_points if sp.enabled]
+    length_delta = target.free_length_mm - source.free_length_mm
+    length_scale = target.free_length_mm / source.free_length_mm if source.free_length_mm > 0 else 1.0
+
+    position_map = _AnchorMap(
+        [(source.free_length_mm, target.free_length_mm)]
+        + [(s.position_mm, t.position_mm) for s, t in zip(source_points, target_points)],
+        length_scale
+    )
+    load_pairs = [(s.load_n, t.load_n) for s, t in zip(source_points, target_points)]
+    top_source, top_target = max(load_pairs, default=(1.0, 1.0))
+    load_map = _AnchorMap([(0.0, 0.0)] + load_pairs, top_target / top_source if top_source > 0 else 1.0)
+
+    rescaled = []
+    set_point = None  # Target set point of the last move, if it was a set point move
+    for row in rows:
+        row = dict(row)
+        cmd = str(row.get("CMD", "")).strip()
+        condition = _to_float(row.get("Condition"))
+        tolerance = TOLERANCE_PATTERN.match(str(row.get("Tolerance", "") or ""))
+
+        if cmd == "Mv(P)" and condition is not None:
+            row["Condition"] = _format_number(position_map(condition))
+            set_point = next((t for s, t in zip(source_points, target_points)
+                              if abs(s.position_mm - condition) < POSITION_MATCH_MM), None)
+        elif cmd == "FL(P)" and tolerance:
+            row["Tolerance"] = _format_tolerance(*(float(value) + length_delta for value in tolerance.groups()))
+        elif cmd == "Fr(P)" and tolerance:
+            if set_point is not None:
+                row["Tolerance"] = _set_point_tolerance(set_point)
+            else:
+                row["Tolerance"] = _format_tolerance(*(load_map(float(value)) for value in tolerance.groups()))
+        elif cmd == "Mv(F)" and condition is not None:
+            row["Condition"] = _format_number(load_map(condition))
+        rescaled.append(row)
+    return rescaled
+
+
+def _to_float(value) -> Optional[float]:
+    """Convert a cell value to a number, or None if it is not one."""
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_number(value: float) -> str:
+    """Format a number without trailing zeros (e.g. 58.0 -> "58", 21.24 -> "21.24")."""
+    return f"{round(float(value), 2):g}"
+
+
+def _format_tolerance(nominal: float, minimum: float, maximum: float) -> str:
+    """Format a tolerance as "nominal(min,max)"."""
+    return f"{_format_number(nominal)}({_format_number(minimum)},{_format_number(maximum)})"
+
+
+def _set_point_tolerance(sp: SetPoint) -> str:
+    """Format a set point's load tolerance as "nominal(min,max)"."""
+    margin = sp.load_n * sp.tolerance_percent / 100
+    return _format_tolerance(sp.load_n, sp.load_n - margin, sp.load_n + margin)
@@ -0,0 +1,247 @@
+"""
+Sequence repair module for the Spring Test App.
+Contains deterministic fix-ups for generated sequences that are almost valid.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from models.data_models import SpringSpecification
+from utils.constants import COMMANDS
+from services.sequence_validator import (SequenceValidator, ValidationResult, SET_POINT_DESCRIPTION,
+                                         TOLERANCE_PATTERN, ROW_ID_PATTERN, SCRAG_CONDITION_PATTERN)
+
+# Repair passes before giving up; each pass fixes the diagnostics of the previous one
+MAX_REPAIR_PASSES = 3
+
+# Commands keyed by their spelling without case or spaces, e.g. "mv(p)" -> "Mv(P)"
+COMMAND_SPELLINGS = {cmd.lower().replace(" ", ""): cmd for cmd in COMMANDS}
+
+# Numbers in free-form text
+NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+
+# Tolerance written as "nominal ± margin" or "nominal ± percent%"
+PLUS_MINUS_PATTERN = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*(?:±|\+/-|\+-)\s*(\d+(?:\.\d+)?)\s*(%?)\s*$')
+
+# Row reference and cycle count anywhere in a Scrag condition, e.g. "R05, 2 cycles"
+SCRAG_PARTS_PATTERN = re.compile(r'R\s*(\d+)\D+(\d+)', re.IGNORECASE)
+
+
+@dataclass
+class AppliedFix:
+    """A change made to a sequence by the repairer."""
+    code: str  # Code of the diagnostic the fix addresses
+    message: str
+    row: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the fix to a dictionary."""
+        return {"code": self.code, "message": self.message, "row": self.row}
+
+
+@dataclass
+class RepairResult:
+    """Outcome of repairing a sequence."""
+    rows: List[Dict[str, Any]]
+    validation: ValidationResult
+    fixes: List[AppliedFix] = field(default_factory=list)
+
+    @property
+    def repaired(self) -> bool:
+        """Whether any fix was applied."""
+        return bool(self.fixes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a dictionary."""
+        return {
+            "fixes": [fix.to_dict() for fix in self.fixes],
+            "validation": self.validation.to_dict()
+        }
+
+
+class SequenceRepairer:
+    """Fixes near-miss sequences locally, driven by the validator's diagnostics.
+
+    Only mechanical problems are repaired: row numbering, command spelling,
+    tolerance and Scrag notation, Scrag references and a missing closing
+    message. Problems that change what the test does, such as moves past the
+    free length or forces over the safety limit, are left for the model.
+    """
+
+    def __init__(self, validator: Optional[SequenceValidator] = None):
+        """Initialize the repairer.
+
+        Args:
+            validator: Validator used to find and re-check problems.
+        """
+        self.validator = validator or SequenceValidator()
+        self._fixers = {
+            "row_sequence": self._fix_row_sequence,
+            "unknown_command": self._fix_command,
+            "tolerance_format": self._fix_tolerance_format,
+            "tolerance_range": self._fix_tolerance_range,
+            "scrag_format": self._fix_scrag_format,
+            "scrag_reference": self._fix_scrag_reference,
+            "missing_end_message": self._fix_end_message
+        }
+
+    def repair(self, rows: List[Dict[str, Any]],
+               specification: Optional[SpringSpecification] = None,
+               test_type: Optional[str] = None,
+               result: Optional[ValidationResult] = None) -> RepairResult:
+        """Repair what can be fixed locally.
+
+        Args:
+            rows: Sequence rows; they are not modified.
+            specification: Spring specification the sequence was generated for.
+            test_type: "Compression" or "Tension", if known.
+            result: Validation result of the rows, if already known.
+
+        Returns:
+            The repaired rows, their validation result and the fixes applied.
+        """
+        rows = [dict(row) for row in rows]
+        result = result or self.validator.validate(rows, specification, test_type)
+        fixes = []
+
+        for _ in range(MAX_REPAIR_PASSES):
+            applied = []
+            for diagnostic in result.diagnostics:
+                fixer = self._fixers.get(diagnostic.code)
+                fix = fixer(rows, diagnostic.row) if fixer else None
+                if fix is not None:
+                    applied.append(fix)
+            if not applied:
+                break
+            fixes.extend(applied)
+            result = self.validator.validate(rows, specification, test_type)
+            if not result.diagnostics:
+                break
+
+        return RepairResult(rows, result, fixes)
+
+    @staticmethod
+    def _find(rows: List[Dict[str, Any]], row_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Find the row a diagnostic refers to."""
+        for row in rows:
+            if str(row.get("Row", "")).strip() == row_id:
+                return row
+        return None
+
+    def _fix_row_sequence(self, rows, row_id) -> Optional[AppliedFix]:
+        """Renumber the rows from R00 and update the Scrag references to match."""
+        renumbered = {}
+        for index, row in enumerate(rows):
+            old_id = str(row.get("Row", "")).strip()
+            new_id = f"R{index:02d}"
+            match = ROW_ID_PATTERN.match(old_id)
+            if match:
+                renumbered.setdefault(f"R{int(match.group(1)):02d}", new_id)
+            row["Row"] = new_id
+
+        for row in rows:
+            if str(row.get("CMD", "")).strip() != "Scrag":
+                continue
+            match = SCRAG_CONDITION_PATTERN.match(str(row.get("Condition", "")).strip())
+            if match:
+                target = renumbered.get(f"R{int(match.group(1)):02d}")
+                if target:
+                    row["Condition"] = f"{target},{match.group(2)}"
+        return AppliedFix("row_sequence", "Renumbered rows from R00", row_id)
+
+    def _fix_command(self, rows, row_id) -> Optional[AppliedFix]:
+        """Correct the spelling of a known command."""
+        row = self._find(rows, row_id)
+        if row is None:
+            return None
+        cmd = str(row.get("CMD", ""))
+        known = COMMAND_SPELLINGS.get(cmd.strip().lower().replace(" ", ""))
+        if known is None:
+            return None
+        row["CMD"] = known
+        return AppliedFix("unknown_command", f"Changed command '{cmd}' to '{known}'", row_id)
+
+    def _fix_tolerance_format(self, rows, row_id) -> Optional[AppliedFix]:
+        """Rewrite a tolerance in nominal(min,max) notation."""
+        row = self._find(rows, row_id)
+        if row is None:
+            return None
+        tolerance = str(row.get("Tolerance", ""))
+
+        match = PLUS_MINUS_PATTERN.match(tolerance)
+        if match:
+            nominal, margin = float(match.group(1)), float(match.group(2))
+            if match.group(3):
+                margin = nominal * margin / 100
+            values = (nominal, nominal - margin, nominal + margin)
+        else:
+            numbers = NUMBER_PATTERN.findall(tolerance)
+            if len(numbers) != 3:
+                return None
+            values = tuple(float(number) for number in numbers)
+
+        row["Tolerance"] = _format_tolerance(*values)
+        return AppliedFix("tolerance_format", f"Rewrote tolerance '{tolerance}' as '{row['Tolerance']}'", row_id)
+
+    def _fix_tolerance_range(self, rows, row_id) -> Optional[AppliedFix]:
+        """Swap tolerance limits given in the wrong order."""
+        row = self._find(rows, row_id)
+        match = TOLERANCE_PATTERN.match(str(row.get("Tolerance", ""))) if row else None
+        if match is None:
+            return None
+        nominal, minimum, maximum = (float(group) for group in match.groups())
+        if not maximum <= nominal <= minimum:
+            return None  # The nominal value itself is outside the limits
+        row["Tolerance"] = _format_tolerance(nominal, maximum, minimum)
+        return AppliedFix("tolerance_range", "Swapped the tolerance limits", row_id)
+
+    def _fix_scrag_format(self, rows, row_id) -> Optional[AppliedFix]:
+        """Rewrite a Scrag condition in Rxx,n notation."""
+        row = self._find(rows, row_id)
+        match = SCRAG_PARTS_PATTERN.search(str(row.get("Condition", ""))) if row else None
+        if match is None or int(match.group(2)) < 1:
+            return None
+        condition = row["Condition"]
+        row["Condition"] = f"R{int(match.group(1)):02d},{int(match.group(2))}"
+        return AppliedFix("scrag_format", f"Rewrote Scrag condition '{condition}' as '{row['Condition']}'", row_id)
+
+    def _fix_scrag_reference(self, rows, row_id) -> Optional[AppliedFix]:
+        """Point a Scrag at the set point move just before it."""
+        for index, row in enumerate(rows):
+            if str(row.get("Row", "")).strip() == row_id:
+                break
+        else:
+            return None
+
+        match = SCRAG_CONDITION_PATTERN.match(str(row.get("Condition", "")).strip())
+        if match is None:
+            return None
+        for previous in reversed(rows[:index]):
+            if (str(previous.get("CMD", "")).strip() == "Mv(P)"
+                    and SET_POINT_DESCRIPTION.match(str(previous.get("Description", "")).strip())):
+                target = str(previous.get("Row", "")).strip()
+                row["Condition"] = f"{target},{match.group(2)}"
+                return AppliedFix("scrag_reference", f"Pointed Scrag at set point move {target}", row_id)
+        return None
+
+    @staticmethod
+    def _fix_end_message(rows, row_id) -> Optional[AppliedFix]:
+        """Close the sequence with a user message."""
+        if rows and str(rows[-1].get("CMD", "")).strip() == "PMsg":
+            return None  # Already fixed, e.g. a misspelled PMsg
+        new_id = f"R{len(rows):02d}"
+        rows.append({
+            "Row": new_id,
+            "CMD": "PMsg",
+            "Description": "User Message",
+            "Condition": "Test Completed",
+            "Unit": "",
+            "Tolerance": "",
+            "Speed rpm": ""
+        })
+        return AppliedFix("missing_end_message", "Added a closing user message", new_id)
+
+
+def _format_tolerance(nominal: float, minimum: float, maximum: float) -> str:
+    """Format a tolerance as "nominal(min,max)"."""
+    return f"{round(nominal, 2):g}({round(minimum, 2):g},{round(maximum, 2):g})"
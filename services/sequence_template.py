@@ -0,0 +1,160 @@
+"""
+Sequence template module for the Spring Test App.
+Contains the compiler for parameterised sequence templates.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.data_models import SpringSpecification, SetPoint
+
+# Placeholders such as {free_length}, {L2} or {tolerance(sp1)}
+PLACEHOLDER_PATTERN = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)(?:\(sp(\d+)\))?\}')
+
+# Set point position shorthand: {L1} is {position(sp1)}
+SET_POINT_SHORTHAND = re.compile(r'^L(\d+)$')
+
+# Tolerance of {free_length_tolerance} (mm), as in the standard sequence
+FREE_LENGTH_TOLERANCE_MM = 1.0
+
+
+class TemplateError(ValueError):
+    """Raised when a template cannot be compiled or instantiated."""
+
+
+def _number(value: float) -> str:
+    """Format a number without trailing zeros (e.g. 58.0 -> "58", 21.24 -> "21.24")."""
+    return f"{round(float(value), 2):g}"
+
+
+def _tolerance(nominal: float, minimum: float, maximum: float) -> str:
+    """Format a tolerance as "nominal(min,max)"."""
+    return f"{_number(nominal)}({_number(minimum)},{_number(maximum)})"
+
+
+def _set_point_tolerance(sp: SetPoint) -> str:
+    """Format a set point's load tolerance as "nominal(min,max)"."""
+    margin = sp.load_n * sp.tolerance_percent / 100
+    return _tolerance(sp.load_n, sp.load_n - margin, sp.load_n + margin)
+
+
+# Placeholders resolved from the specification
+SPECIFICATION_VALUES: Dict[str, Callable[[SpringSpecification], str]] = {
+    "free_length": lambda spec: _number(spec.free_length_mm),
+    "free_length_tolerance": lambda spec: _tolerance(spec.free_length_mm,
+                                                     spec.free_length_mm - FREE_LENGTH_TOLERANCE_MM,
+                                                     spec.free_length_mm + FREE_LENGTH_TOLERANCE_MM),
+    "safety_limit": lambda spec: _number(spec.safety_limit_n),
+    "wire_dia": lambda spec: _number(spec.wire_dia_mm),
+    "outer_dia": lambda spec: _number(spec.outer_dia_mm),
+    "coil_count": lambda spec: _number(spec.coil_count),
+    "part_name": lambda spec: spec.part_name,
+    "part_number": lambda spec: spec.part_number,
+    "unit": lambda spec: spec.unit
+}
+
+# Placeholders resolved from a set point, written as {name(spN)}
+SET_POINT_VALUES: Dict[str, Callable[[SetPoint], str]] = {
+    "position": lambda sp: _number(sp.position_mm),
+    "load": lambda sp: _number(sp.load_n),
+    "tolerance": _set_point_tolerance
+}
+
+# Placeholders resolved from SequenceGenerator.calculate_optimal_speeds
+SPEED_VALUES = ("threshold_speed", "movement_speed", "contact_force")
+
+
+class CompiledTemplate:
+    """A template compiled into a substitution plan.
+
+    Each cell is parsed once into literal text and value keys, so
+    instantiating only looks up the values the template uses and joins
+    strings.
+    """
+
+    def __init__(self, name: str, rows: List[Dict[str, Any]], test_type: Optional[str] = None):
+        """Compile a template.
+
+        Args:
+            name: Template name.
+            rows: Template rows; cells may contain placeholders.
+            test_type: "Compression" or "Tension" if the template is for one test type.
+
+        Raises:
+            TemplateError: If a placeholder is unknown.
+        """
+        self.name = name
+        self.test_type = test_type
+        self.keys = set()      # Value keys the template needs
+        self.set_points = 0    # Highest set point number referenced
+        self._plan = [[(column, self._compile_cell(str(value) if value is not None else ""))
+                       for column, value in row.items()]
+                      for row in rows]
+
+    def _compile_cell(self, text: str):
+        """Compile a cell into a constant string or a list of literal and key parts."""
+        parts = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            if match.start() > position:
+                parts.append((False, text[position:match.start()]))
+            parts.append((True, self._compile_key(match)))
+            position = match.end()
+        if not parts:
+            return text  # No placeholders
+        if position < len(text):
+            parts.append((False, text[position:]))
+        return parts
+
+    def _compile_key(self, match) -> Tuple[str, int]:
+        """Resolve a placeholder to a (value name, set point number) key."""
+        name, index = match.group(1), match.group(2)
+        shorthand = SET_POINT_SHORTHAND.match(name)
+        if shorthand and index is None:
+            name, index = "position", shorthand.group(1)
+
+        if index is not None:
+            if name not in SET_POINT_VALUES or int(index) < 1:
+                raise TemplateError(f"Unknown placeholder '{match.group(0)}' in template '{self.name}'")
+            key = (name, int(index))
+            self.set_points = max(self.set_points, int(index))
+        elif name in SPECIFICATION_VALUES or name in SPEED_VALUES:
+            key = (name, 0)
+        else:
+            raise TemplateError(f"Unknown placeholder '{match.group(0)}' in template '{self.name}'")
+
+        self.keys.add(key)
+        return key
+
+    def instantiate(self, specification: SpringSpecification,
+                    speeds: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """Fill in the template for a specification.
+
+        Args:
+            specification: Spring specification; set point N is its N-th enabled set point.
+            speeds: Speeds from SequenceGenerator.calculate_optimal_speeds, if the template uses them.
+
+        Returns:
+            Sequence rows.
+
+        Raises:
+            TemplateError: If the specification does not provide a value the template needs.
+        """
+        set_points = [sp for sp in specification.set_points if sp.enabled]
+        values = {}
+        for key in self.keys:
+            name, index = key
+            if index:
+                if index > len(set_points):
+                    raise TemplateError(f"Template '{self.name}' needs set point {index}")
+                values[key] = SET_POINT_VALUES[name](set_points[index - 1])
+            elif name in SPEED_VALUES:
+                if not speeds or name not in speeds:
+                    raise TemplateError(f"Template '{self.name}' needs the {name.replace('_', ' ')}")
+                values[key] = _number(speeds[name])
+            else:
+                values[key] = SPECIFICATION_VALUES[name](specification)
+
+        return [{column: cell if isinstance(cell, str)
+                 else "".join(values[part] if is_key else part for is_key, part in cell)
+                 for column, cell in row}
+                for row in self._plan]
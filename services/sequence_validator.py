@@ -0,0 +1,247 @@
+"""
+Sequence validator module for the Spring Test App.
+Contains the local rule checker that gates and scores generated test sequences.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from models.data_models import SpringSpecification
+from utils.constants import COMMANDS
+
+# Diagnostic severities
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+# Score lost per diagnostic
+ERROR_PENALTY = 0.25
+WARNING_PENALTY = 0.05
+
+# Lowest score a sequence without errors needs to be accepted
+QUALITY_BAR = 0.9
+
+# Tolerance format "nominal(min,max)"
+TOLERANCE_PATTERN = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*\(\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*\)\s*$')
+
+# Set point moves are described as L1, L2, ...
+SET_POINT_DESCRIPTION = re.compile(r'^L\d+$')
+
+# Row IDs R00, R01, ...
+ROW_ID_PATTERN = re.compile(r'^R(\d+)$')
+
+# Scrag condition "Rxx,n": the row to cycle to and the number of cycles
+SCRAG_CONDITION_PATTERN = re.compile(r'^R(\d+)\s*,\s*(\d+)$')
+
+# Known commands, looked up once per row
+COMMAND_SET = frozenset(COMMANDS)
+
+# Commands that measure or wait without moving; set point moves on either side
+# of them must continue in the same direction
+NON_MOVING_COMMANDS = frozenset({"Fr(P)", "TD", "SR", "Calc", "PkF", "PkP"})
+
+# Commands whose Condition is a force
+FORCE_CONDITION_COMMANDS = frozenset({"TH", "Mv(F)"})
+
+
+@dataclass
+class Diagnostic:
+    """A problem found in a sequence."""
+    code: str
+    message: str
+    severity: str = SEVERITY_ERROR
+    row: Optional[str] = None  # Row ID the problem is on, if any
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the diagnostic to a dictionary."""
+        return {
+            "code": self.code,
+            "message": self.message,
+            "severity": self.severity,
+            "row": self.row
+        }
+
+
+@dataclass
+class ValidationResult:
+    """Outcome of validating a sequence."""
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+    quality_bar: float = QUALITY_BAR
+
+    @property
+    def errors(self) -> List[Diagnostic]:
+        """Diagnostics that make the sequence unusable."""
+        return [d for d in self.diagnostics if d.severity == SEVERITY_ERROR]
+
+    @property
+    def warnings(self) -> List[Diagnostic]:
+        """Diagnostics the operator should review."""
+        return [d for d in self.diagnostics if d.severity == SEVERITY_WARNING]
+
+    @property
+    def score(self) -> float:
+        """Quality score from 0 to 1; 1 means no problems were found."""
+        penalty = len(self.errors) * ERROR_PENALTY + len(self.warnings) * WARNING_PENALTY
+        return max(0.0, 1.0 - penalty)
+
+    @property
+    def acceptable(self) -> bool:
+        """Whether the sequence has no errors and clears the quality bar."""
+        return not self.errors and self.score >= self.quality_bar
+
+    def describe(self) -> str:
+        """Describe the errors one per line, e.g. to ask the model for a corrected sequence."""
+        return "\n".join(f"- {d.row}: {d.message}" if d.row else f"- {d.message}" for d in self.errors)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a dictionary."""
+        return {
+            "score": self.score,
+            "acceptable": self.acceptable,
+            "diagnostics": [d.to_dict() for d in self.diagnostics]
+        }
+
+
+class SequenceValidator:
+    """Checks generated sequences against the command grammar and the spring specification.
+
+    All rules are checked in a single pass over the rows with precompiled
+    patterns, so a typical sequence validates in a few tens of microseconds
+    and every generated sequence can be gated before it is shown.
+    """
+
+    def __init__(self, quality_bar: float = QUALITY_BAR):
+        """Initialize the validator.
+
+        Args:
+            quality_bar: Lowest score a sequence without errors needs to be accepted.
+        """
+        self.quality_bar = quality_bar
+
+    def validate(self, rows: List[Dict[str, Any]],
+                 specification: Optional[SpringSpecification] = None,
+                 test_type: Optional[str] = None) -> ValidationResult:
+        """Validate a sequence.
+
+        Args:
+            rows: Sequence rows.
+            specification: Spring specification the sequence was generated for.
+            test_type: "Compression" or "Tension", if known.
+
+        Returns:
+            The diagnostics and score.
+        """
+        result = ValidationResult(quality_bar=self.quality_bar)
+        add = result.diagnostics.append
+
+        if not rows:
+            add(Diagnostic("empty", "Sequence has no rows"))
+            return result
+
+        free_length = specification.free_length_mm if specification and specification.free_length_mm > 0 else None
+        safety_limit = specification.safety_limit_n if specification and specification.safety_limit_n > 0 else None
+        compression = test_type == "Compression"
+        check_direction = test_type in ("Compression", "Tension")
+
+        move_rows = set()          # IDs of Mv(P) rows, for Scrag references
+        scrag_references = []      # (row ID, referenced row ID)
+        has_free_length = False
+        row_ids_consecutive = True
+        last_set_point = None      # Position of the previous set point move in the current run
+
+        for index, row in enumerate(rows):
+            row_id = str(row.get("Row", "")).strip()
+            cmd = str(row.get("CMD", "")).strip()
+            condition = str(row.get("Condition", "") or "").strip()
+
+            # Row IDs - report the first break only, later rows would all be off by one
+            if row_ids_consecutive:
+                match = ROW_ID_PATTERN.match(row_id)
+                if not match or int(match.group(1)) != index:
+                    row_ids_consecutive = False
+                    add(Diagnostic("row_sequence", f"Row ID '{row_id}' should be R{index:02d}", row=row_id))
+
+            if cmd not in COMMAND_SET:
+                add(Diagnostic("unknown_command", f"Unknown command '{cmd}'", row=row_id))
+
+            tolerance = str(row.get("Tolerance", "") or "").strip()
+            if tolerance:
+                match = TOLERANCE_PATTERN.match(tolerance)
+                if not match:
+                    add(Diagnostic("tolerance_format",
+                                   f"Tolerance '{tolerance}' is not in nominal(min,max) format", row=row_id))
+                else:
+                    nominal, minimum, maximum = (float(group) for group in match.groups())
+                    if not minimum <= nominal <= maximum:
+                        add(Diagnostic("tolerance_range",
+                                       f"Tolerance '{tolerance}' does not contain its nominal value", row=row_id))
+                    if cmd == "Fr(P)" and safety_limit is not None and maximum > safety_limit:
+                        add(Diagnostic("over_safety_limit",
+                                       f"Force up to {maximum:g} N exceeds the safety limit of {safety_limit:g} N",
+                                       row=row_id))
+
+            if cmd == "FL(P)":
+                has_free_length = True
+            elif cmd == "Mv(P)":
+                move_rows.add(row_id)
+                position = _to_float(condition)
+                if position is None:
+                    add(Diagnostic("invalid_position", f"Move position '{condition}' is not a number", row=row_id))
+                if SET_POINT_DESCRIPTION.match(str(row.get("Description", "")).strip()):
+                    if position is not None and check_direction:
+                        if free_length is not None:
+                            self._check_side(position, free_length, compression, row_id, add)
+                        if last_set_point is not None and (position >= last_set_point if compression
+                                                           else position <= last_set_point):
+                            add(Diagnostic("non_monotonic",
+                                           f"Set point move to {position:g} mm reverses from {last_set_point:g} mm",
+                                           row=row_id))
+                    last_set_point = position
+                    continue
+            elif cmd == "Scrag":
+                match = SCRAG_CONDITION_PATTERN.match(condition)
+                if not match or int(match.group(2)) < 1:
+                    add(Diagnostic("scrag_format", f"Scrag condition '{condition}' is not in Rxx,n format",
+                                   row=row_id))
+                else:
+                    scrag_references.append((row_id, f"R{int(match.group(1)):02d}"))
+            elif cmd in FORCE_CONDITION_COMMANDS and safety_limit is not None:
+                force = _to_float(condition)
+                if force is not None and force > safety_limit:
+                    add(Diagnostic("over_safety_limit",
+                                   f"Force of {force:g} N exceeds the safety limit of {safety_limit:g} N",
+                                   row=row_id))
+
+            # Anything that moves other than a set point move starts a new run of set points
+            if cmd not in NON_MOVING_COMMANDS:
+                last_set_point = None
+
+        for row_id, target in scrag_references:
+            if target not in move_rows:
+                add(Diagnostic("scrag_reference", f"Scrag refers to {target}, which is not a Mv(P) row",
+                               row=row_id))
+
+        if not has_free_length:
+            add(Diagnostic("missing_free_length", "Sequence never measures the free length (FL(P))"))
+        if str(rows[-1].get("CMD", "")).strip() != "PMsg":
+            add(Diagnostic("missing_end_message", "Sequence does not end with a user message (PMsg)",
+                           SEVERITY_WARNING, str(rows[-1].get("Row", ""))))
+
+        return result
+
+    @staticmethod
+    def _check_side(position, free_length, compression, row_id, add) -> None:
+        """Check that a set point move is on the right side of the free length for the test type."""
+        if compression and position >= free_length:
+            add(Diagnostic("wrong_direction",
+                           f"Compression move to {position:g} mm is not below the free length", row=row_id))
+        elif not compression and position <= free_length:
+            add(Diagnostic("wrong_direction",
+                           f"Tension move to {position:g} mm is not above the free length", row=row_id))
+
+
+def _to_float(value) -> Optional[float]:
+    """Convert a cell value to a number, or None if it is not one."""
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
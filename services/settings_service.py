@@ -164,6 +164,23 @@ class SettingsService:
         self.settings["default_export_format"] = format
         self.save_settings()
     
+    def get_stream_responses(self):
+        """Get whether responses are streamed so rows show up as they are generated.
+        
+        Returns:
+            True if responses are streamed.
+        """
+        return self.settings.get("stream_responses", False)
+    
+    def set_stream_responses(self, enabled):
+        """Set whether responses are streamed.
+        
+        Args:
+            enabled: Whether to stream responses.
+        """
+        self.settings["stream_responses"] = bool(enabled)
+        self.save_settings()
+    
     def add_recent_sequence(self, sequence_id):
         """Add a sequence to the recent sequences list.
         
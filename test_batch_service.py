@@ -0,0 +1,43 @@
+"""
+Tests for loading batch parts lists.
+"""
+import sys
+import os
+import pytest
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.batch_service import load_parts_csv
+
+HEADER = "Part Number,Free Length,Set Point-1 mm,Set Point-1 Load N,Test Type\n"
+
+
+def write_parts(tmp_path, *lines):
+    """Write a parts list with the given data lines."""
+    path = tmp_path / "parts.csv"
+    path.write_text(HEADER + "".join(line + "\n" for line in lines), encoding="utf-8")
+    return str(path)
+
+
+def test_load_parts(tmp_path):
+    """Test that each row becomes a specification with its set points and test type."""
+    parts = load_parts_csv(write_parts(tmp_path, "P-1,50,40,100,compression", "P-2,60,48,120,"))
+    assert [part["specification"].part_number for part in parts] == ["P-1", "P-2"]
+    assert parts[0]["specification"].free_length_mm == 50.0
+    assert parts[0]["specification"].set_points[0].load_n == 100.0
+    assert [part["test_type"] for part in parts] == ["Compression", None]
+
+
+def test_duplicate_part_number_rejected(tmp_path):
+    """Test that a repeated part number is rejected, as it would overwrite the first part's export."""
+    path = write_parts(tmp_path, "P-1,50,40,100,", "P-2,60,48,120,", "P-1,55,44,110,")
+    with pytest.raises(ValueError, match="Line 4: duplicate part number P-1 \\(also on line 2\\)"):
+        load_parts_csv(path)
+
+
+def test_same_export_file_name_rejected(tmp_path):
+    """Test that part numbers differing only in characters dropped from file names are rejected."""
+    path = write_parts(tmp_path, "P/1,50,40,100,", "p_1,60,48,120,")
+    with pytest.raises(ValueError, match="Line 3: part number p_1 has the same export file name as P/1"):
+        load_parts_csv(path)
@@ -0,0 +1,164 @@
+"""
+Tests for the offline queue and its replay by the sequence generator.
+"""
+import sys
+import os
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.response_parser import ParsedResponse
+from services.offline_queue import OfflineQueue, OFFLINE_MAX_ATTEMPTS
+from services.sequence_generator import SequenceGenerator
+
+SEQUENCE = ParsedResponse(rows=[{"Row": "R00", "CMD": "ZF", "Description": "Zero Force",
+                                 "Condition": "", "Unit": "", "Tolerance": "", "Speed rpm": ""}])
+
+
+class FakeRouter:
+    """Router whose reachability is set by the test."""
+
+    def __init__(self):
+        """Initialize the router as reachable."""
+        self.unreachable = False
+
+    def retry_in(self):
+        """Get the seconds until an endpoint accepts requests again."""
+        return 0.0
+
+    def is_unreachable(self):
+        """Check whether no endpoint can currently be reached."""
+        return self.unreachable
+
+
+class FakeClient:
+    """API client that records requests and lets the test finish them."""
+
+    def __init__(self):
+        """Initialize the client with no requests."""
+        self.router = FakeRouter()
+        self.requests = []  # (parameters, callback) of each request, in order
+
+    def generate_sequence_async(self, parameters, callback, *args, **kwargs):
+        """Record a request; the test calls its callback."""
+        self.requests.append((parameters, callback))
+
+    def finish(self, response, error_msg=""):
+        """Finish the most recent request."""
+        self.requests[-1][1](response, error_msg)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Empty queue in a temporary database."""
+    queue = OfflineQueue(str(tmp_path / "queue.db"))
+    yield queue
+    queue.close()
+
+
+@pytest.fixture
+def generator(queue):
+    """Sequence generator replaying the queue through a fake API client."""
+    QCoreApplication.instance() or QCoreApplication([])
+    generator = SequenceGenerator(FakeClient(), offline_queue=queue)
+    generator._replay_timer.stop()
+    generator.results = []
+    generator.live_results = []
+    generator.replayed_sequence_generated.connect(lambda sequence, error: generator.results.append((sequence, error)))
+    generator.sequence_generated.connect(lambda sequence, error: generator.live_results.append((sequence, error)))
+    return generator
+
+
+def test_enqueue(queue):
+    """Test that enqueued requests are stored with their parameters."""
+    first = queue.enqueue({"prompt": "first", "spring_specification": {"free_length_mm": 50.0}})
+    second = queue.enqueue({"prompt": "second"})
+
+    assert second > first
+    assert len(queue) == 2
+    queued = queue.next_pending()
+    assert queued.request_id == first
+    assert queued.prompt == "first"
+    assert queued.parameters["spring_specification"] == {"free_length_mm": 50.0}
+    assert queued.attempts == 0
+
+
+def test_pending_oldest_first(queue):
+    """Test that requests come back in the order they were queued, also after a restart."""
+    for prompt in ("a", "b", "c"):
+        queue.enqueue({"prompt": prompt})
+    queue.remove(queue.pending()[1].request_id)
+
+    reopened = OfflineQueue(queue.db_path)
+    try:
+        assert [q.prompt for q in reopened.pending()] == ["a", "c"]
+    finally:
+        reopened.close()
+
+
+def test_record_failure_counts_attempts(queue):
+    """Test that failures are counted and the last error is kept."""
+    request_id = queue.enqueue({"prompt": "a"})
+    assert queue.record_failure(request_id, "timeout") == 1
+    assert queue.record_failure(request_id, "refused") == 2
+    queued = queue.next_pending()
+    assert queued.attempts == 2
+    assert queued.last_error == "refused"
+    assert queue.record_failure(request_id + 1, "missing") == 0
+
+
+def test_replay_order(generator, queue):
+    """Test that queued requests are replayed one at a time, oldest first."""
+    for prompt in ("a", "b", "c"):
+        queue.enqueue({"prompt": prompt})
+    client = generator.api_client
+
+    generator.replay_offline_queue()
+    generator.replay_offline_queue()  # Already replaying - no second request
+    assert [parameters["prompt"] for parameters, _ in client.requests] == ["a"]
+
+    client.finish(SEQUENCE)
+    client.finish(SEQUENCE)
+    client.finish(SEQUENCE)
+
+    assert [parameters["prompt"] for parameters, _ in client.requests] == ["a", "b", "c"]
+    assert [sequence.parameters["prompt"] for sequence, _ in generator.results] == ["a", "b", "c"]
+    assert generator.live_results == []  # Not mistaken for the operator's current request
+    assert len(queue) == 0
+
+
+def test_replay_keeps_request_while_unreachable(generator, queue):
+    """Test that a request is kept past OFFLINE_MAX_ATTEMPTS while the API cannot be reached."""
+    queue.enqueue({"prompt": "a"})
+    client = generator.api_client
+    client.router.unreachable = True
+
+    for _ in range(OFFLINE_MAX_ATTEMPTS + 1):
+        generator.replay_offline_queue()
+        client.finish(ParsedResponse(), "Connection refused")
+
+    assert queue.next_pending().attempts == OFFLINE_MAX_ATTEMPTS + 1
+    assert generator.results == []
+
+
+def test_replay_drops_request_after_max_attempts(generator, queue):
+    """Test that a request the reachable API keeps failing is dropped at OFFLINE_MAX_ATTEMPTS."""
+    queue.enqueue({"prompt": "a"})
+    queue.enqueue({"prompt": "b"})
+    client = generator.api_client
+
+    for attempt in range(1, OFFLINE_MAX_ATTEMPTS):
+        generator.replay_offline_queue()
+        client.finish(ParsedResponse(), "HTTP 400")
+        assert queue.next_pending().attempts == attempt
+
+    generator.replay_offline_queue()
+    client.finish(ParsedResponse(), "HTTP 400")
+
+    assert [q.prompt for q in queue.pending()] == ["b"]
+    assert generator.results == [(None, "Queued request could not be sent: HTTP 400")]
+    assert generator.live_results == []
+    # Dropping a request moves on to the next one
+    assert client.requests[-1][0]["prompt"] == "b"
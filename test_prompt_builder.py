@@ -0,0 +1,121 @@
+"""
+Tests for prompt assembly within a token budget.
+"""
+import sys
+import os
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.prompt_builder import (PromptBuilder, estimate_tokens, fit_examples, PRIORITY_PARAMETERS,
+                                  PRIORITY_EXAMPLES, PRIORITY_CHAT_HISTORY, CHARS_PER_TOKEN)
+from utils.api_client import APIClient, SYSTEM_PROMPT_TEMPLATE
+
+
+def text_of(tokens, fill="x"):
+    """Build a text estimated at exactly the given number of tokens."""
+    return fill * (tokens * CHARS_PER_TOKEN)
+
+
+def make_builder(budget, reserved=0):
+    """Build a prompt with 10 required, 10 parameter, 3x10 example and 3x10 history tokens."""
+    builder = PromptBuilder(budget, reserved)
+    builder.add_section("message", text_of(10, "m"))
+    builder.add_section("parameters", text_of(10, "p"), PRIORITY_PARAMETERS)
+    builder.add_items("examples", [text_of(10, "c"), text_of(10, "b"), text_of(10, "a")],
+                      PRIORITY_EXAMPLES, separator="")
+    builder.add_items("chat_history", [text_of(10, "1"), text_of(10, "2"), text_of(10, "3")],
+                      PRIORITY_CHAT_HISTORY, separator="")
+    return builder
+
+
+def test_estimate_tokens():
+    """Test that tokens are estimated at CHARS_PER_TOKEN characters, rounded up."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("x") == 1
+    assert estimate_tokens(text_of(3)) == 3
+    assert estimate_tokens(text_of(3) + "x") == 4
+
+
+def test_build_within_budget_keeps_everything():
+    """Test that nothing is trimmed when the prompt fits."""
+    prompt = make_builder(80).build()
+    assert prompt.trimmed == {}
+    assert prompt.total_tokens == 80
+    assert prompt.section_tokens == {"message": 10, "parameters": 10, "examples": 30, "chat_history": 30}
+
+
+def test_build_trims_to_budget():
+    """Test that the built prompt stays within budget for every budget the required text fits in."""
+    for budget in range(10, 81):
+        prompt = make_builder(budget).build()
+        assert prompt.total_tokens <= budget
+        assert prompt.text.startswith(text_of(10, "m"))
+
+
+def test_build_trims_lowest_priority_oldest_first():
+    """Test that chat history goes first, oldest entry first, then examples, then parameters."""
+    prompt = make_builder(60).build()
+    assert prompt.trimmed == {"chat_history": 2}
+    assert "3" in prompt.text and "1" not in prompt.text and "2" not in prompt.text
+
+    prompt = make_builder(40).build()
+    assert prompt.trimmed == {"chat_history": 3, "examples": 1}
+    assert "c" not in prompt.text and "b" in prompt.text and "a" in prompt.text
+
+    prompt = make_builder(15).build()
+    assert prompt.trimmed == {"chat_history": 3, "examples": 3, "parameters": 1}
+    assert prompt.text == text_of(10, "m")
+
+
+def test_build_counts_reserved_tokens():
+    """Test that tokens reserved for the system prompt come out of the budget."""
+    prompt = make_builder(80, reserved=20).build()
+    assert prompt.budget == 60
+    assert prompt.total_tokens <= 60
+    assert prompt.trimmed == {"chat_history": 2}
+
+
+def test_build_never_trims_required_sections():
+    """Test that required sections are kept even when they alone exceed the budget."""
+    prompt = make_builder(5).build()
+    assert prompt.text == text_of(10, "m")
+    assert prompt.total_tokens == 10
+
+
+def test_fit_examples_keeps_leading_examples():
+    """Test that fit_examples drops the least useful examples, from the end."""
+    examples = [text_of(40, "a"), text_of(30, "b"), text_of(20, "c")]
+    assert fit_examples(examples, 90) == examples
+    assert fit_examples(examples, 89) == examples[:2]
+    assert fit_examples(examples, 70) == examples[:2]
+    assert fit_examples(examples, 69) == examples[:1]
+    assert fit_examples(examples, 39) == []
+
+
+def test_fit_examples_stops_at_first_misfit():
+    """Test that a smaller, less useful example does not jump ahead of one that did not fit."""
+    examples = [text_of(40, "a"), text_of(50, "b"), text_of(5, "c")]
+    assert fit_examples(examples, 60) == examples[:1]
+
+
+def test_payload_trims_least_similar_example_first():
+    """Test that the client's prompt stays within budget and keeps the most similar examples."""
+    examples = [text_of(40, "A"), text_of(40, "B"), text_of(40, "C")]  # Most similar first
+    client = APIClient("key")
+    client.example_provider = lambda parameters: examples
+    client.example_token_budget = 100  # Room for two
+
+    parameters = {"prompt": "Generate a compression test sequence"}
+    payload, _, report = client.build_payload(parameters, use_chat_memory=False)
+    user_text = payload["messages"][1]["content"]
+    assert text_of(40, "A") in user_text and text_of(40, "B") in user_text
+    assert text_of(40, "C") not in user_text
+
+    # Shrink the prompt budget so only one example fits next to the required sections
+    client.prompt_token_budget = report["total_tokens"] - 20 + estimate_tokens(SYSTEM_PROMPT_TEMPLATE)
+    payload, _, report = client.build_payload(parameters, use_chat_memory=False)
+    user_text = payload["messages"][1]["content"]
+    assert report["total_tokens"] <= report["budget"]
+    assert report["trimmed"] == {"examples": 1}
+    assert text_of(40, "A") in user_text and text_of(40, "B") not in user_text
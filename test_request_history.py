@@ -0,0 +1,136 @@
+"""
+Tests for the request history ring buffer and its spill file.
+"""
+import sys
+import os
+import gzip
+import json
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.request_history import RequestHistory
+
+SYSTEM_PROMPT = "You are a spring test sequence generator. " * 20
+
+
+def make_entry(index, system_prompt=SYSTEM_PROMPT):
+    """Build a history entry for request number index."""
+    return {"timestamp": f"2025-01-01T00:00:{index:02d}",
+            "payload": {"model": "m", "messages": [{"role": "system", "content": system_prompt},
+                                                   {"role": "user", "content": f"request {index}"}]}}
+
+
+def prompts_of(entries):
+    """Get the user message of each entry."""
+    return [entry["payload"]["messages"][1]["content"] for entry in entries]
+
+
+def read_spill_file(path):
+    """Read the records of a gzip spill file."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_ring_buffer_evicts_oldest():
+    """Test that only the most recent max_entries requests are kept, in order."""
+    history = RequestHistory(max_entries=3)
+    for index in range(5):
+        history.append(make_entry(index))
+
+    assert len(history) == 3
+    assert prompts_of(history.last(10)) == ["request 2", "request 3", "request 4"]
+    assert prompts_of(history.last(2)) == ["request 3", "request 4"]
+    assert history.last(0) == []
+    assert prompts_of(history)[0] == "request 2"
+    assert prompts_of([history[-1]]) == ["request 4"]
+
+
+def test_system_prompt_stored_once_by_hash():
+    """Test that entries hold a hash of the system prompt and last() restores the text."""
+    history = RequestHistory(max_entries=5)
+    history.append(make_entry(0))
+    history.append(make_entry(1))
+    history.append(make_entry(2, system_prompt="Another prompt"))
+
+    assert len(history.system_prompts) == 2
+    stored = list(history._entries)
+    assert stored[0]["payload"]["messages"][0] == stored[1]["payload"]["messages"][0]
+    assert "content" not in stored[0]["payload"]["messages"][0]
+    assert stored[0]["payload"]["messages"][0]["content_hash"] in history.system_prompts
+
+    restored = history.last(3)
+    assert [entry["payload"]["messages"][0]["content"] for entry in restored] == [
+        SYSTEM_PROMPT, SYSTEM_PROMPT, "Another prompt"]
+    assert restored[0] == make_entry(0)
+
+
+def test_append_does_not_change_entry():
+    """Test that compacting the stored payload leaves the caller's entry intact."""
+    entry = make_entry(0)
+    RequestHistory().append(entry)
+    assert entry == make_entry(0)
+
+
+def test_evicted_entries_spill_to_gzip(tmp_path):
+    """Test that evicted entries are appended to the spill file, each system prompt written once."""
+    spill_path = str(tmp_path / "history" / "requests.jsonl.gz")
+    history = RequestHistory(max_entries=2, spill_path=spill_path)
+    for index in range(5):
+        history.append(make_entry(index))
+
+    records = read_spill_file(spill_path)
+    prompt_records = [record for record in records if "system_prompt" in record]
+    assert len(prompt_records) == 1
+    assert prompt_records[0]["content"] == SYSTEM_PROMPT
+    assert records[0] == prompt_records[0]  # Written ahead of the first entry using it
+    assert prompts_of([record for record in records if "payload" in record]) == [
+        "request 0", "request 1", "request 2"]
+
+
+def test_no_spill_without_path():
+    """Test that evicted entries are dropped when no spill file is configured."""
+    history = RequestHistory(max_entries=1)
+    history.append(make_entry(0))
+    history.append(make_entry(1))
+    assert prompts_of(history.last(5, include_spilled=True)) == ["request 1"]
+
+
+def test_last_includes_spilled(tmp_path):
+    """Test that last(include_spilled=True) fills in older requests from the spill file."""
+    spill_path = str(tmp_path / "requests.jsonl.gz")
+    history = RequestHistory(max_entries=2, spill_path=spill_path)
+    for index in range(5):
+        history.append(make_entry(index))
+
+    assert prompts_of(history.last(4)) == ["request 3", "request 4"]
+    assert prompts_of(history.last(4, include_spilled=True)) == [
+        "request 1", "request 2", "request 3", "request 4"]
+    assert prompts_of(history.last(2, include_spilled=True)) == ["request 3", "request 4"]
+    assert history.last(10, include_spilled=True)[0] == make_entry(0)
+
+
+def test_spilled_prompts_restored_after_restart(tmp_path):
+    """Test that a new history reads the system prompts back from the spill file."""
+    spill_path = str(tmp_path / "requests.jsonl.gz")
+    history = RequestHistory(max_entries=1, spill_path=spill_path)
+    history.append(make_entry(0))
+    history.append(make_entry(1))
+
+    reopened = RequestHistory(max_entries=1, spill_path=spill_path)
+    assert reopened.last(1, include_spilled=True) == [make_entry(0)]
+
+
+def test_spill_file_rotates(tmp_path):
+    """Test that a full spill file is moved to a single backup and restarted with its prompts."""
+    spill_path = str(tmp_path / "requests.jsonl.gz")
+    history = RequestHistory(max_entries=1, spill_path=spill_path, spill_max_bytes=1)
+    for index in range(4):
+        history.append(make_entry(index))
+
+    assert os.path.exists(spill_path + ".1")
+    assert not os.path.exists(spill_path + ".2")
+    records = read_spill_file(spill_path)
+    assert records[0]["content"] == SYSTEM_PROMPT  # The new file carries the prompt again
+    assert prompts_of(records[1:]) == ["request 2"]
+    assert prompts_of(read_spill_file(spill_path + ".1")[1:]) == ["request 1"]
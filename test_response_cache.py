@@ -0,0 +1,110 @@
+"""
+Tests for the response cache of the API client.
+"""
+import sys
+import os
+import json
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.api_client import APIClient, APIClientWorker, ResponseCache
+from utils.constants import DEFAULT_TEMPERATURE
+
+SEQUENCE_TEXT = ("Here you go\n---SEQUENCE_DATA_START---\n"
+                 + json.dumps([{"Row": "R00", "CMD": "ZF", "Description": "Zero Force", "Condition": "",
+                                "Unit": "", "Tolerance": "", "Speed rpm": ""}])
+                 + "\n---SEQUENCE_DATA_END---\n")
+
+
+class CountingResponse:
+    """Completion response carrying a sequence."""
+
+    status_code = 200
+    headers = {}
+    text = ""
+
+    def raise_for_status(self):
+        """Accept the response."""
+
+    def json(self):
+        """Get the completion body."""
+        return {"choices": [{"message": {"content": SEQUENCE_TEXT}}]}
+
+
+class CountingSession:
+    """Session that counts the requests it sends."""
+
+    def __init__(self):
+        """Initialize the session with no requests sent."""
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        """Count the request and return a sequence."""
+        self.calls += 1
+        return CountingResponse()
+
+
+def make_client(tmp_path):
+    """Build a client with a counting session and an empty cache."""
+    client = APIClient("key")
+    client.session = CountingSession()
+    client.response_cache = ResponseCache(str(tmp_path))
+    return client
+
+
+def test_make_key_covers_payload_and_endpoint():
+    """Test that the key changes with anything in the payload and with the endpoint."""
+    payload = {"model": "m", "temperature": 0.1, "messages": [{"role": "user", "content": "Hello"}]}
+    key = ResponseCache.make_key(payload, "https://a")
+    assert key == ResponseCache.make_key(json.loads(json.dumps(payload)), "https://a")
+    assert key != ResponseCache.make_key(payload, "https://b")
+    assert key != ResponseCache.make_key(dict(payload, model="n"), "https://a")
+    assert key != ResponseCache.make_key(dict(payload, messages=[{"role": "user", "content": "Hello again"}]),
+                                         "https://a")
+
+
+def test_repeated_request_is_cached(tmp_path):
+    """Test that the same request in the same context is served from the cache."""
+    client = make_client(tmp_path)
+    parameters = {"prompt": "Generate a compression test sequence"}
+    for _ in range(2):
+        response, error_msg = client.run_request(parameters)
+        assert response.has_sequence, error_msg
+    assert client.session.calls == 1
+
+
+def run_with_memory(client, parameters):
+    """Run a request on this thread with the conversation context, as interactive requests do."""
+    worker = APIClientWorker(client, parameters, None, DEFAULT_TEMPERATURE, 3, use_chat_memory=True)
+    result = []
+    worker.finished.connect(lambda response, error_msg: result.append(response))
+    worker.run()
+    return result[0]
+
+
+def test_chat_context_is_part_of_the_key(tmp_path):
+    """Test that a follow-up request in a different conversation is not answered from the cache."""
+    client = make_client(tmp_path)
+    follow_up = {"prompt": "Now make the previous sequence 3 cycles"}
+
+    client.chat_memory.append("Generate a compression test sequence")
+    assert run_with_memory(client, follow_up).has_sequence
+    assert client.session.calls == 1
+
+    client.chat_memory.clear()
+    client.chat_memory.append("Generate a tension test sequence")
+    assert run_with_memory(client, follow_up).has_sequence
+    assert client.session.calls == 2
+
+
+def test_examples_are_part_of_the_key(tmp_path):
+    """Test that a request shown different few-shot examples is not answered from the cache."""
+    client = make_client(tmp_path)
+    parameters = {"prompt": "Generate a compression test sequence"}
+    client.run_request(parameters)
+
+    client.example_provider = lambda parameters: ["Request: example\n[\"R00\",\"ZF\"]"]
+    client.run_request(parameters)
+    client.run_request(parameters)
+    assert client.session.calls == 2
@@ -0,0 +1,230 @@
+"""
+Tests for the retry policy and the circuit breaker.
+"""
+import sys
+import os
+import random
+import pytest
+import requests
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import retry_policy
+from utils.retry_policy import (RetryPolicy, CircuitBreaker, is_endpoint_failure, CIRCUIT_CLOSED,
+                                CIRCUIT_OPEN, CIRCUIT_HALF_OPEN, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+                                RETRY_AFTER_LIMIT, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+from utils.api_client import APIClient
+
+
+class FakeClock:
+    """Stands in for the time module; only moves when the test advances it."""
+
+    def __init__(self):
+        """Initialize the clock at an arbitrary start time."""
+        self.now = 1000.0
+
+    def monotonic(self):
+        """Get the current fake time."""
+        return self.now
+
+    def advance(self, seconds):
+        """Move the clock forward."""
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake clock used by the circuit breaker."""
+    clock = FakeClock()
+    monkeypatch.setattr(retry_policy, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def seeded(monkeypatch):
+    """Seed the jitter with a fixed random generator."""
+    monkeypatch.setattr(retry_policy, "random", random.Random(1234))
+
+
+def http_error(status_code, headers=None):
+    """Build the error requests raises for an HTTP error response."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return requests.exceptions.HTTPError(f"{status_code} Error", response=response)
+
+
+def test_first_delay_is_base_delay(seeded):
+    """Test that the first retry waits exactly the base delay."""
+    assert RetryPolicy().next_delay(http_error(503)) == RETRY_BASE_DELAY
+
+
+def test_decorrelated_jitter_bounds(seeded):
+    """Test that each delay is between the base and three times the previous one, capped at the maximum."""
+    policy = RetryPolicy()
+    error = requests.exceptions.ConnectionError("refused")
+    delay = 0.0
+    delays = []
+    for _ in range(200):
+        upper = min(RETRY_MAX_DELAY, max(RETRY_BASE_DELAY, delay * 3))
+        delay = policy.next_delay(error, delay)
+        assert RETRY_BASE_DELAY <= delay <= upper
+        delays.append(delay)
+    assert max(delays) == RETRY_MAX_DELAY  # The cap is reached and held
+    assert len(set(delays)) > 100          # Not a fixed schedule
+
+
+def test_jitter_is_reproducible_with_seed(monkeypatch):
+    """Test that the same seed gives the same delays."""
+    def schedule(seed):
+        monkeypatch.setattr(retry_policy, "random", random.Random(seed))
+        policy = RetryPolicy()
+        delays = [0.0]
+        for _ in range(10):
+            delays.append(policy.next_delay(http_error(502), delays[-1]))
+        return delays
+
+    assert schedule(7) == schedule(7)
+    assert schedule(7) != schedule(8)
+
+
+def test_retry_after_is_honoured():
+    """Test that Retry-After replaces the backoff, up to the limit."""
+    policy = RetryPolicy()
+    assert policy.next_delay(http_error(429, {"Retry-After": "12"}), 5.0) == 12.0
+    assert policy.next_delay(http_error(503, {"Retry-After": str(RETRY_AFTER_LIMIT + 1)})) is None
+    date_delay = policy.next_delay(http_error(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}))
+    assert date_delay == 0.0  # A date in the past means retry now
+
+
+@pytest.mark.parametrize("error", [
+    http_error(401),  # Invalid key
+    http_error(403),
+    http_error(400),
+    http_error(404),
+    http_error(401, {"Retry-After": "1"}),
+    ValueError("not a request error"),
+], ids=["401", "403", "400", "404", "401-retry-after", "other"])
+def test_no_retry(seeded, error):
+    """Test that client errors such as an invalid key are not retried."""
+    assert RetryPolicy().next_delay(error, 2.0) is None
+
+
+def test_endpoint_failures():
+    """Test that only connection errors, timeouts and 5xx responses count against an endpoint."""
+    assert is_endpoint_failure(requests.exceptions.ConnectionError())
+    assert is_endpoint_failure(requests.exceptions.Timeout())
+    assert is_endpoint_failure(http_error(500))
+    assert not is_endpoint_failure(http_error(401))
+    assert not is_endpoint_failure(http_error(429))
+
+
+def test_breaker_opens_after_threshold(clock):
+    """Test that the circuit opens after BREAKER_FAILURE_THRESHOLD consecutive failures."""
+    breaker = CircuitBreaker()
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_stats()["rejected"] == 1
+    assert breaker.retry_in() == BREAKER_RESET_TIMEOUT
+
+    clock.advance(10)
+    assert breaker.retry_in() == BREAKER_RESET_TIMEOUT - 10
+    assert not breaker.allow_request()
+
+
+def test_breaker_success_resets_failure_count(clock):
+    """Test that failures must be consecutive to open the circuit."""
+    breaker = CircuitBreaker()
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_breaker_open_half_open_closed(clock):
+    """Test that after the reset timeout one probe is let through and its success closes the circuit."""
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+
+    clock.advance(BREAKER_RESET_TIMEOUT)
+    assert breaker.retry_in() == 0.0
+    assert breaker.allow_request()           # The probe
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert not breaker.allow_request()       # Only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_breaker_failed_probe_reopens(clock):
+    """Test that a failed probe opens the circuit for another full reset timeout."""
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    clock.advance(BREAKER_RESET_TIMEOUT)
+    assert breaker.allow_request()
+
+    clock.advance(2)
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.retry_in() == BREAKER_RESET_TIMEOUT
+    assert not breaker.allow_request()
+
+    clock.advance(BREAKER_RESET_TIMEOUT)
+    assert breaker.allow_request()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+
+
+def test_breaker_replaces_lost_probe(clock):
+    """Test that a probe that never reports back is replaced after the reset timeout."""
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    clock.advance(BREAKER_RESET_TIMEOUT)
+    assert breaker.allow_request()
+
+    clock.advance(BREAKER_RESET_TIMEOUT - 1)
+    assert not breaker.allow_request()
+    clock.advance(1)
+    assert breaker.allow_request()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+
+
+class RejectingSession:
+    """Session whose every request is rejected with an HTTP status."""
+
+    def __init__(self, status_code):
+        """Initialize the session."""
+        self.status_code = status_code
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        """Count the request and return the error response."""
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.url = args[0] if args else ""
+        return response
+
+
+def test_client_does_not_retry_invalid_key():
+    """Test that a request rejected for its key is sent once and not retried."""
+    client = APIClient("invalid-key")
+    client.session = RejectingSession(401)
+    client.response_cache = None
+
+    response, error_msg = client.run_request({"prompt": "Generate a sequence"}, max_retries=3, bypass_cache=True)
+
+    assert client.session.calls == 1
+    assert response.is_empty
+    assert "401" in error_msg
@@ -0,0 +1,171 @@
+"""
+Tests for the sequence index and sequence rescaling.
+"""
+import sys
+import os
+import math
+import pytest
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.data_models import SpringSpecification, SetPoint
+from services import sequence_index
+from services.sequence_index import SequenceIndex, rescale_sequence, NEIGHBOUR_MAX_DISTANCE
+
+REQUEST = "Generate a compression test sequence"
+
+
+def make_specification(free_length=50.0, set_points=((40.0, 100.0), (35.0, 150.0))):
+    """Build a specification with the given free length and (position, load) set points."""
+    return SpringSpecification(part_number="P-1", free_length_mm=free_length,
+                               set_points=[SetPoint(position, load) for position, load in set_points])
+
+
+def make_rows(cells):
+    """Build sequence rows from (CMD, Description, Condition, Tolerance) tuples."""
+    return [{"Row": f"R{index:02d}", "CMD": cmd, "Description": description, "Condition": condition,
+             "Unit": "", "Tolerance": tolerance, "Speed rpm": ""}
+            for index, (cmd, description, condition, tolerance) in enumerate(cells)]
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def index(request, tmp_path, monkeypatch):
+    """Empty index in a temporary database, with and without numpy."""
+    if request.param and not sequence_index.NUMPY_SUPPORT:
+        pytest.skip("numpy not installed")
+    monkeypatch.setattr(sequence_index, "NUMPY_SUPPORT", request.param)
+    index = SequenceIndex(str(tmp_path / "index.db"))
+    yield index
+    index.close()
+
+
+def test_lookup_exact_match(index):
+    """Test that a stored specification is found at distance zero."""
+    entry_id = index.add(make_specification(), "Compression", REQUEST, make_rows([("ZF", "", "", "")]))
+    neighbour = index.lookup(make_specification(), "Compression", REQUEST)
+    assert neighbour.entry_id == entry_id
+    assert neighbour.distance == 0.0
+    assert neighbour.rows[0]["CMD"] == "ZF"
+
+
+def test_lookup_returns_nearest(index):
+    """Test that the nearest of several stored specifications is returned."""
+    for free_length in (49.0, 50.5, 52.0):
+        index.add(make_specification(free_length), "Compression", REQUEST, [])
+    neighbour = index.lookup(make_specification(50.2), "Compression", REQUEST)
+    assert neighbour.specification.free_length_mm == 50.5
+    assert math.isclose(neighbour.distance, math.log(50.5 / 50.2))
+
+
+def test_lookup_threshold(index):
+    """Test that only specifications within max_distance are reused."""
+    index.add(make_specification(), "Compression", REQUEST, [])
+    within = make_specification(50.0 * math.exp(NEIGHBOUR_MAX_DISTANCE * 0.9))
+    beyond = make_specification(50.0 * math.exp(NEIGHBOUR_MAX_DISTANCE * 1.1))
+
+    assert index.lookup(within, "Compression", REQUEST) is not None
+    assert index.lookup(beyond, "Compression", REQUEST) is None
+    assert index.lookup(beyond, "Compression", REQUEST, max_distance=NEIGHBOUR_MAX_DISTANCE * 1.2) is not None
+
+
+def test_lookup_threshold_on_any_feature(index):
+    """Test that a spring differing only in a set point load is outside the threshold."""
+    index.add(make_specification(), "Compression", REQUEST, [])
+    heavier = make_specification(set_points=((40.0, 100.0), (35.0, 150.0 * math.exp(0.06))))
+    assert index.lookup(heavier, "Compression", REQUEST) is None
+
+
+def test_lookup_is_partitioned(index):
+    """Test that sequences are only reused for the same test type, set point count and request."""
+    index.add(make_specification(), "Compression", REQUEST, [])
+    assert index.lookup(make_specification(), "Tension", REQUEST) is None
+    assert index.lookup(make_specification(set_points=((40.0, 100.0),)), "Compression", REQUEST) is None
+    assert index.lookup(make_specification(), "Compression", "Generate a sequence with 3 cycles") is None
+    assert index.lookup(make_specification(), "Compression", "  generate a COMPRESSION test sequence.") is not None
+
+
+def test_add_replaces_identical_specification(index):
+    """Test that storing a sequence for the same specification and request replaces it."""
+    first = index.add(make_specification(), "Compression", REQUEST, make_rows([("ZF", "", "", "")]))
+    second = index.add(make_specification(), "Compression", REQUEST, make_rows([("TH", "", "", "")]))
+    assert first == second
+    assert len(index) == 1
+    assert index.lookup(make_specification(), "Compression", REQUEST).rows[0]["CMD"] == "TH"
+
+
+def test_entries_persist(index):
+    """Test that a new index on the same database loads the stored entries."""
+    index.add(make_specification(), "Compression", REQUEST, [])
+    index.add(make_specification(60.0), "Compression", REQUEST, [])
+    reopened = SequenceIndex(index.db_path)
+    try:
+        assert len(reopened) == 2
+        assert reopened.lookup(make_specification(60.0), "Compression", REQUEST).distance == 0.0
+    finally:
+        reopened.close()
+
+
+def test_examples_nearest_first_across_requests(index):
+    """Test that examples come from any request, nearest first, up to count."""
+    index.add(make_specification(52.0), "Compression", REQUEST, [])
+    index.add(make_specification(50.5), "Compression", "Generate a sequence with 3 cycles", [])
+    index.add(make_specification(51.0), "Compression", REQUEST, [])
+    index.add(make_specification(50.0), "Tension", REQUEST, [])
+
+    examples = index.examples(make_specification(), "Compression", count=2)
+    assert [e.specification.free_length_mm for e in examples] == [50.5, 51.0]
+    assert examples[0].request == "generate a sequence with 3 cycles"
+
+
+def test_rescale_sequence_hand_computed():
+    """Test rescaling against values worked out by hand.
+
+    Positions map through the anchors (35 -> 42, 40 -> 48, 50 -> 60) and
+    continue at 60/50 = 1.2 beyond them. Loads map through (0 -> 0,
+    100 -> 120, 150 -> 180) and continue at 180/150 = 1.2.
+    """
+    source = make_specification(50.0)
+    target = SpringSpecification(part_number="P-2", free_length_mm=60.0,
+                                 set_points=[SetPoint(48.0, 120.0), SetPoint(42.0, 180.0, tolerance_percent=5.0)])
+    rows = make_rows([
+        ("TH", "Search Contact", "10", ""),
+        ("FL(P)", "Measure Free Length-Position", "", "50(49,51)"),
+        ("Mv(P)", "L1", "40", ""),
+        ("Fr(P)", "Force @ Position", "", "100(90,110)"),
+        ("Mv(P)", "L2", "35", ""),
+        ("Fr(P)", "Force @ Position", "", "150(135,165)"),
+        ("Mv(P)", "Move to Position", "37.5", ""),
+        ("Mv(P)", "Move to Position", "30", ""),
+        ("Mv(P)", "Move to Position", "55", ""),
+        ("Fr(P)", "Force @ Position", "", "50(45,55)"),
+        ("Mv(F)", "Move to Force", "125", ""),
+        ("Mv(F)", "Move to Force", "200", ""),
+    ])
+
+    rescaled = rescale_sequence(rows, source, target)
+
+    assert [(row["Condition"], row["Tolerance"]) for row in rescaled] == [
+        ("10", ""),                 # Contact force is kept
+        ("", "60(59,61)"),          # Free length tolerance moves with the free length
+        ("48", ""),                 # Set point 1
+        ("", "120(108,132)"),       # Load and tolerance of target set point 1
+        ("42", ""),                 # Set point 2
+        ("", "180(171,189)"),       # 5% tolerance of target set point 2
+        ("45", ""),                 # 42 + 2.5 * 6/5, between the set points
+        ("36", ""),                 # 42 - 5 * 1.2, below the lowest anchor
+        ("66", ""),                 # 60 + 5 * 1.2, past the free length
+        ("", "60(54,66)"),          # Not at a set point: 50, 45 and 55 N scaled by 120/100
+        ("150", ""),                # 120 + 25 * 60/50
+        ("240", ""),                # 180 + 50 * 1.2
+    ]
+    assert rows[2]["Condition"] == "40"  # Input left unchanged
+
+
+def test_neighbour_rescale(index):
+    """Test that a neighbour rescales its rows from the specification it was stored with."""
+    rows = make_rows([("Mv(P)", "L1", "40", "")])
+    index.add(make_specification(), "Compression", REQUEST, rows)
+    target = make_specification(51.0, ((41.0, 100.0), (35.5, 150.0)))
+    neighbour = index.lookup(target, "Compression", REQUEST)
+    assert neighbour.rescale(target)[0]["Condition"] == "41"
@@ -0,0 +1,119 @@
+"""
+Tests for the sequence repairer.
+"""
+import sys
+import os
+import pytest
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.sequence_validator import SequenceValidator
+from services.sequence_repair import SequenceRepairer, AppliedFix, MAX_REPAIR_PASSES
+from test_sequence_validator import make_rows, SPECIFICATION
+
+
+class CountingValidator(SequenceValidator):
+    """Validator that counts how often it is called."""
+
+    def __init__(self):
+        """Initialize the validator with no calls counted."""
+        super().__init__()
+        self.calls = 0
+
+    def validate(self, rows, specification=None, test_type=None):
+        """Validate a sequence and count the call."""
+        self.calls += 1
+        return super().validate(rows, specification, test_type)
+
+
+@pytest.fixture
+def rows():
+    """Standard compression sequence rows."""
+    return make_rows()
+
+
+@pytest.fixture
+def repairer():
+    """Repairer with a call-counting validator."""
+    return SequenceRepairer(CountingValidator())
+
+
+def repair(repairer, rows):
+    """Repair rows against the test specification."""
+    return repairer.repair(rows, SPECIFICATION, "Compression")
+
+
+def shift_row_ids(rows):
+    """Number the rows from R01, keeping the Scrag pointed at the same move."""
+    for index, row in enumerate(rows):
+        row["Row"] = f"R{index + 1:02d}"
+    rows[5]["Condition"] = "R05,2"
+
+
+def drop_end_message(rows):
+    """Remove the closing PMsg row."""
+    rows.pop()
+
+
+# Diagnostic code -> function breaking the rows in a way its fixer can undo
+BREAKAGES = {
+    "row_sequence": shift_row_ids,
+    "unknown_command": lambda rows: rows[3].update(CMD="mv (p)"),
+    "tolerance_format": lambda rows: rows[10].update(Tolerance="100 ± 10%"),
+    "tolerance_range": lambda rows: rows[10].update(Tolerance="100(110,90)"),
+    "scrag_format": lambda rows: rows[5].update(Condition="R04, 2 cycles"),
+    "scrag_reference": lambda rows: rows[5].update(Condition="R02,2"),
+    "missing_end_message": drop_end_message,
+}
+
+
+@pytest.mark.parametrize("code", sorted(BREAKAGES))
+def test_fixer_clears_its_diagnostic(rows, repairer, code):
+    """Test that each fixer turns the broken sequence back into the standard one."""
+    BREAKAGES[code](rows)
+    before = repairer.validator.validate(rows, SPECIFICATION, "Compression")
+    assert [d.code for d in before.diagnostics] == [code]
+
+    result = repair(repairer, rows)
+
+    assert [fix.code for fix in result.fixes] == [code]
+    assert result.validation.diagnostics == []
+    assert result.rows == make_rows()
+
+
+def test_repair_does_not_modify_input(rows, repairer):
+    """Test that the rows passed in are left as they were."""
+    rows[10]["Tolerance"] = "100 +/- 10"
+    repair(repairer, rows)
+    assert rows[10]["Tolerance"] == "100 +/- 10"
+
+
+def test_clean_sequence_needs_no_pass(rows, repairer):
+    """Test that a valid sequence is validated once and left alone."""
+    result = repair(repairer, rows)
+    assert not result.repaired
+    assert repairer.validator.calls == 1
+
+
+def test_unfixable_sequence_stops_after_first_pass(rows, repairer):
+    """Test that problems left for the model end the repair without further passes."""
+    rows[1]["CMD"] = "Jump"
+    rows[3]["Condition"] = "60"  # Past the free length
+    result = repair(repairer, rows)
+
+    assert not result.repaired
+    assert repairer.validator.calls == 1
+    assert sorted(d.code for d in result.validation.errors) == ["unknown_command", "wrong_direction"]
+
+
+def test_pass_cap_stops_fixes_that_never_clear(rows, repairer):
+    """Test that a fix that keeps applying without clearing its diagnostic is tried MAX_REPAIR_PASSES times."""
+    rows[1]["CMD"] = "Jump"
+    repairer._fixers["unknown_command"] = lambda rows, row_id: AppliedFix("unknown_command", "No change", row_id)
+
+    result = repair(repairer, rows)
+
+    assert len(result.fixes) == MAX_REPAIR_PASSES
+    assert repairer.validator.calls == 1 + MAX_REPAIR_PASSES
+    assert [d.code for d in result.validation.diagnostics] == ["unknown_command"]
@@ -0,0 +1,169 @@
+"""
+Tests for sequence templates and the template manager.
+"""
+import sys
+import os
+import pytest
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Aliased so pytest does not try to collect the dataclass as a test class
+from models.data_models import TestSequence as Sequence, SpringSpecification, SetPoint
+from services.sequence_template import CompiledTemplate, TemplateError
+from services.export_service import TemplateManager
+
+
+SPEEDS = {"threshold_speed": 50, "movement_speed": 200, "contact_force": 10}
+
+# Compression template with two set points: (CMD, Description, Condition, Tolerance, Speed rpm)
+TEMPLATE_ROWS = [
+    ("ZF", "Zero Force", "", "", ""),
+    ("TH", "Search Contact", "{contact_force}", "", "{threshold_speed}"),
+    ("FL(P)", "Measure Free Length-Position", "", "{free_length_tolerance}", ""),
+    ("Mv(P)", "L1", "{L1}", "", "{movement_speed}"),
+    ("Fr(P)", "Force @ Position", "", "{tolerance(sp1)}", ""),
+    ("Mv(P)", "L2", "{position(sp2)}", "", "{movement_speed}"),
+    ("Fr(P)", "Force @ Position", "", "{tolerance(sp2)}", ""),
+    ("PMsg", "User Message", "{part_number} done", "", ""),
+]
+
+# The same template saved with literal values, as before placeholders were supported
+LEGACY_ROWS = [
+    ("ZF", "Zero Force", "", "", ""),
+    ("TH", "Search Contact", "10", "", "50"),
+    ("FL(P)", "Measure Free Length-Position", "", "50(49,51)", ""),
+    ("Mv(P)", "L1", "40", "", "200"),
+    ("Fr(P)", "Force @ Position", "", "100(90,110)", ""),
+    ("Mv(P)", "L2", "35", "", "200"),
+    ("Fr(P)", "Force @ Position", "", "150(135,165)", ""),
+    ("PMsg", "User Message", "Test Completed", "", ""),
+]
+
+
+def make_rows(cells=TEMPLATE_ROWS):
+    """Build template rows from (CMD, Description, Condition, Tolerance, Speed rpm) tuples."""
+    return [
+        {"Row": f"R{index:02d}", "CMD": cmd, "Description": description, "Condition": condition,
+         "Unit": "", "Tolerance": tolerance, "Speed rpm": speed}
+        for index, (cmd, description, condition, tolerance, speed) in enumerate(cells)
+    ]
+
+
+def make_specification():
+    """Build a specification with two enabled set points and a disabled one between them."""
+    return SpringSpecification(part_number="P-7", free_length_mm=58.0, safety_limit_n=300.0,
+                               set_points=[SetPoint(40.0, 23.6),
+                                           SetPoint(35.0, 30.0, enabled=False),
+                                           SetPoint(33.5, 34.14, tolerance_percent=5.0)])
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Template manager with the two-set-point template and a template without placeholders."""
+    manager = TemplateManager(str(tmp_path))
+    manager.save_template("two_points", Sequence(make_rows(), {"Test Type": "Compression"}))
+    manager.save_template("legacy", Sequence(make_rows(LEGACY_ROWS), {"Test Type": "Compression"}))
+    return manager
+
+
+def test_compile_collects_keys():
+    """Test that compiling finds the values and set points a template needs."""
+    compiled = CompiledTemplate("t", make_rows(), "Compression")
+    assert compiled.set_points == 2
+    assert compiled.test_type == "Compression"
+    assert ("position", 1) in compiled.keys  # {L1} shorthand
+    assert ("position", 2) in compiled.keys
+    assert ("tolerance", 2) in compiled.keys
+    assert ("free_length_tolerance", 0) in compiled.keys
+    assert ("movement_speed", 0) in compiled.keys
+
+
+@pytest.mark.parametrize("placeholder", ["{spring_rate}", "{tolerance(sp0)}", "{colour(sp1)}"])
+def test_compile_rejects_unknown_placeholders(placeholder):
+    """Test that unknown placeholders fail at compile time."""
+    rows = make_rows()
+    rows[1]["Condition"] = placeholder
+    with pytest.raises(TemplateError):
+        CompiledTemplate("t", rows)
+
+
+def test_compile_without_placeholders():
+    """Test that a template without placeholders needs no values."""
+    compiled = CompiledTemplate("t", [{"Row": "R00", "CMD": "ZF", "Condition": None}])
+    assert compiled.keys == set()
+    assert compiled.set_points == 0
+    assert compiled.instantiate(SpringSpecification()) == [{"Row": "R00", "CMD": "ZF", "Condition": ""}]
+
+
+def test_instantiate_fills_in_values():
+    """Test that placeholders are replaced with values from the specification and speeds."""
+    rows = CompiledTemplate("t", make_rows()).instantiate(make_specification(), SPEEDS)
+
+    assert rows[1]["Condition"] == "10"
+    assert rows[1]["Speed rpm"] == "50"
+    assert rows[2]["Tolerance"] == "58(57,59)"
+    assert rows[3]["Condition"] == "40"
+    assert rows[4]["Tolerance"] == "23.6(21.24,25.96)"
+    # Set point 2 is the second enabled set point, skipping the disabled one
+    assert rows[5]["Condition"] == "33.5"
+    assert rows[6]["Tolerance"] == "34.14(32.43,35.85)"
+    assert rows[7]["Condition"] == "P-7 done"
+    assert rows[0] == make_rows()[0]
+
+
+def test_instantiate_needs_enough_set_points():
+    """Test that a template needing more set points than the specification has is rejected."""
+    specification = make_specification()
+    specification.set_points[2].enabled = False
+    with pytest.raises(TemplateError):
+        CompiledTemplate("t", make_rows()).instantiate(specification, SPEEDS)
+
+
+def test_instantiate_needs_speeds():
+    """Test that speed placeholders need the speeds."""
+    with pytest.raises(TemplateError):
+        CompiledTemplate("t", make_rows()).instantiate(make_specification())
+
+
+def test_get_compiled_caches_until_saved(manager):
+    """Test that a template is compiled once and recompiled after it is saved again."""
+    compiled = manager.get_compiled("two_points")
+    assert manager.get_compiled("two_points") is compiled
+
+    manager.save_template("two_points", Sequence(make_rows(TEMPLATE_ROWS[:5]), {"Test Type": "Compression"}))
+    recompiled = manager.get_compiled("two_points")
+    assert recompiled is not compiled
+    assert recompiled.set_points == 1
+
+
+def test_get_compiled_invalid_or_missing(manager):
+    """Test that missing templates and templates with unknown placeholders give None."""
+    rows = make_rows()
+    rows[1]["Condition"] = "{spring_rate}"
+    manager.save_template("broken", Sequence(rows, {}))
+    assert manager.get_compiled("broken") is None
+    assert manager.get_compiled("missing") is None
+
+
+def test_manager_instantiate(manager):
+    """Test that the manager fills in templates and returns None when values are missing."""
+    rows = manager.instantiate("two_points", make_specification(), SPEEDS)
+    assert rows[5]["Condition"] == "33.5"
+    assert manager.instantiate("two_points", make_specification()) is None
+    assert manager.instantiate("missing", make_specification(), SPEEDS) is None
+
+
+def test_find_templates_matches_test_type_and_set_points(manager):
+    """Test that templates are found by test type and exact set point count."""
+    assert manager.find_templates("Compression", 2) == ["two_points"]
+    assert manager.find_templates("Compression", 3) == []
+    assert manager.find_templates("Tension", 2) == []
+
+
+def test_find_templates_skips_templates_without_placeholders(manager):
+    """Test that templates without placeholders are only used by name."""
+    assert manager.get_compiled("legacy").keys == set()
+    assert "legacy" not in manager.find_templates("Compression", 0)
+    assert "legacy" not in manager.find_templates("Compression", 2)
+    assert manager.instantiate("legacy", make_specification()) == make_rows(LEGACY_ROWS)
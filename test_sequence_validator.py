@@ -0,0 +1,177 @@
+"""
+Tests for the sequence validator.
+"""
+import sys
+import os
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.data_models import SpringSpecification, SetPoint
+from services.sequence_validator import (SequenceValidator, ValidationResult, Diagnostic,
+                                         SEVERITY_WARNING, QUALITY_BAR)
+
+
+# Standard compression sequence for SPECIFICATION: (CMD, Description, Condition, Tolerance)
+STANDARD_ROWS = [
+    ("ZF", "Zero Force", "", ""),
+    ("TH", "Search Contact", "10", ""),
+    ("FL(P)", "Measure Free Length-Position", "", "50(49,51)"),
+    ("Mv(P)", "L1", "40", ""),
+    ("Mv(P)", "L2", "35", ""),
+    ("Scrag", "Scragging", "R04,2", ""),
+    ("Mv(P)", "Move to Position", "55", ""),
+    ("TH", "Search Contact", "10", ""),
+    ("FL(P)", "Measure Free Length-Position", "", "50(49,51)"),
+    ("Mv(P)", "L1", "40", ""),
+    ("Fr(P)", "Force @ Position", "", "100(90,110)"),
+    ("Mv(P)", "L2", "35", ""),
+    ("Fr(P)", "Force @ Position", "", "150(135,165)"),
+    ("Mv(P)", "Move to Position", "55", ""),
+    ("PMsg", "User Message", "Test Completed", ""),
+]
+
+SPECIFICATION = SpringSpecification(part_number="P-100", free_length_mm=50.0, safety_limit_n=300.0,
+                                    set_points=[SetPoint(40.0, 100.0), SetPoint(35.0, 150.0)])
+
+
+def make_rows():
+    """Build a fresh copy of the standard sequence rows."""
+    return [
+        {"Row": f"R{index:02d}", "CMD": cmd, "Description": description,
+         "Condition": condition, "Unit": "", "Tolerance": tolerance, "Speed rpm": ""}
+        for index, (cmd, description, condition, tolerance) in enumerate(STANDARD_ROWS)
+    ]
+
+
+def validate(rows, test_type="Compression"):
+    """Validate rows against the test specification."""
+    return SequenceValidator().validate(rows, SPECIFICATION, test_type)
+
+
+def codes(result):
+    """Get the diagnostic codes of a validation result."""
+    return [d.code for d in result.diagnostics]
+
+
+def test_standard_sequence_is_clean():
+    """Test that the standard sequence has no diagnostics and a full score."""
+    result = validate(make_rows())
+    assert result.diagnostics == []
+    assert result.score == 1.0
+    assert result.acceptable
+
+
+def test_unknown_command():
+    """Test that commands outside the grammar are errors."""
+    rows = make_rows()
+    rows[1]["CMD"] = "Move"
+    result = validate(rows)
+    assert codes(result) == ["unknown_command"]
+    assert result.diagnostics[0].row == "R01"
+
+
+def test_tolerance_format():
+    """Test that tolerances must be written as nominal(min,max)."""
+    rows = make_rows()
+    rows[10]["Tolerance"] = "100 +/- 10"
+    assert codes(validate(rows)) == ["tolerance_format"]
+
+
+def test_tolerance_range():
+    """Test that a tolerance must contain its nominal value."""
+    rows = make_rows()
+    rows[10]["Tolerance"] = "100(105,110)"
+    assert codes(validate(rows)) == ["tolerance_range"]
+
+
+def test_over_safety_limit():
+    """Test that force tolerances and force conditions above the safety limit are errors."""
+    rows = make_rows()
+    rows[12]["Tolerance"] = "290(261,319)"
+    rows[1]["Condition"] = "350"
+    result = validate(rows)
+    assert codes(result) == ["over_safety_limit", "over_safety_limit"]
+    assert [d.row for d in result.diagnostics] == ["R01", "R12"]
+
+
+def test_over_safety_limit_needs_specification():
+    """Test that forces are not checked without a safety limit."""
+    rows = make_rows()
+    rows[1]["Condition"] = "350"
+    assert SequenceValidator().validate(rows, None, "Compression").diagnostics == []
+
+
+def test_non_monotonic_moves():
+    """Test that set point moves in one run must keep moving the same way."""
+    rows = make_rows()
+    rows[11]["Condition"] = "45"
+    result = validate(rows)
+    assert codes(result) == ["non_monotonic"]
+    assert result.diagnostics[0].row == "R11"
+
+
+def test_non_monotonic_moves_tension():
+    """Test that tension set point moves must keep extending."""
+    rows = make_rows()
+    for index, position in ((3, "60"), (4, "70"), (9, "70"), (11, "60")):
+        rows[index]["Condition"] = position
+    result = validate(rows, "Tension")
+    assert codes(result) == ["non_monotonic"]
+    assert result.diagnostics[0].row == "R11"
+
+
+def test_scrag_reference():
+    """Test that Scrag must refer to a Mv(P) row."""
+    rows = make_rows()
+    rows[5]["Condition"] = "R02,2"
+    result = validate(rows)
+    assert codes(result) == ["scrag_reference"]
+    assert result.diagnostics[0].row == "R05"
+
+
+def test_missing_free_length():
+    """Test that a sequence must measure the free length."""
+    rows = [row for row in make_rows() if row["CMD"] != "FL(P)"]
+    for index, row in enumerate(rows):
+        row["Row"] = f"R{index:02d}"
+    rows[4]["Condition"] = "R03,2"
+    assert codes(validate(rows)) == ["missing_free_length"]
+
+
+def test_missing_end_message():
+    """Test that a sequence not ending with PMsg only gets a warning."""
+    rows = make_rows()[:-1]
+    result = validate(rows)
+    assert codes(result) == ["missing_end_message"]
+    assert result.diagnostics[0].severity == SEVERITY_WARNING
+    assert result.errors == []
+    assert result.acceptable
+
+
+def test_score_penalties():
+    """Test that each error costs 0.25 and each warning 0.05 of the score."""
+    result = ValidationResult([Diagnostic("a", ""), Diagnostic("b", ""),
+                               Diagnostic("c", "", SEVERITY_WARNING)])
+    assert abs(result.score - (1.0 - 2 * 0.25 - 0.05)) < 1e-9
+    assert ValidationResult([Diagnostic(str(i), "") for i in range(5)]).score == 0.0
+
+
+def test_score_crosses_quality_bar():
+    """Test that two warnings still clear the quality bar and a third does not."""
+    assert QUALITY_BAR == 0.9
+    two_warnings = ValidationResult([Diagnostic("w", "", SEVERITY_WARNING)] * 2)
+    three_warnings = ValidationResult([Diagnostic("w", "", SEVERITY_WARNING)] * 3)
+    assert abs(two_warnings.score - 0.9) < 1e-9
+    assert two_warnings.acceptable
+    assert three_warnings.score < QUALITY_BAR
+    assert not three_warnings.acceptable
+
+
+def test_single_error_is_never_acceptable():
+    """Test that any error rejects a sequence, even with a low quality bar."""
+    rows = make_rows()
+    rows[1]["CMD"] = "Move"
+    result = SequenceValidator(quality_bar=0.0).validate(rows, SPECIFICATION, "Compression")
+    assert result.score == 0.75
+    assert not result.acceptable
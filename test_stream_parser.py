@@ -0,0 +1,155 @@
+"""
+Tests for parsing streamed responses into sequence rows.
+"""
+import sys
+import os
+import json
+import requests
+
+# Add current directory to path to make imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.api_client import APIClient, APIClientWorker, SequenceStreamParser, SEQUENCE_DATA_START
+from utils.constants import DEFAULT_TEMPERATURE
+from utils.response_parser import normalize_rows
+
+ROWS = [
+    {"Row": "R00", "CMD": "ZF", "Description": "Zero Force", "Condition": "", "Unit": "",
+     "Tolerance": "", "Speed rpm": ""},
+    {"Row": "R01", "CMD": "TH", "Description": "Search {Contact}", "Condition": "10", "Unit": "N",
+     "Tolerance": "", "Speed rpm": "50"},
+    {"Row": "R02", "CMD": "Mv(P)", "Description": "L1 \"quoted\" ]", "Condition": "40", "Unit": "mm",
+     "Tolerance": "", "Speed rpm": "50"},
+]
+ROWS_JSON = json.dumps(ROWS)
+EXPECTED = normalize_rows(ROWS)
+COMPLETION = f"Here is the sequence.\n{SEQUENCE_DATA_START}\n{ROWS_JSON}\n---SEQUENCE_DATA_END---\n"
+
+
+def feed_all(chunks):
+    """Feed chunks to a new parser and collect every row it returns."""
+    parser = SequenceStreamParser()
+    rows = []
+    for chunk in chunks:
+        rows.extend(parser.feed(chunk))
+    return parser, rows
+
+
+def test_rows_split_at_every_boundary():
+    """Test that rows come out whole wherever the text is split between two chunks."""
+    for split in range(len(COMPLETION) + 1):
+        parser, rows = feed_all([COMPLETION[:split], COMPLETION[split:]])
+        assert rows == EXPECTED, split
+        assert parser.text == COMPLETION
+
+
+def test_rows_fed_one_character_at_a_time():
+    """Test that each row is returned as soon as its closing brace arrives."""
+    parser = SequenceStreamParser()
+    returned_at = []
+    for i, char in enumerate(COMPLETION):
+        for row in parser.feed(char):
+            returned_at.append((i, row))
+    assert [row for _, row in returned_at] == EXPECTED
+    first_end = COMPLETION.index("}")
+    assert returned_at[0][0] == first_end
+
+
+def test_json_only_response_in_code_fence():
+    """Test that a response that is only the array, fenced or not, is parsed."""
+    assert feed_all(["```json\n", ROWS_JSON[:30], ROWS_JSON[30:], "\n```"])[1] == EXPECTED
+    assert feed_all(["  ", ROWS_JSON])[1] == EXPECTED
+
+
+def test_chat_only_response_has_no_rows():
+    """Test that text without a sequence array gives no rows."""
+    assert feed_all(["Could you tell me ", "the free length {in mm}?"])[1] == []
+
+
+def test_stops_at_end_of_array():
+    """Test that objects after the closing bracket are not returned as rows."""
+    parser, rows = feed_all([COMPLETION, '\n{"Row": "R99", "CMD": "ZF"}'])
+    assert rows == EXPECTED
+    assert parser.feed('{"Row": "R98"}') == []
+
+
+def test_rows_are_normalized():
+    """Test that rows missing columns are filled in and malformed objects are skipped."""
+    rows = feed_all([SEQUENCE_DATA_START, '[{"Row": "R00", "CMD": "ZF"}, {"Row": }, {"CMD": "TH"}]'])[1]
+    assert [row["CMD"] for row in rows] == ["ZF", "TH"]
+    assert list(rows[0]) == list(EXPECTED[0])
+
+
+class TrickleRaw:
+    """Raw body that returns at most a few bytes per read, splitting lines and JSON."""
+
+    def __init__(self, body, read_size=7):
+        """Initialize the body."""
+        self.body = body
+        self.read_size = read_size
+
+    def read(self, size=-1, **kwargs):
+        """Read the next few bytes."""
+        data, self.body = self.body[:self.read_size], self.body[self.read_size:]
+        return data
+
+    def close(self):
+        """Close the body."""
+
+
+def event_stream(text, chunk_size=11):
+    """Build an event stream sending text in deltas of chunk_size characters, then [DONE]."""
+    events = [": keep-alive comment", json.dumps({"choices": []})]
+    for start in range(0, len(text), chunk_size):
+        events.append(json.dumps({"choices": [{"delta": {"content": text[start:start + chunk_size]}}]}))
+    events.append("[DONE]")
+    events.append(json.dumps({"choices": [{"delta": {"content": "after done"}}]}))
+    return "".join(event if event.startswith(":") else f"data: {event}\n\n" for event in events).encode("utf-8")
+
+
+class StreamingSession:
+    """Session answering with a trickled event stream."""
+
+    def __init__(self, body):
+        """Initialize the session."""
+        self.body = body
+        self.payloads = []
+
+    def post(self, url, headers=None, json=None, timeout=None, stream=False, **kwargs):
+        """Record the payload and return the event stream."""
+        self.payloads.append(json)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/event-stream"
+        response.raw = TrickleRaw(self.body)
+        return response
+
+
+def run_streaming(body):
+    """Run a streaming request and collect the rows emitted and the final response."""
+    client = APIClient("key")
+    client.session = StreamingSession(body)
+    client.response_cache = None
+    worker = APIClientWorker(client, {"prompt": "Generate a sequence"}, None, DEFAULT_TEMPERATURE, 1,
+                             bypass_cache=True, stream=True, use_chat_memory=False)
+    rows = []
+    result = []
+    worker.row_ready.connect(rows.append)
+    worker.finished.connect(lambda response, error_msg: result.append((response, error_msg)))
+    worker.run()
+    return client, rows, result[0]
+
+
+def test_event_stream_with_partial_lines():
+    """Test that event lines split across reads are reassembled and rows emitted in order."""
+    client, rows, (response, error_msg) = run_streaming(event_stream(COMPLETION))
+    assert client.session.payloads[0]["stream"] is True
+    assert rows == EXPECTED
+    assert response.has_sequence, error_msg
+    assert response.rows == EXPECTED
+
+
+def test_event_stream_stops_at_done():
+    """Test that nothing after the [DONE] terminator is read into the response."""
+    _, _, (response, _) = run_streaming(event_stream(COMPLETION))
+    assert "after done" not in response.chat_text
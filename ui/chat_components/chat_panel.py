@@ -9,12 +9,14 @@ from PyQt5.QtCore import (Qt, pyqtSignal, pyqtSlot, QTimer, QSize, pyqtProperty,
                          QPropertyAnimation)
 from PyQt5.QtGui import QIcon, QMovie, QTransform, QPixmap
 from PyQt5.QtSvg import QSvgWidget
-import pandas as pd
 from datetime import datetime
 import re
 
 from ui.chat_components.chat_display import ChatBubbleDisplay
 from utils.text_parser import extract_parameters
+from utils.metrics import RequestTrace, span
+from utils.response_parser import ParsedResponse
+from utils.key_validation import KEY_INVALID_MESSAGE
 from models.data_models import TestSequence
 
 
@@ -45,6 +47,15 @@ class ChatPanel(QWidget):
         
         # State variables
         self.is_generating = False
+        self.streamed_rows = []
+        self.current_trace = None  # Phase timings of the request in progress
+        self.pending_replays = []  # Replayed queued results held while a request is in progress
+        
+        # Check the API key once typing has paused, not on every keystroke
+        self.key_check_timer = QTimer(self)
+        self.key_check_timer.setSingleShot(True)
+        self.key_check_timer.setInterval(800)
+        self.key_check_timer.timeout.connect(self.sequence_generator.validate_api_key)
         
         # Set up the UI
         self.init_ui()
@@ -384,8 +395,12 @@ class ChatPanel(QWidget):
     def connect_signals(self):
         """Connect signals from the sequence generator."""
         self.sequence_generator.sequence_generated.connect(self.on_sequence_generated_async)
+        self.sequence_generator.replayed_sequence_generated.connect(self.on_replayed_sequence_generated)
         self.sequence_generator.progress_updated.connect(self.on_progress_updated)
         self.sequence_generator.status_updated.connect(self.on_status_updated)
+        self.sequence_generator.row_generated.connect(self.on_row_generated)
+        self.sequence_generator.request_queued.connect(self.on_request_queued)
+        self.sequence_generator.api_key_validated.connect(self.on_api_key_validated)
     
     def refresh_chat_display(self):
         """Refresh the chat display with current history."""
@@ -410,6 +425,9 @@ class ChatPanel(QWidget):
             QMessageBox.warning(self, "Processing", "Please wait for the current request to complete.")
             return
         
+        # Time the request from here until the result is shown
+        self.current_trace = RequestTrace("chat")
+        
         # Add user message to chat history
         self.chat_service.add_message("user", user_input)
         
@@ -420,7 +438,8 @@ class ChatPanel(QWidget):
         self.refresh_chat_display()
         
         # Extract parameters from user input
-        parameters = extract_parameters(user_input)
+        with self.current_trace.span("extract_parameters"):
+            parameters = extract_parameters(user_input)
         
         # Add a processing message 
         self.chat_service.add_message(
@@ -434,7 +453,8 @@ class ChatPanel(QWidget):
             parameters["prompt"] = user_input
         
         # Check if the input contains spring specifications and parse them
-        contains_specs = self.parse_spring_specs(user_input)
+        with self.current_trace.span("parse_spring_specs"):
+            contains_specs = self.parse_spring_specs(user_input)
         
         # If specs were parsed, update the sequence generator
         if contains_specs:
@@ -449,16 +469,7 @@ class ChatPanel(QWidget):
             )
             self.refresh_chat_display()
         
-        # Include spring specification in the prompt if available and enabled
-        spring_spec = self.sequence_generator.get_spring_specification()
-        if spring_spec and spring_spec.enabled:
-            # Add specification text to the prompt if not already included
-            if 'prompt' in parameters:
-                spec_text = spring_spec.to_prompt_text()
-                if spec_text not in parameters['prompt']:
-                    parameters['prompt'] = f"{spec_text}\n\n{parameters['prompt']}"
-        
-        # Start generation
+        # Start generation - the sequence generator adds the spring specification
         self.start_generation(parameters)
     
     def on_cancel_clicked(self):
@@ -493,9 +504,10 @@ class ChatPanel(QWidget):
         # Reset progress and status
         self.progress_bar.setValue(0)
         self.status_label.setText("Starting generation...")
+        self.streamed_rows = []
         
         # Start async generation
-        self.sequence_generator.generate_sequence_async(parameters)
+        self.sequence_generator.generate_sequence_async(parameters, trace=self.current_trace)
     
     def set_generating_state(self, is_generating):
         """Set the generating state and update UI accordingly.
@@ -524,6 +536,9 @@ class ChatPanel(QWidget):
             # Stop timer-based animation
             self.loading_timer.stop()
             self.status_label.setText("Ready")
+            # Show replayed results held back during the request, after its own result
+            if self.pending_replays:
+                QTimer.singleShot(0, self.show_pending_replays)
     
     def on_sequence_generated_async(self, sequence, error):
         """Handle asynchronous sequence generation completion.
@@ -534,9 +549,41 @@ class ChatPanel(QWidget):
         """
         # Reset generating state
         self.set_generating_state(False)
+        self.show_result(sequence, error, self.current_trace)
+    
+    def on_replayed_sequence_generated(self, sequence, error):
+        """Handle the result of a queued request sent once the API was back.
+        
+        The result is held while another request is in progress, so it does
+        not end that request or show up as its answer.
+        
+        Args:
+            sequence: The generated sequence or None if error.
+            error: Error message if any.
+        """
+        if self.is_generating:
+            self.pending_replays.append((sequence, error))
+        else:
+            self.show_result(sequence, error)
+    
+    def show_pending_replays(self):
+        """Show the replayed results held back while a request was in progress."""
+        if self.is_generating:
+            return  # A new request started - keep holding them
+        pending, self.pending_replays = self.pending_replays, []
+        for sequence, error in pending:
+            self.show_result(sequence, error)
+    
+    def show_result(self, sequence, error, trace=None):
+        """Show a generation result in the chat and the results panel.
         
+        Args:
+            sequence: The generated sequence or None if error.
+            error: Error message if any.
+            trace: Trace of the request, to time the rendering.
+        """
         # Check if sequence is None or empty
-        if sequence is None or (isinstance(sequence, pd.DataFrame) and sequence.empty):
+        if sequence is None or (isinstance(sequence, ParsedResponse) and sequence.is_empty):
             # Handle error case
             if error:
                 # Show error message
@@ -555,25 +602,15 @@ class ChatPanel(QWidget):
             return
         
         # Handle different types of sequence objects properly
-        if isinstance(sequence, pd.DataFrame):
-            # Check if it has a CHAT row (for conversation or hybrid responses)
-            chat_rows = sequence[sequence["Row"] == "CHAT"]
-            
-            # If we have chat content, display it in the chat panel
-            if not chat_rows.empty:
-                chat_message = chat_rows["Description"].values[0]
-                self.chat_service.add_message("assistant", chat_message)
+        if isinstance(sequence, ParsedResponse):
+            # If we have chat content (conversation or hybrid responses), display it in the chat panel
+            if sequence.chat_text:
+                self.chat_service.add_message("assistant", sequence.chat_text)
                 self.refresh_chat_display()
             
             # Check if we also have actual sequence rows (for hybrid or sequence-only responses)
-            sequence_rows = sequence[sequence["Row"] != "CHAT"]
-            if not sequence_rows.empty:
+            if sequence.has_sequence:
                 # We have actual sequence data to display in the results panel
-                # Only send the sequence part (without the CHAT row)
-                sequence_rows = sequence_rows.reset_index(drop=True)
-                
-                # Convert DataFrame to TestSequence object before emitting
-                
                 # Create a simple parameter dictionary for the TestSequence
                 parameters = {
                     "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -582,15 +619,16 @@ class ChatPanel(QWidget):
                 
                 # Create TestSequence with the sequence rows and parameters
                 test_sequence = TestSequence(
-                    rows=sequence_rows.to_dict('records'),
+                    rows=sequence.rows,
                     parameters=parameters
                 )
                 
                 # Emit the TestSequence object to display in the sidebar
-                self.sequence_generated.emit(test_sequence)
+                with span(trace, "render"):
+                    self.sequence_generated.emit(test_sequence)
                 
                 # If we didn't have chat content already, add a generic message to the chat panel
-                if chat_rows.empty:
+                if not sequence.chat_text:
                     self.chat_service.add_message(
                         "assistant", 
                         "I've generated a test sequence based on your request. "
@@ -614,7 +652,8 @@ class ChatPanel(QWidget):
             self.refresh_chat_display()
             
             # Emit the TestSequence object to display in the sidebar
-            self.sequence_generated.emit(sequence)
+            with span(trace, "render"):
+                self.sequence_generated.emit(sequence)
         else:
             # Unknown object type - show error
             self.chat_service.add_message(
@@ -623,6 +662,44 @@ class ChatPanel(QWidget):
             )
             self.refresh_chat_display()
     
+    def on_request_queued(self, request_id, error):
+        """Handle a request queued because the API is unreachable.
+        
+        Args:
+            request_id: ID of the queued request.
+            error: Error that made the API unreachable.
+        """
+        self.set_generating_state(False)
+        self.chat_service.add_message(
+            "assistant",
+            "I can't reach the API right now, so I've queued your request. "
+            "It will be sent automatically when the connection is back."
+        )
+        self.refresh_chat_display()
+    
+    def on_row_generated(self, row):
+        """Handle a sequence row streamed from the API.
+        
+        Shows the rows received so far in the results panel so the operator
+        can follow the sequence while the rest is still being generated.
+        
+        Args:
+            row: Sequence row dictionary.
+        """
+        if not self.is_generating:
+            return
+        
+        self.streamed_rows.append(row)
+        
+        preview = TestSequence(
+            rows=list(self.streamed_rows),
+            parameters={
+                "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "prompt": "Generating sequence..."
+            }
+        )
+        self.sequence_generated.emit(preview)
+    
     def on_progress_updated(self, progress):
         """Handle progress updates.
         
@@ -644,7 +721,11 @@ class ChatPanel(QWidget):
             self.status_label.setText(status)
     
     def validate_api_key(self):
-        """Check if API key is provided, but don't validate it to save credits."""
+        """Check if API key is provided and start checking it in the background.
+        
+        The result arrives in on_api_key_validated. Keys already seen working
+        or rejected by recent requests are not sent to the API again.
+        """
         # Get the API key from the sequence generator
         api_key = self.sequence_generator.api_client.api_key
         
@@ -658,14 +739,25 @@ class ChatPanel(QWidget):
             self.refresh_chat_display()
             return False
         
-        # Simply acknowledge the key is present, don't validate to save credits
-        self.chat_service.add_message(
-            "assistant", 
-            "API key is set. You can start chatting or generating sequences."
-        )
-        self.refresh_chat_display()
+        self.key_check_timer.start()
         return True
     
+    def on_api_key_validated(self, valid, message):
+        """Handle the result of a background API key check.
+        
+        Args:
+            valid: Whether the key was accepted.
+            message: Result message.
+        """
+        if valid:
+            text = "API key is set. You can start chatting or generating sequences."
+        elif message == KEY_INVALID_MESSAGE:
+            text = "The API key was rejected. Please check it in the Settings tab of the Specifications panel."
+        else:
+            text = f"Couldn't check the API key ({message}). You can still try chatting or generating sequences."
+        self.chat_service.add_message("assistant", text)
+        self.refresh_chat_display()
+    
     def parse_spring_specs(self, text):
         """Parse spring specifications from the user input if present.
         
@@ -767,6 +859,17 @@ class ChatPanel(QWidget):
         if not parsed_data["basic_info"] and not parsed_data["set_points"]:
             return False
         
+        with span(self.current_trace, "settings_save"):
+            self._save_parsed_specs(parsed_data)
+        
+        return len(parsed_data["basic_info"]) > 0 or len(parsed_data["set_points"]) > 0
+    
+    def _save_parsed_specs(self, parsed_data):
+        """Save parsed spring specifications to the settings.
+        
+        Args:
+            parsed_data: Dictionary with "basic_info" and "set_points" from parse_spring_specs.
+        """
         # Use the settings service
         settings_service = self.settings_service
         
@@ -803,8 +906,6 @@ class ChatPanel(QWidget):
                 settings_service.update_set_point(
                     sp["index"], sp["position"], sp["load"], sp["tolerance"], sp["enabled"]
                 )
-        
-        return len(parsed_data["basic_info"]) > 0 or len(parsed_data["set_points"]) > 0
     
     def toggle_loading_indicator(self):
         """Toggle the loading indicator appearance for animation effect."""
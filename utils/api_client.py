@@ -2,34 +2,364 @@
 API client module for the Spring Test App.
 Contains functions for making API requests and handling responses.
 """
+import os
+import asyncio
 import requests
-import pandas as pd
 import json
 import time
+import hashlib
+import queue
 import threading
-from typing import Dict, Any, Optional, List, Tuple, Union, Callable
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, List, Tuple, Union, Callable, Awaitable
 from PyQt5.QtCore import QObject, pyqtSignal
-from utils.constants import API_ENDPOINT, DEFAULT_MODEL, DEFAULT_TEMPERATURE, SYSTEM_PROMPT_TEMPLATE, USER_PROMPT_TEMPLATE
+from requests.adapters import HTTPAdapter
+from utils.constants import (API_ENDPOINTS, DEFAULT_MODEL, DEFAULT_TEMPERATURE, SYSTEM_PROMPT_TEMPLATE,
+                             USER_PROMPT_TEMPLATE, REQUEST_TIMEOUT, REQUEST_DEADLINE, PROMPT_TOKEN_BUDGET)
 from utils.text_parser import extract_command_sequence, format_parameter_text, extract_error_message
+from utils.prompt_builder import (PromptBuilder, estimate_tokens, specification_text, parameter_lines,
+                                  strip_specification_text, fit_examples, PRIORITY_PARAMETERS,
+                                  PRIORITY_EXAMPLES, PRIORITY_CHAT_HISTORY, EXAMPLE_TOKEN_BUDGET, EXAMPLES_HEADER)
+from models.data_models import SpringSpecification
+from utils.request_executor import (RequestExecutor, JobHandle, PRIORITY_INTERACTIVE,
+                                    JOB_QUEUED, JOB_FINISHED, JOB_CANCELLED)
+from utils.transport import (CancelToken, CancellableHTTPAdapter, ConnectionWarmer, cancellation_scope,
+                             encode_json_body, POOL_CONNECTIONS_PER_WORKER)
+from utils.async_transport import AsyncTransport, ASYNC_MAX_CONNECTIONS, run_coroutine
+from utils.hedging import RequestHedger
+from utils.retry_policy import RetryPolicy, is_endpoint_failure
+from utils.endpoint_router import Endpoint, EndpointRouter
+from utils.metrics import RequestTrace
+from utils.request_history import RequestHistory, REQUEST_HISTORY_SIZE
+from utils.key_validation import APIKeyCache, KEY_VALID_MESSAGE, KEY_INVALID_MESSAGE
+from utils.response_parser import (ParsedResponse, parse_response_text, normalize_rows,
+                                   SEQUENCE_DATA_START, SEQUENCE_DATA_END)
+
+# Number of previous messages kept as conversation context
+CHAT_MEMORY_SIZE = 10
+
+# Response format instructions appended to every user prompt
+RESPONSE_FORMAT_INSTRUCTIONS = f"""IMPORTANT - RESPONSE FORMAT:
+- Use your natural language understanding to decide how to respond to my request
+- For NEW test sequence requests: Include a JSON array with the required test sequence format
+- For analysis requests about EXISTING sequences: Provide conversational analysis in plain text 
+- You can COMBINE both formats when appropriate:
+  1. First provide your conversational response/analysis in plain text
+  2. Then include "{SEQUENCE_DATA_START}" on a new line
+  3. Include your JSON array sequence data
+  4. End with "{SEQUENCE_DATA_END}" on a new line
+  5. Continue with any additional conversational text if needed
+
+This format allows you to provide both explanatory text AND sequence data when appropriate."""
+
+
+class SequenceStreamParser:
+    """Incremental parser that extracts sequence rows from streamed completion text.
+    
+    Text is fed in arbitrary chunks. Once the start of the sequence array is
+    seen (after the SEQUENCE_DATA_START marker, or at the start of a
+    JSON-only response), each row object is returned as soon as its closing
+    brace arrives.
+    """
+    
+    def __init__(self):
+        """Initialize the parser."""
+        self.text = ""
+        self._scan_pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+    
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add a chunk of completion text.
+        
+        Args:
+            chunk: The next piece of completion text.
+            
+        Returns:
+            List of rows completed by this chunk, normalized to the required columns.
+        """
+        self.text += chunk
+        if self._done:
+            return []
+        
+        if not self._in_array and not self._find_array_start():
+            return []
+        
+        rows = []
+        text = self.text
+        for i in range(self._scan_pos, len(text)):
+            char = text[i]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    try:
+                        row = json.loads(text[self._object_start:i + 1])
+                    except ValueError:
+                        row = None
+                    if isinstance(row, dict):
+                        rows.append(normalize_sequence_row(row))
+                    self._object_start = None
+            elif char == "]" and self._depth == 0:
+                self._done = True
+                self._scan_pos = i + 1
+                return rows
+        
+        self._scan_pos = len(text)
+        return rows
+    
+    def _find_array_start(self) -> bool:
+        """Locate the opening bracket of the sequence array.
+        
+        Returns:
+            True if the array start was found.
+        """
+        marker_pos = self.text.find(SEQUENCE_DATA_START)
+        if marker_pos >= 0:
+            bracket_pos = self.text.find("[", marker_pos + len(SEQUENCE_DATA_START))
+        else:
+            # JSON-only responses start with the array, possibly inside a code fence
+            stripped = self.text.lstrip()
+            if stripped.startswith("```json"):
+                stripped = stripped[len("```json"):].lstrip()
+            if not stripped or not stripped.startswith("["):
+                return False
+            bracket_pos = self.text.find("[")
+        
+        if bracket_pos < 0:
+            return False
+        
+        self._in_array = True
+        self._scan_pos = bracket_pos + 1
+        return True
+
+
+def normalize_sequence_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a single sequence row to the required columns.
+    
+    Args:
+        row: Parsed sequence row.
+        
+    Returns:
+        Standardized row with all required columns present, in order.
+    """
+    return normalize_rows([row])[0]
+
+
+class ResponseCache:
+    """On-disk LRU cache of parsed API responses.
+
+    Each entry is stored as a JSON file named after its key. The file
+    modification time doubles as the last access time, so the LRU order
+    survives application restarts.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 200,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        """Initialize the response cache.
+
+        Args:
+            cache_dir: Directory to store cache entries in. Defaults to appdata/response_cache.
+            max_entries: Maximum number of entries to keep before evicting the least recently used.
+            ttl_seconds: Maximum age of an entry in seconds.
+        """
+        if cache_dir is None:
+            data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "appdata")
+            cache_dir = os.path.join(data_dir, "response_cache")
+
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # Keys of stored entries, least recently used first
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Build the LRU index from the entries already on disk."""
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.cache_dir, file_name)), file_name[:-5]))
+            except OSError:
+                continue
+
+        for _, key in sorted(entries):
+            self._index[key] = True
+
+    def _entry_path(self, key: str) -> str:
+        """Get the file path for a cache entry."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any], url: str) -> str:
+        """Build a canonical cache key for a generation request.
+
+        The key covers the whole built payload, so the conversation context
+        and few-shot examples in the prompt are part of it, as well as the
+        model, temperature and system prompt.
+
+        Args:
+            payload: Chat-completions payload, with the model sent to the endpoint.
+            url: URL of the endpoint serving the request.
+
+        Returns:
+            Hex digest identifying the request.
+        """
+        canonical = json.dumps({"payload": payload, "url": url}, sort_keys=True, separators=(",", ":"),
+                               default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the cached rows for a key.
+
+        Args:
+            key: Cache key from make_key.
+
+        Returns:
+            List of row dictionaries, or None on a miss.
+        """
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+
+            file_path = self._entry_path(key)
+            try:
+                with open(file_path, "r") as f:
+                    entry = json.load(f)
+                rows = entry["rows"]
+                created_at = entry["created_at"]
+            except (OSError, ValueError, KeyError):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            # Expired entries count as misses
+            if time.time() - created_at > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            # Touch the file so the access order survives a restart
+            try:
+                os.utime(file_path, None)
+            except OSError:
+                pass
+
+            self._index.move_to_end(key)
+            self.hits += 1
+            return rows
+
+    def put(self, key: str, rows: List[Dict[str, Any]]) -> None:
+        """Store rows in the cache.
+
+        Args:
+            key: Cache key from make_key.
+            rows: List of row dictionaries to store.
+        """
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(self._entry_path(key), "w") as f:
+                    json.dump({"created_at": time.time(), "rows": rows}, f)
+            except (OSError, TypeError, ValueError):
+                return
+
+            self._index[key] = True
+            self._index.move_to_end(key)
+
+            # Evict least recently used entries
+            while len(self._index) > self.max_entries:
+                oldest_key = next(iter(self._index))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry from the index and disk. Caller must hold the lock."""
+        self._index.pop(key, None)
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Remove all cache entries."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+
+        Returns:
+            Dictionary with entry count, hits, misses, evictions and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
 
 
 class APIClientWorker(QObject):
     """Worker class for making API requests in a separate thread."""
     
     # Define signals
-    finished = pyqtSignal(object, str)  # (DataFrame, error_message)
+    finished = pyqtSignal(object, str)  # (ParsedResponse, error_message)
     progress = pyqtSignal(int)  # Progress percentage (0-100)
     status = pyqtSignal(str)    # Status message
+    row_ready = pyqtSignal(dict)  # Sequence row parsed from a streamed response
     
-    def __init__(self, api_client, parameters, model, temperature, max_retries):
+    def __init__(self, api_client, parameters, model, temperature, max_retries,
+                 bypass_cache=False, stream=False, deadline=REQUEST_DEADLINE, use_chat_memory=True,
+                 trace=None):
         """Initialize the worker.
         
         Args:
             api_client: The API client to use for requests.
             parameters: Dictionary of spring parameters.
-            model: The model to use for generation.
+            model: Model to pin for the request, or None to use the model of the chosen endpoint.
             temperature: The temperature to use for generation.
             max_retries: Maximum number of retry attempts.
+            bypass_cache: Skip the response cache lookup and force a new request.
+            stream: Read the response as an event stream and emit rows as they arrive.
+            deadline: Overall time budget in seconds for all attempts and retry waits.
+            use_chat_memory: Include and update the client's conversation context.
+            trace: Optional trace to record phase timings on.
         """
         super().__init__()
         self.api_client = api_client
@@ -37,254 +367,571 @@ class APIClientWorker(QObject):
         self.model = model
         self.temperature = temperature
         self.max_retries = max_retries
+        self.bypass_cache = bypass_cache
+        self.stream = stream
+        self.deadline = deadline
+        self.deadline_at = None
+        self.use_chat_memory = use_chat_memory
+        self.payload = None  # Built on first use, or up front when requests are coalesced
+        self.endpoint = None  # Endpoint of the current attempt
+        self.memory_entry = ""  # Added to the chat memory once the request succeeds
+        self.prompt_report = None
         self.is_cancelled = False
+        self.cancel_token = CancelToken()
+        self.trace = trace or RequestTrace()
     
     def cancel(self):
-        """Cancel the current operation."""
+        """Cancel the current operation.
+        
+        Interrupts a pending retry wait and shuts down the connection of a
+        request in flight, so the worker thread is released immediately.
+        """
         self.is_cancelled = True
+        self.cancel_token.cancel()
+    
+    def _remaining_time(self) -> float:
+        """Get the time left in the request's overall budget, in seconds."""
+        return self.deadline_at - time.monotonic()
+    
+    def _attempt_timeout(self) -> float:
+        """Get the network timeout for the next attempt, bounded by the overall deadline."""
+        return max(0.1, min(REQUEST_TIMEOUT, self._remaining_time()))
+    
+    def build_payload(self) -> Dict[str, Any]:
+        """Build the chat-completions payload for the request.
+        
+        Returns:
+            Request payload.
+        """
+        payload, self.memory_entry, self.prompt_report = self.api_client.build_payload(
+            self.parameters, self.model, self.temperature, self.use_chat_memory, self.trace
+        )
+        return payload
     
     def run(self):
-        """Run the API request in a separate thread."""
-        # Format parameter text for prompt
-        parameter_text = format_parameter_text(self.parameters)
+        """Run the API request in a separate thread.
         
-        # Get the original user prompt
-        original_prompt = self.parameters.get('prompt', '')
+        The attempts, retries and failover are run by APIClient.arun_request,
+        the same loop the coroutine API uses; this worker only supplies how
+        an attempt is sent and how a retry wait is interrupted.
+        """
+        self.deadline_at = time.monotonic() + self.deadline
+        response, error_message = run_coroutine(self.api_client.arun_request(
+            self.parameters, self._build_request, self._send_attempt, self._wait,
+            model=self.model,
+            temperature=self.temperature,
+            max_retries=self.max_retries,
+            bypass_cache=self.bypass_cache,
+            deadline_at=self.deadline_at,
+            use_chat_memory=self.use_chat_memory,
+            trace=self.trace,
+            status=self.status.emit,
+            progress=self.progress.emit,
+            cancelled=lambda: self.is_cancelled
+        ))
         
-        # Check if test_type is provided in parameters
-        test_type_text = ""
-        if "Test Type" in self.parameters:
-            test_type = self.parameters["Test Type"]
-            test_type_text = f"This should be a {test_type} test sequence."
+        if self.is_cancelled:
+            self.finished.emit(ParsedResponse(), "Operation cancelled")
+            return
         
-        # Create a simplified user prompt that instructs the AI about the format
-        # Let the AI determine response format rather than trying to predict intent ourselves
-        user_prompt = f"""
-{parameter_text}
-
-{test_type_text}
-
-My message: {original_prompt}
-
-IMPORTANT - RESPONSE FORMAT:
-- Use your natural language understanding to decide how to respond to my request
-- For NEW test sequence requests: Include a JSON array with the required test sequence format
-- For analysis requests about EXISTING sequences: Provide conversational analysis in plain text 
-- You can COMBINE both formats when appropriate:
-  1. First provide your conversational response/analysis in plain text
-  2. Then include "---SEQUENCE_DATA_START---" on a new line
-  3. Include your JSON array sequence data
-  4. End with "---SEQUENCE_DATA_END---" on a new line
-  5. Continue with any additional conversational text if needed
-
-This format allows you to provide both explanatory text AND sequence data when appropriate.
-"""
+        self.progress.emit(100)
         
-        # Include previous context if available
-        if self.api_client.chat_memory:
-            user_prompt += "\n\nPrevious context:\n" + "\n".join(self.api_client.chat_memory[-3:])
+        # Always return the response - the receiver handles empty and chat-only responses
+        self.finished.emit(response, error_message)
+    
+    def _build_request(self) -> Tuple[Dict[str, Any], str]:
+        """Get the payload and chat memory entry, building them unless the request was coalesced."""
+        if self.payload is None:
+            self.payload = self.build_payload()
+        return self.payload, self.memory_entry
+    
+    async def _send_attempt(self, endpoint: Endpoint, payload: Dict[str, Any], timeout: float) -> Optional[str]:
+        """Send one attempt on this worker's thread.
         
-        # Create payload
-        payload = {
-            "model": self.model,
-            "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT_TEMPLATE},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": self.temperature
-        }
+        Args:
+            endpoint: Endpoint chosen for the attempt.
+            payload: Chat-completions request payload for the endpoint.
+            timeout: Network timeout; the senders derive it from the deadline themselves.
+            
+        Returns:
+            The completion text, or None if the operation was cancelled.
+        """
+        self.endpoint = endpoint
         
-        # Save the request for debugging
-        self.api_client.request_history.append({
-            "timestamp": time.time(),
-            "payload": payload
-        })
+        # Bind the cancel token so cancel() can close this request's connection
+        with cancellation_scope(self.cancel_token):
+            if self.stream:
+                return self._request_streaming_completion(payload)
+            if self.api_client.hedger.enabled:
+                return self._request_hedged_completion(payload)
+            return self._request_completion(payload)
+    
+    async def _wait(self, seconds: float) -> bool:
+        """Wait before a retry; cancel() ends the wait early.
         
-        # Make the request with retries
-        response_text = ""
-        error_message = ""
+        Returns:
+            True if the operation was cancelled.
+        """
+        return self.cancel_token.wait(seconds)
+    
+    def _request_completion(self, payload: Dict[str, Any]) -> str:
+        """Send the payload and wait for the complete response.
+        
+        Args:
+            payload: Chat-completions request payload.
+            
+        Returns:
+            The completion text.
+        """
+        response_text = self._post_completion(payload)
+        
+        self.status.emit("Processing response...")
+        self.progress.emit(80)
+        
+        return response_text
+    
+    def _post_completion(self, payload: Dict[str, Any]) -> str:
+        """Send the payload once and return the completion text.
+        
+        Args:
+            payload: Chat-completions request payload.
+            
+        Returns:
+            The completion text.
+        """
+        start_time = time.monotonic()
+        response = self.api_client.post(self.endpoint, payload, self._attempt_timeout())
+        response.raise_for_status()
+        
+        # Time until the response headers arrived
+        elapsed = getattr(response, "elapsed", None)
+        if elapsed is not None:
+            self.trace.set("time_to_first_byte", elapsed.total_seconds())
+        
+        with self.trace.span("json_parse"):
+            response_json = response.json()
+        
+        # Latency samples drive the hedging delay
+        self.api_client.hedger.record_latency(time.monotonic() - start_time)
         
-        self.status.emit("Preparing request...")
-        self.progress.emit(10)
+        message = response_json['choices'][0].get('message', {})
+        return message.get('content', '')
+    
+    def _request_hedged_completion(self, payload: Dict[str, Any]) -> str:
+        """Send the payload, and send it again if the response is unusually slow.
+        
+        The first request runs on this worker's thread. If it has not
+        answered after the hedger's delay, and the spend cap allows it, an
+        identical hedge request is sent from a timer thread. The first
+        successful response wins and the other request is cancelled.
         
-        for attempt in range(self.max_retries):
-            if self.is_cancelled:
-                self.finished.emit(pd.DataFrame(), "Operation cancelled")
+        Args:
+            payload: Chat-completions request payload.
+            
+        Returns:
+            The completion text.
+        """
+        hedger = self.api_client.hedger
+        hedger.record_request()
+        delay = hedger.hedge_delay()
+        if delay is None:
+            return self._post_completion(payload)  # Too few latency samples to hedge yet
+        
+        primary_token = self.cancel_token.child()
+        hedge_token = self.cancel_token.child()
+        hedge_results = queue.Queue()
+        lock = threading.Lock()
+        state = {"primary_done": False, "hedge_sent": False}
+        
+        def send_hedge():
+            with lock:
+                if state["primary_done"] or not hedger.try_acquire_hedge():
+                    return
+                state["hedge_sent"] = True
+            self.status.emit("Response is slow, sending a second request...")
+            try:
+                with cancellation_scope(hedge_token):
+                    hedge_results.put((self._post_completion(payload), None))
+            except Exception as e:
+                hedge_results.put((None, e))
                 return
-                
+            primary_token.cancel()  # The hedge won - release the first request
+        
+        timer = threading.Timer(delay, send_hedge)
+        timer.daemon = True
+        timer.start()
+        try:
+            with cancellation_scope(primary_token):
+                response_text = self._post_completion(payload)
+            primary_error = None
+        except Exception as e:
+            response_text, primary_error = None, e
+        finally:
+            timer.cancel()
+            with lock:
+                state["primary_done"] = True
+        
+        if primary_error is None:
+            hedge_token.cancel()
+            if state["hedge_sent"]:
+                hedger.record_winner(hedge_won=False)
+        else:
+            if not state["hedge_sent"]:
+                raise primary_error
             try:
-                self.status.emit(f"Sending request (attempt {attempt+1}/{self.max_retries})...")
-                self.progress.emit(20 + (attempt * 15))
-                
-                response = self.api_client.session.post(
-                    API_ENDPOINT,
-                    headers=self.api_client.get_headers(),
-                    json=payload,
-                    timeout=60  # 60 second timeout
-                )
-                response.raise_for_status()
-                response_json = response.json()
-                
-                self.status.emit("Processing response...")
-                self.progress.emit(80)
-                
-                message = response_json['choices'][0].get('message', {})
+                response_text, hedge_error = hedge_results.get(timeout=max(0.0, self._remaining_time()))
+            except queue.Empty:
+                hedge_token.cancel()
+                raise requests.exceptions.Timeout("Request deadline exceeded")
+            if hedge_error is not None:
+                raise hedge_error
+            hedger.record_winner(hedge_won=True)
+        
+        self.status.emit("Processing response...")
+        self.progress.emit(80)
+        return response_text
+    
+    def _request_streaming_completion(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Send the payload in streaming mode and read the event stream.
+        
+        Sequence rows are emitted through row_ready as soon as each JSON
+        object closes, and progress follows the number of bytes received.
+        
+        Args:
+            payload: Chat-completions request payload.
+            
+        Returns:
+            The completion text, or None if the operation was cancelled.
+        """
+        stream_payload = dict(payload, stream=True)
+        start_time = time.perf_counter()
+        response = self.api_client.post(
+            self.endpoint,
+            stream_payload,
+            self._attempt_timeout(),  # Applies between bytes
+            stream=True
+        )
+        
+        try:
+            response.raise_for_status()
+            
+            # Fall back to a normal response if the endpoint ignored the stream flag
+            content_type = response.headers.get("Content-Type", "")
+            if "text/event-stream" not in content_type:
+                message = response.json()['choices'][0].get('message', {})
                 response_text = message.get('content', '')
+                for row in SequenceStreamParser().feed(response_text):
+                    self.row_ready.emit(row)
+                return response_text
+            
+            self.status.emit("Receiving response...")
+            parser = SequenceStreamParser()
+            expected_bytes = max(self.api_client.expected_response_bytes, 1)
+            received_bytes = 0
+            last_progress = 0
+            
+            for line in response.iter_lines():
+                if self.is_cancelled:
+                    return None
+                if self._remaining_time() <= 0:
+                    raise requests.exceptions.Timeout("Request deadline exceeded")
+                if not line:
+                    continue
                 
-                # Save context for continuity
-                self.api_client.chat_memory.append(parameter_text)
-                if len(self.api_client.chat_memory) > 10:  # Keep memory limited
-                    self.api_client.chat_memory = self.api_client.chat_memory[-10:]
-                
-                # Save raw response for debugging
-                self.api_client.last_raw_response = response_text
-                
-                # Process the response
-                self.status.emit("Processing response...")
-                self.progress.emit(80)
+                if not received_bytes:
+                    self.trace.set("time_to_first_byte", time.perf_counter() - start_time)
                 
-                # Clean up response text - remove markdown backticks if present
-                response_text = response_text.replace("```json", "").replace("```", "").strip()
+                received_bytes += len(line)
+                progress = 30 + int(60 * min(received_bytes / expected_bytes, 1.0))
+                if progress != last_progress:
+                    self.progress.emit(progress)
+                    last_progress = progress
                 
-                # Check for hybrid response format with both text and sequence data
-                sequence_data_start = "---SEQUENCE_DATA_START---"
-                sequence_data_end = "---SEQUENCE_DATA_END---"
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
                 
-                if sequence_data_start in response_text and sequence_data_end in response_text:
-                    # This is a hybrid response with both text and sequence data
-                    # Extract the parts
-                    parts = response_text.split(sequence_data_start)
-                    conversation_text = parts[0].strip()
-                    
-                    # Extract the sequence data
-                    seq_parts = parts[1].split(sequence_data_end)
-                    sequence_json_text = seq_parts[0].strip()
-                    
-                    # If there's additional text after the sequence data, add it to conversation
-                    if len(seq_parts) > 1 and seq_parts[1].strip():
-                        conversation_text += "\n\n" + seq_parts[1].strip()
-                    
-                    try:
-                        # Parse the sequence data
-                        data = json.loads(sequence_json_text)
-                        
-                        # Create a DataFrame with the sequence data
-                        df = pd.DataFrame(data)
-                        
-                        # Ensure all required columns are present
-                        required_columns = ["Row", "CMD", "Description", "Condition", "Unit", "Tolerance", "Speed rpm"]
-                        
-                        # Fix column names - handle both "Cmd" and "CMD" variations
-                        if "Cmd" in df.columns and "CMD" not in df.columns:
-                            df = df.rename(columns={"Cmd": "CMD"})
-                        
-                        # Rename any mismatched columns
-                        if "Speed" in df.columns and "Speed rpm" not in df.columns:
-                            df = df.rename(columns={"Speed": "Speed rpm"})
-                            
-                        # Add any missing columns
-                        for col in required_columns:
-                            if col not in df.columns:
-                                df[col] = ""
-                        
-                        # Reorder columns to match required format
-                        df = df[required_columns]
-                        
-                        # Add the conversation text to a special "CHAT" row
-                        chat_row = pd.DataFrame({
-                            "Row": ["CHAT"], 
-                            "CMD": ["CHAT"], 
-                            "Description": [conversation_text]
-                        })
-                        
-                        # Add empty values for other columns
-                        for col in required_columns:
-                            if col not in chat_row.columns:
-                                chat_row[col] = ""
-                        
-                        # Combine the chat row with the sequence data
-                        df = pd.concat([chat_row, df], ignore_index=True)
-                        
-                    except (json.JSONDecodeError, ValueError) as e:
-                        # If parsing fails, create a conversation-only response
-                        self.status.emit(f"Failed to parse sequence data: {str(e)}")
-                        message_df = pd.DataFrame([{"Row": "CHAT", "CMD": "CHAT", "Description": response_text}])
-                        df = message_df
+                chunk = json.loads(data.decode("utf-8"))
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                content = (choices[0].get("delta") or {}).get("content") or ""
                 
-                # Handle JSON-only responses (sequence data without conversation)
-                elif response_text.strip().startswith("[") and response_text.strip().endswith("]"):
-                    try:
-                        # Parse the JSON data
-                        data = json.loads(response_text)
-                        
-                        # Convert to DataFrame
-                        df = pd.DataFrame(data)
-                        
-                        # Ensure all required columns are present
-                        required_columns = ["Row", "CMD", "Description", "Condition", "Unit", "Tolerance", "Speed rpm"]
-                        
-                        # Fix column names - handle both "Cmd" and "CMD" variations
-                        if "Cmd" in df.columns and "CMD" not in df.columns:
-                            df = df.rename(columns={"Cmd": "CMD"})
-                        
-                        # Rename any mismatched columns
-                        if "Speed" in df.columns and "Speed rpm" not in df.columns:
-                            df = df.rename(columns={"Speed": "Speed rpm"})
-                            
-                        # Add any missing columns
-                        for col in required_columns:
-                            if col not in df.columns:
-                                df[col] = ""
-                        
-                        # Reorder columns to match required format
-                        df = df[required_columns]
-                    except (json.JSONDecodeError, ValueError):
-                        # If parsing fails, create a conversation-only response
-                        message_df = pd.DataFrame([{"Row": "CHAT", "CMD": "CHAT", "Description": response_text}])
-                        df = message_df
-                else:
-                    # No sequence data found - this was a conversational response
-                    # Create a custom message-only DataFrame
-                    message_df = pd.DataFrame([{"Row": "CHAT", "CMD": "CHAT", "Description": response_text}])
-                    df = message_df
+                for row in parser.feed(content):
+                    self.row_ready.emit(row)
+            
+            # Remember the response size so the next progress estimate is closer
+            if received_bytes:
+                self.api_client.expected_response_bytes = int(
+                    0.7 * self.api_client.expected_response_bytes + 0.3 * received_bytes
+                )
+            
+            return parser.text
+        finally:
+            response.close()
 
-                break  # Success, exit retry loop
-                
-            except requests.exceptions.RequestException as e:
-                error_message = f"Request error: {str(e)}"
-                self.status.emit(f"Request error: {str(e)}")
-                # Exponential backoff
-                if attempt < self.max_retries - 1 and not self.is_cancelled:  # Don't sleep after the last attempt
-                    backoff_time = 2 ** attempt  # 1, 2, 4 seconds
-                    self.status.emit(f"Retrying in {backoff_time} seconds...")
-                    time.sleep(backoff_time)
-            except (KeyError, ValueError, json.JSONDecodeError) as e:
-                error_message = f"Response parsing error: {str(e)}"
-                self.status.emit(f"Response parsing error: {str(e)}")
-                break  # Don't retry on parsing errors
+
+class InFlightRequest:
+    """A generation request shared by every caller that asked for the same payload.
+    
+    One worker makes the upstream call. Its signals are fanned out to each
+    attached caller, and the worker is only cancelled once every caller has
+    cancelled.
+    """
+    
+    def __init__(self, api_client, key: str, worker: APIClientWorker):
+        """Initialize the in-flight request.
         
-        self.progress.emit(100)
+        Args:
+            api_client: The API client that owns the request.
+            key: Canonical payload hash of the request.
+            worker: The worker making the request.
+        """
+        self.api_client = api_client
+        self.key = key
+        self.worker = worker
+        self.job_handle = None
+        self.waiters = []
+        self.rows = []  # Streamed rows so far, replayed to late callers
+        self._lock = threading.Lock()
+        
+        worker.finished.connect(self._on_finished)
+        worker.progress.connect(self._on_progress)
+        worker.status.connect(self._on_status)
+        worker.row_ready.connect(self._on_row_ready)
+    
+    def attach(self, waiter: "SharedRequestHandle") -> bool:
+        """Attach a caller to the request.
+        
+        Args:
+            waiter: Handle of the caller.
+            
+        Returns:
+            True if attached, False if the request has already finished or been cancelled.
+        """
+        with self._lock:
+            if self.worker.is_cancelled or (self.job_handle and self.job_handle.is_done()):
+                return False
+            self.waiters.append(waiter)
+            rows = list(self.rows)
         
-        # Always return df - if it's empty or contains a CHAT row, will be handled correctly by the receiver
-        self.finished.emit(df, error_message)
+        if waiter.row_callback:
+            for row in rows:
+                waiter.row_callback(row)
+        return True
+    
+    def detach(self, waiter: "SharedRequestHandle") -> None:
+        """Detach a caller, cancelling the request if no callers are left.
+        
+        Args:
+            waiter: Handle of the caller.
+        """
+        with self._lock:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            abandoned = not self.waiters
+        
+        if abandoned:
+            self.api_client._forget_in_flight(self)
+            if self.job_handle:
+                self.job_handle.cancel()
+            self.worker.cancel()
+    
+    def _current_waiters(self) -> List["SharedRequestHandle"]:
+        """Get the callers still waiting on the request."""
+        with self._lock:
+            return list(self.waiters)
+    
+    def _on_progress(self, value: int) -> None:
+        for waiter in self._current_waiters():
+            if waiter.progress_callback:
+                waiter.progress_callback(value)
+    
+    def _on_status(self, message: str) -> None:
+        for waiter in self._current_waiters():
+            if waiter.status_callback:
+                waiter.status_callback(message)
+    
+    def _on_row_ready(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self.rows.append(row)
+        for waiter in self._current_waiters():
+            if waiter.row_callback:
+                waiter.row_callback(row)
+    
+    def _on_finished(self, response: ParsedResponse, error_message: str) -> None:
+        self.api_client._forget_in_flight(self)
+        with self._lock:
+            waiters = list(self.waiters)
+            self.waiters = []
+        
+        # Each caller gets its own copy of the result
+        for index, waiter in enumerate(waiters):
+            waiter._finish(response if index == 0 else response.copy(), error_message)
+
+
+class SharedRequestHandle:
+    """Handle for one caller's share of an in-flight request.
+    
+    Offers the same interface as JobHandle. Cancelling it detaches only this
+    caller; the upstream request keeps running for the others.
+    """
+    
+    def __init__(self, callback: Callable[[ParsedResponse, str], None],
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 status_callback: Optional[Callable[[str], None]] = None,
+                 row_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Initialize the handle.
+        
+        Args:
+            callback: Function to call with the result (ParsedResponse, error_message).
+            progress_callback: Optional function to call with progress updates.
+            status_callback: Optional function to call with status messages.
+            row_callback: Optional function to call with each streamed row.
+        """
+        self.callback = callback
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.row_callback = row_callback
+        self.request = None
+        self._cancelled = False
+        self._done = threading.Event()
+    
+    def cancel(self) -> bool:
+        """Stop waiting for the request.
+        
+        Returns:
+            True if the handle was cancelled, False if it had already finished.
+        """
+        if self._cancelled or self._done.is_set():
+            return False
+        self._cancelled = True
+        self._done.set()
+        if self.request:
+            self.request.detach(self)
+        return True
+    
+    def is_cancelled(self) -> bool:
+        """Check whether the handle has been cancelled."""
+        return self._cancelled
+    
+    def is_done(self) -> bool:
+        """Check whether the result has been delivered or the handle cancelled."""
+        return self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the result or cancellation.
+        
+        Args:
+            timeout: Maximum time to wait in seconds, or None to wait forever.
+            
+        Returns:
+            True if the handle is done.
+        """
+        return self._done.wait(timeout)
+    
+    @property
+    def state(self) -> str:
+        """State of this caller's share of the request."""
+        if self._cancelled:
+            return JOB_CANCELLED
+        if self._done.is_set():
+            return JOB_FINISHED
+        if self.request and self.request.job_handle:
+            return self.request.job_handle.state
+        return JOB_QUEUED
+    
+    @property
+    def queue_wait_time(self) -> float:
+        """Time in seconds the shared request spent waiting in the queue."""
+        return self.request.job_handle.queue_wait_time if self.request and self.request.job_handle else 0.0
+    
+    @property
+    def run_time(self) -> float:
+        """Time in seconds the shared request has been running."""
+        return self.request.job_handle.run_time if self.request and self.request.job_handle else 0.0
+    
+    def _finish(self, response: ParsedResponse, error_message: str) -> None:
+        """Deliver the result to the caller."""
+        if self._cancelled:
+            return
+        self._done.set()
+        self.callback(response, error_message)
+
+
+class APIKeyValidationWorker(QObject):
+    """Worker that checks an API key off the UI thread."""
+    
+    finished = pyqtSignal(bool, str)  # Valid flag, message
+    
+    def __init__(self, api_client: "APIClient", use_cache: bool = True):
+        """Initialize the worker.
+        
+        Args:
+            api_client: Client whose key is checked.
+            use_cache: Return a cached result instead of probing when there is one.
+        """
+        super().__init__()
+        self.api_client = api_client
+        self.use_cache = use_cache
+    
+    def run(self) -> None:
+        """Check the key and emit the result."""
+        valid, message = self.api_client.validate_api_key(self.use_cache)
+        self.finished.emit(valid, message)
 
 
 class APIClient:
     """Client for making API requests to generate test sequences."""
     
-    def __init__(self, api_key: str = ""):
+    def __init__(self, api_key: str = "", max_workers: int = 4,
+                 executor: Optional[RequestExecutor] = None):
         """Initialize the API client.
         
         Args:
             api_key: The API key to use for requests.
+            max_workers: Number of concurrent requests when no executor is given.
+            executor: Optional request executor to share with other clients.
         """
         self.api_key = api_key
+        self.router = EndpointRouter.from_config(API_ENDPOINTS)
         self.last_raw_response = ""
-        self.chat_memory = []
-        self.request_history = []
+        self.chat_memory = deque(maxlen=CHAT_MEMORY_SIZE)
+        self.request_history = RequestHistory(REQUEST_HISTORY_SIZE)
+        self.key_cache = APIKeyCache()  # Key validity learned from probes and normal requests
+        self.executor = executor or RequestExecutor(max_workers)
+        
+        # Pool enough connections for every worker, so concurrent requests never wait on one
         self.session = requests.Session()
+        self.http_adapter = CancellableHTTPAdapter(
+            pool_maxsize=self.executor.max_workers * POOL_CONNECTIONS_PER_WORKER
+        )
+        self.session.mount("https://", self.http_adapter)
+        self.session.mount("http://", self.http_adapter)
+        self.warmer = ConnectionWarmer(self.session, lambda: [e.url for e in self.router.endpoints])
+        
+        self.response_cache = ResponseCache()
+        self.expected_response_bytes = 4000  # Rolling estimate used for streaming progress
+        self.hedger = RequestHedger()  # Disabled by default; set hedger.enabled to hedge slow requests
+        self.retry_policy = RetryPolicy()
+        self.prompt_token_budget = PROMPT_TOKEN_BUDGET
+        
+        # Function returning formatted examples of validated sequences for a
+        # request's parameters, most similar first; None leaves them out
+        self.example_provider = None
+        self.example_token_budget = EXAMPLE_TOKEN_BUDGET
+        self.async_transport = None  # Created on first use by agenerate_sequence
+        self.async_max_connections = ASYNC_MAX_CONNECTIONS
         self.current_worker = None
-        self.current_thread = None
+        self.current_handle = None
+        
+        # Identical concurrent requests share one upstream call
+        self.coalesce_requests = True
+        self.coalesced_requests = 0
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
     
     def set_api_key(self, api_key: str) -> None:
         """Set the API key.
@@ -294,73 +941,428 @@ class APIClient:
         """
         self.api_key = api_key
     
-    def get_headers(self) -> Dict[str, str]:
+    def set_transport(self, adapter: HTTPAdapter) -> None:
+        """Replace the HTTP transport, e.g. to record or replay API exchanges.
+        
+        Args:
+            adapter: Requests transport adapter to mount for http and https.
+        """
+        self.http_adapter = adapter
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Coroutine requests must go through the adapter too
+        self.async_transport = AsyncTransport(self.session, self.async_max_connections, use_aiohttp=False)
+    
+    def start_warmup(self) -> None:
+        """Open connections to the endpoints in the background and keep them open while idle."""
+        self.warmer.start()
+    
+    def post(self, endpoint: Endpoint, payload: Dict[str, Any], timeout: float,
+             stream: bool = False) -> requests.Response:
+        """Send a chat-completions request to an endpoint.
+        
+        Large bodies are gzipped for endpoints configured to accept it.
+        
+        Args:
+            endpoint: Endpoint to send the request to.
+            payload: Chat-completions request payload.
+            timeout: Seconds to wait on the network.
+            stream: Read the response as it arrives.
+            
+        Returns:
+            The response.
+        """
+        self.warmer.touch()
+        headers = self.get_headers(endpoint)
+        if not endpoint.compress_requests:
+            return self.session.post(endpoint.url, headers=headers, json=payload, timeout=timeout, stream=stream)
+        
+        body, body_headers = encode_json_body(payload, compress=True)
+        headers.update(body_headers)
+        return self.session.post(endpoint.url, headers=headers, data=body, timeout=timeout, stream=stream)
+    
+    def get_transport_stats(self) -> Dict[str, Any]:
+        """Get connection pool and warm-up statistics.
+        
+        Returns:
+            Dictionary with the adapter's connection reuse statistics, if it
+            reports them, and the warm-up statistics.
+        """
+        stats = {"warmup": self.warmer.get_stats()}
+        if hasattr(self.http_adapter, "get_stats"):
+            stats.update(self.http_adapter.get_stats())
+        return stats
+    
+    @property
+    def endpoint(self) -> str:
+        """URL of the primary endpoint."""
+        return self.router.primary.url
+    
+    @endpoint.setter
+    def endpoint(self, url: str) -> None:
+        """Send every request to a single endpoint, e.g. a local test server."""
+        self.router = EndpointRouter([Endpoint(url, url, [DEFAULT_MODEL])])
+    
+    def pin_model(self, model: Optional[str]) -> None:
+        """Pin a model for every request that does not ask for one.
+        
+        Requests are then only routed to endpoints serving the model.
+        
+        Args:
+            model: Model to pin, or None to let each endpoint use its default model.
+        """
+        self.router.pin_model(model)
+    
+    def remember(self, parameters: Dict[str, Any]) -> None:
+        """Add a request's message to the conversation context.
+        
+        For results of requests sent without chat memory that are kept anyway,
+        such as the chosen one of several candidates.
+        
+        Args:
+            parameters: Parameters of the request.
+        """
+        spec_data = parameters.get("spring_specification")
+        specification = SpringSpecification.from_dict(spec_data) if spec_data else None
+        self.chat_memory.append(strip_specification_text(str(parameters.get('prompt', '')), specification))
+    
+    def key_for(self, endpoint: Optional[Endpoint] = None) -> str:
+        """Get the API key requests to an endpoint are sent with.
+        
+        Args:
+            endpoint: Endpoint the request is sent to, or None for the client's key.
+        """
+        return endpoint.api_key if endpoint and endpoint.api_key else self.api_key
+    
+    def observe_key_status(self, endpoint: Endpoint, error: requests.exceptions.RequestException) -> None:
+        """Learn whether the key is valid from a failed request.
+        
+        Args:
+            endpoint: Endpoint the request was sent to.
+            error: The request's error; only HTTP errors carry a status code.
+        """
+        response = getattr(error, "response", None)
+        if response is not None:
+            self.key_cache.observe(self.key_for(endpoint), response.status_code)
+    
+    def get_headers(self, endpoint: Optional[Endpoint] = None) -> Dict[str, str]:
         """Get the headers for API requests.
         
+        Args:
+            endpoint: Endpoint the request is sent to, for its own API key.
+            
         Returns:
             Headers dictionary.
         """
+        api_key = self.key_for(endpoint)
         return {
-            "Authorization": f"Bearer {self.api_key}",
+            "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
     
+    def build_payload(self, parameters: Dict[str, Any],
+                      model: Optional[str] = None,
+                      temperature: float = DEFAULT_TEMPERATURE,
+                      use_chat_memory: bool = True,
+                      trace: Optional[RequestTrace] = None) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+        """Build the chat-completions payload for a request.
+        
+        The user prompt is assembled from sections so that the specification
+        and the operator's message appear once, and the least useful context
+        is trimmed when the prompt would exceed the token budget. Examples
+        from the example provider are added within their own token budget.
+        
+        Args:
+            parameters: Dictionary of spring parameters.
+            model: Model to pin for the request, or None to use the model of the chosen endpoint.
+            temperature: The temperature to use for generation.
+            use_chat_memory: Include the conversation context.
+            trace: Optional trace to record the build time on.
+            
+        Returns:
+            Tuple of (request payload, message to remember as context, prompt token report)
+        """
+        trace = trace or RequestTrace()
+        start_time = time.perf_counter()
+        
+        spec_data = parameters.get("spring_specification")
+        specification = SpringSpecification.from_dict(spec_data) if spec_data else None
+        spec_text = specification_text(spec_data) if spec_data else ""
+        
+        # The operator's own words, without any pasted specification text
+        message = strip_specification_text(str(parameters.get('prompt', '')), specification)
+        
+        # Check if test_type is provided in parameters
+        test_type_text = ""
+        if "Test Type" in parameters:
+            test_type = parameters["Test Type"]
+            test_type_text = f"This should be a {test_type} test sequence."
+        
+        builder = PromptBuilder(self.prompt_token_budget,
+                                reserved_tokens=estimate_tokens(SYSTEM_PROMPT_TEMPLATE))
+        builder.add_section("parameters", parameter_lines(parameters, spec_text), PRIORITY_PARAMETERS)
+        builder.add_section("specification", spec_text)
+        builder.add_section("test_type", test_type_text)
+        
+        # Validated sequences for similar springs; the least similar is trimmed first
+        examples = []
+        if self.example_provider is not None:
+            examples = fit_examples(self.example_provider(parameters), self.example_token_budget)
+            builder.add_items("examples", examples[::-1], PRIORITY_EXAMPLES,
+                              header=EXAMPLES_HEADER, separator="\n\n")
+        
+        builder.add_section("message", message, header="My message: ")
+        builder.add_section("format_instructions", RESPONSE_FORMAT_INSTRUCTIONS)
+        
+        # Include previous context if available, minus a repeat of this message
+        if use_chat_memory and self.chat_memory:
+            history = [entry for entry in list(self.chat_memory)[-3:] if entry != message]
+            builder.add_items("chat_history", history, PRIORITY_CHAT_HISTORY, header="Previous context:\n")
+        
+        prompt = builder.build()
+        
+        # Create payload
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT_TEMPLATE},
+                {"role": "user", "content": prompt.text}
+            ],
+            "temperature": temperature
+        }
+        
+        trace.add("prompt_build", time.perf_counter() - start_time)
+        trace.attributes["prompt_tokens"] = prompt.total_tokens
+        if examples:
+            trace.attributes["examples"] = len(examples) - prompt.trimmed.get("examples", 0)
+        return payload, message, prompt.to_dict()
+    
     def generate_sequence_async(self, parameters: Dict[str, Any], 
-                             callback: Callable[[pd.DataFrame, str], None],
+                             callback: Callable[[ParsedResponse, str], None],
                              progress_callback: Optional[Callable[[int], None]] = None,
                              status_callback: Optional[Callable[[str], None]] = None,
-                             model: str = DEFAULT_MODEL, 
+                             model: Optional[str] = None, 
                              temperature: float = DEFAULT_TEMPERATURE,
-                             max_retries: int = 3) -> None:
+                             max_retries: int = 3,
+                             bypass_cache: bool = False,
+                             stream: bool = False,
+                             row_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             priority: int = PRIORITY_INTERACTIVE,
+                             deadline: float = REQUEST_DEADLINE,
+                             trace: Optional[RequestTrace] = None,
+                             use_chat_memory: bool = True) -> Union[JobHandle, SharedRequestHandle]:
         """Generate a test sequence based on parameters asynchronously.
         
+        While coalesce_requests is set, a request with the same payload as one
+        already in flight is attached to it instead of being sent again. Every
+        caller still receives its own result callback and handle.
+        
         Args:
             parameters: Dictionary of spring parameters.
-            callback: Function to call with the result (DataFrame, error_message).
+            callback: Function to call with the result (ParsedResponse, error_message).
             progress_callback: Optional function to call with progress updates.
             status_callback: Optional function to call with status messages.
-            model: The model to use for generation.
+            model: Model to pin for the request, or None to use the model of the chosen endpoint.
             temperature: The temperature to use for generation.
             max_retries: Maximum number of retry attempts.
+            bypass_cache: Skip the response cache and force a new request.
+            stream: Read the response as an event stream.
+            row_callback: Optional function to call with each row of a streamed response.
+            priority: Queue priority; interactive requests cancel the previous interactive request.
+            deadline: Overall time budget in seconds, including retries.
+            trace: Optional trace to record phase timings on.
+            use_chat_memory: Include and update the conversation context.
+            
+        Returns:
+            Handle that can cancel the request and reports its queue and run times.
         """
-        # Cancel any existing operation
-        self.cancel_current_operation()
-        
         # Create a worker
-        self.current_worker = APIClientWorker(
-            self, parameters, model, temperature, max_retries
+        worker = APIClientWorker(
+            self, parameters, model, temperature, max_retries, bypass_cache, stream, deadline,
+            use_chat_memory=use_chat_memory, trace=trace
         )
         
-        # Connect signals
-        self.current_worker.finished.connect(callback)
+        if self.coalesce_requests:
+            return self._submit_coalesced(
+                worker, callback, progress_callback, status_callback, row_callback, priority
+            )
+        
+        # A new interactive request supersedes the previous one; batch jobs run side by side
+        if priority == PRIORITY_INTERACTIVE:
+            self.cancel_current_operation()
+        
+        # Connect signals - results of a cancelled worker never reach the caller
+        worker.finished.connect(self._unless_cancelled(worker, callback))
         if progress_callback:
-            self.current_worker.progress.connect(progress_callback)
+            worker.progress.connect(self._unless_cancelled(worker, progress_callback))
         if status_callback:
-            self.current_worker.status.connect(status_callback)
+            worker.status.connect(self._unless_cancelled(worker, status_callback))
+        if row_callback:
+            worker.row_ready.connect(self._unless_cancelled(worker, row_callback))
+        
+        # Queue the worker on the shared executor
+        handle = self.executor.submit(worker.run, priority, on_cancel=worker.cancel)
+        
+        if priority == PRIORITY_INTERACTIVE:
+            self.current_worker = worker
+            self.current_handle = handle
+        
+        return handle
+    
+    @staticmethod
+    def request_key(payload: Dict[str, Any], bypass_cache: bool = False) -> str:
+        """Get the canonical hash identifying a request payload.
+        
+        Args:
+            payload: Chat-completions request payload.
+            bypass_cache: Whether the request skips the response cache.
+            
+        Returns:
+            Hex digest of the canonical payload.
+        """
+        canonical = json.dumps({"payload": payload, "bypass_cache": bypass_cache},
+                               sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def _submit_coalesced(self, worker: APIClientWorker,
+                          callback: Callable[[ParsedResponse, str], None],
+                          progress_callback: Optional[Callable[[int], None]],
+                          status_callback: Optional[Callable[[str], None]],
+                          row_callback: Optional[Callable[[Dict[str, Any]], None]],
+                          priority: int) -> SharedRequestHandle:
+        """Queue a worker, or attach the caller to an identical request already in flight.
         
-        # Create a thread for the worker
-        self.current_thread = threading.Thread(target=self.current_worker.run)
-        self.current_thread.daemon = True
+        Args:
+            worker: Worker for the new request.
+            callback: Function to call with the result (ParsedResponse, error_message).
+            progress_callback: Optional function to call with progress updates.
+            status_callback: Optional function to call with status messages.
+            row_callback: Optional function to call with each streamed row.
+            priority: Queue priority.
+            
+        Returns:
+            Handle for this caller's share of the request.
+        """
+        # Build the payload now so identical requests can be matched before they run
+        worker.payload = worker.build_payload()
+        key = self.request_key(worker.payload, worker.bypass_cache)
+        handle = SharedRequestHandle(callback, progress_callback, status_callback, row_callback)
+        
+        with self._in_flight_lock:
+            request = self._in_flight.get(key)
+        
+        if request is not None and request.attach(handle):
+            handle.request = request
+            self.coalesced_requests += 1
+            if priority == PRIORITY_INTERACTIVE:
+                # Supersede the previous interactive request unless it is this same one
+                current = self.current_handle
+                if not (isinstance(current, SharedRequestHandle) and current.request is request):
+                    self.cancel_current_operation()
+                self.current_worker = None  # Shared worker - cancelled through the handles
+                self.current_handle = handle
+            return handle
         
-        # Start the thread
-        self.current_thread.start()
+        # A new interactive request supersedes the previous one; batch jobs run side by side
+        if priority == PRIORITY_INTERACTIVE:
+            self.cancel_current_operation()
+        
+        request = InFlightRequest(self, key, worker)
+        request.attach(handle)
+        handle.request = request
+        with self._in_flight_lock:
+            self._in_flight[key] = request
+        
+        # Queue the worker on the shared executor
+        request.job_handle = self.executor.submit(worker.run, priority, on_cancel=worker.cancel)
+        
+        if priority == PRIORITY_INTERACTIVE:
+            self.current_worker = None  # Shared worker - cancelled through the handles
+            self.current_handle = handle
+        
+        return handle
+    
+    def _forget_in_flight(self, request: InFlightRequest) -> None:
+        """Stop offering a request to new callers.
+        
+        Args:
+            request: The request that finished or was abandoned.
+        """
+        with self._in_flight_lock:
+            if self._in_flight.get(request.key) is request:
+                del self._in_flight[request.key]
+    
+    @staticmethod
+    def _unless_cancelled(worker: APIClientWorker, fn: Callable) -> Callable:
+        """Wrap a callback so it is skipped once the worker has been cancelled.
+        
+        Args:
+            worker: The worker emitting the signal.
+            fn: The callback to wrap.
+            
+        Returns:
+            Wrapped callback.
+        """
+        def wrapper(*args):
+            if not worker.is_cancelled:
+                fn(*args)
+        return wrapper
     
     def cancel_current_operation(self) -> None:
-        """Cancel the current operation."""
+        """Cancel the current interactive operation."""
+        if self.current_handle:
+            self.current_handle.cancel()
         if self.current_worker:
             self.current_worker.cancel()
         
-        if self.current_thread and self.current_thread.is_alive():
-            # Just let it finish on its own, since we've cancelled the worker
-            pass
-        
         self.current_worker = None
-        self.current_thread = None
+        self.current_handle = None
+    
+    def run_request(self, parameters: Dict[str, Any],
+                    model: Optional[str] = None,
+                    temperature: float = DEFAULT_TEMPERATURE,
+                    max_retries: int = 3,
+                    bypass_cache: bool = False,
+                    deadline: float = REQUEST_DEADLINE) -> Tuple[ParsedResponse, str]:
+        """Run a generation request on the calling thread.
+        
+        Meant for code that already runs on a worker thread, such as batch
+        jobs. The request does not read or update the chat context.
+        
+        Args:
+            parameters: Dictionary of spring parameters.
+            model: Model to pin for the request, or None to use the model of the chosen endpoint.
+            temperature: The temperature to use for generation.
+            max_retries: Maximum number of retry attempts.
+            bypass_cache: Skip the response cache and force a new request.
+            deadline: Overall time budget in seconds, including retries.
+            
+        Returns:
+            Tuple of (parsed response, error message)
+        """
+        worker = APIClientWorker(
+            self, parameters, model, temperature, max_retries, bypass_cache,
+            stream=False, deadline=deadline, use_chat_memory=False
+        )
+        
+        result = [ParsedResponse(), ""]
+        
+        def on_finished(response, error_msg):
+            result[0] = response
+            result[1] = error_msg
+        
+        # The worker lives on this thread, so the signal is delivered directly
+        worker.finished.connect(on_finished)
+        worker.run()
+        
+        return result[0], result[1]
     
     def generate_sequence(self, parameters: Dict[str, Any], 
-                         model: str = DEFAULT_MODEL, 
+                         model: Optional[str] = None, 
                          temperature: float = DEFAULT_TEMPERATURE,
-                         max_retries: int = 3) -> Tuple[pd.DataFrame, str]:
+                         max_retries: int = 3,
+                         bypass_cache: bool = False) -> Tuple[ParsedResponse, str]:
         """Generate a test sequence based on parameters (synchronous version).
         
         Note: This method is kept for backward compatibility but should be avoided
@@ -368,24 +1370,25 @@ class APIClient:
         
         Args:
             parameters: Dictionary of spring parameters.
-            model: The model to use for generation.
+            model: Model to pin for the request, or None to use the model of the chosen endpoint.
             temperature: The temperature to use for generation.
             max_retries: Maximum number of retry attempts.
+            bypass_cache: Skip the response cache and force a new request.
             
         Returns:
-            Tuple of (DataFrame of the sequence, raw response text)
+            Tuple of (parsed response, error message)
         """
         result = [None, None]  # To store result from callback
         event = threading.Event()
         
-        def callback(df, error_msg):
-            result[0] = df
+        def callback(response, error_msg):
+            result[0] = response
             result[1] = error_msg
             event.set()
         
         # Start async operation
         self.generate_sequence_async(
-            parameters, callback, None, None, model, temperature, max_retries
+            parameters, callback, None, None, model, temperature, max_retries, bypass_cache
         )
         
         # Wait for completion
@@ -393,19 +1396,264 @@ class APIClient:
         
         return result[0], result[1]
     
-    def validate_api_key(self) -> Tuple[bool, str]:
+    def get_async_transport(self) -> AsyncTransport:
+        """Get the transport used by agenerate_sequence, creating it on first use.
+        
+        Returns:
+            The async transport.
+        """
+        if self.async_transport is None:
+            self.async_transport = AsyncTransport(self.session, self.async_max_connections)
+        return self.async_transport
+    
+    async def agenerate_sequence(self, parameters: Dict[str, Any],
+                                 model: Optional[str] = None,
+                                 temperature: float = DEFAULT_TEMPERATURE,
+                                 max_retries: int = 3,
+                                 bypass_cache: bool = False,
+                                 deadline: float = REQUEST_DEADLINE,
+                                 use_chat_memory: bool = False,
+                                 trace: Optional[RequestTrace] = None) -> Tuple[ParsedResponse, str]:
+        """Generate a test sequence as a coroutine.
+        
+        Needs no Qt event loop or worker thread, so many requests can run on
+        one asyncio loop; the transport limits how many are in flight.
+        Cancelling the awaiting task aborts the request. The attempts run
+        through arun_request, the same loop as the Qt path. Streaming,
+        hedging and request coalescing are only available through
+        generate_sequence_async.
+        
+        Args:
+            parameters: Dictionary of spring parameters.
+            model: Model to pin for the request, or None to use the model of the chosen endpoint.
+            temperature: The temperature to use for generation.
+            max_retries: Maximum number of retry attempts.
+            bypass_cache: Skip the response cache and force a new request.
+            deadline: Overall time budget in seconds, including retries.
+            use_chat_memory: Include and update the conversation context.
+            trace: Optional trace to record phase timings on.
+            
+        Returns:
+            Tuple of (parsed response, error message)
+        """
+        transport = self.get_async_transport()
+        
+        def build():
+            payload, memory_entry, _ = self.build_payload(parameters, model, temperature, use_chat_memory, trace)
+            return payload, memory_entry
+        
+        async def send(endpoint, payload, timeout):
+            self.warmer.touch()
+            response_json = await transport.post_json(endpoint.url, self.get_headers(endpoint), payload, timeout)
+            return response_json['choices'][0].get('message', {}).get('content', '')
+        
+        async def wait(seconds):
+            await asyncio.sleep(seconds)  # Cancelling the task interrupts the wait
+            return False
+        
+        return await self.arun_request(
+            parameters, build, send, wait,
+            model=model,
+            temperature=temperature,
+            max_retries=max_retries,
+            bypass_cache=bypass_cache,
+            deadline_at=time.monotonic() + deadline,
+            use_chat_memory=use_chat_memory,
+            trace=trace or RequestTrace()
+        )
+    
+    async def arun_request(self, parameters: Dict[str, Any],
+                           build: Callable[[], Tuple[Dict[str, Any], str]],
+                           send: Callable[[Endpoint, Dict[str, Any], float], Awaitable[Optional[str]]],
+                           wait: Callable[[float], Awaitable[bool]],
+                           model: Optional[str],
+                           temperature: float,
+                           max_retries: int,
+                           bypass_cache: bool,
+                           deadline_at: float,
+                           use_chat_memory: bool,
+                           trace: RequestTrace,
+                           status: Optional[Callable[[str], None]] = None,
+                           progress: Optional[Callable[[int], None]] = None,
+                           cancelled: Optional[Callable[[], bool]] = None) -> Tuple[ParsedResponse, str]:
+        """Run a generation request: cache lookup, attempts, retries and failover.
+        
+        This is the one attempt loop behind both the Qt worker and
+        agenerate_sequence; they differ only in how an attempt is sent and
+        how a retry wait is interrupted.
+        
+        Args:
+            parameters: Dictionary of spring parameters.
+            build: Function returning the request payload and the chat memory entry.
+            send: Coroutine sending one attempt to an endpoint with a timeout and
+                returning the completion text, or None if the request was cancelled.
+            wait: Coroutine waiting before a retry; returns True if the request was cancelled.
+            model: Model to pin for the request, or None to use the model of the chosen endpoint.
+            temperature: The temperature used for generation.
+            max_retries: Maximum number of attempts.
+            bypass_cache: Skip the response cache and force a new request.
+            deadline_at: time.monotonic() by which the request must finish.
+            use_chat_memory: Update the conversation context on success.
+            trace: Trace to record phase timings on.
+            status: Optional function to call with status messages.
+            progress: Optional function to call with progress updates.
+            cancelled: Optional function telling whether the request was cancelled.
+            
+        Returns:
+            Tuple of (parsed response, error message)
+        """
+        status = status or (lambda message: None)
+        progress = progress or (lambda percent: None)
+        cancelled = cancelled or (lambda: False)
+        
+        model = model or self.router.pinned_model
+        payload, memory_entry = build()
+        
+        # Serve repeated requests from the response cache, keyed on the built payload
+        # and the endpoint likely to serve it, so a different context is a different entry
+        cache = self.response_cache
+        if cache is not None and not bypass_cache:
+            preferred = self.router.preferred(model)
+            cached_rows = cache.get(cache.make_key(dict(payload, model=preferred.model_for(model)), preferred.url))
+            if cached_rows is not None:
+                trace.attributes["cache_hit"] = True
+                status("Loaded response from cache")
+                return ParsedResponse.from_records(cached_rows), ""
+        
+        # Save the request for debugging
+        self.request_history.append({
+            "timestamp": time.time(),
+            "payload": payload
+        })
+        
+        status("Preparing request...")
+        progress(10)
+        
+        tried = []  # Endpoints used by earlier attempts
+        response = ParsedResponse()
+        error_message = ""
+        backoff_time = 0.0
+        
+        for attempt in range(max_retries):
+            if cancelled():
+                break
+            
+            remaining_time = deadline_at - time.monotonic()
+            if remaining_time <= 0:
+                error_message = "Request deadline exceeded"
+                status(error_message)
+                break
+            
+            # Fastest healthy endpoint, failing over from the ones already tried
+            endpoint = self.router.select(model, exclude=tried)
+            if endpoint is None:
+                # Fail fast while every endpoint is known to be down
+                error_message = (f"API endpoint unavailable after repeated failures - "
+                                 f"try again in {self.router.retry_in():.0f} seconds")
+                status(error_message)
+                break
+            tried.append(endpoint)
+            attempt_start = time.monotonic()
+            
+            try:
+                status(f"Sending request (attempt {attempt+1}/{max_retries})...")
+                progress(20 + (attempt * 15))
+                
+                trace.attributes["attempts"] = attempt + 1
+                trace.attributes["endpoint"] = endpoint.name
+                
+                with trace.span("network"):
+                    response_text = await send(endpoint, dict(payload, model=endpoint.model_for(model)),
+                                               max(0.1, min(REQUEST_TIMEOUT, remaining_time)))
+                
+                if response_text is None or cancelled():
+                    break
+                
+                endpoint.record_success(time.monotonic() - attempt_start)
+                self.key_cache.observe(self.key_for(endpoint), 200)
+                error_message = ""  # Earlier failed attempts no longer matter
+                
+                # Save context for continuity
+                if use_chat_memory:
+                    self.chat_memory.append(memory_entry)  # Bounded - oldest entries drop out
+                
+                # Save raw response for debugging
+                self.last_raw_response = response_text
+                
+                # Process the response
+                status("Processing response...")
+                progress(90)
+                
+                with trace.span("response_parse"):
+                    response = parse_response_text(response_text, trace)
+                if response.parse_error:
+                    status(f"Failed to parse sequence data: {response.parse_error}")
+                
+                # Only cache responses that carry sequence data - plain chat depends on context
+                if cache is not None and response.has_sequence:
+                    cache.put(cache.make_key(dict(payload, model=endpoint.model_for(model)), endpoint.url),
+                              response.to_records())
+                
+                break  # Success, exit retry loop
+                
+            except requests.exceptions.RequestException as e:
+                # A cancelled request fails with a connection error when its socket is closed
+                if cancelled():
+                    break
+                error_message = f"Request error: {str(e)}"
+                status(error_message)
+                endpoint.record_failure(is_endpoint_failure(e))
+                self.observe_key_status(endpoint, e)
+                
+                if attempt < max_retries - 1:  # Don't sleep after the last attempt
+                    backoff_time = self.retry_policy.next_delay(e, backoff_time)
+                    if backoff_time is None:
+                        break  # Not worth retrying, e.g. an invalid API key
+                    if self.router.has_alternative(tried):
+                        continue  # Fail over to another endpoint straight away
+                    if backoff_time >= deadline_at - time.monotonic():
+                        error_message = "Request deadline exceeded"
+                        status(error_message)
+                        break
+                    status(f"Retrying in {backoff_time:.0f} seconds...")
+                    if await wait(backoff_time):
+                        break
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                # Includes json.JSONDecodeError, a ValueError
+                error_message = f"Response parsing error: {str(e)}"
+                status(error_message)
+                break  # Don't retry on parsing errors
+        
+        return response, error_message
+    
+    async def aclose(self) -> None:
+        """Close the connections opened by agenerate_sequence."""
+        if self.async_transport is not None:
+            await self.async_transport.close()
+    
+    def validate_api_key(self, use_cache: bool = True) -> Tuple[bool, str]:
         """Validate the API key with a simple request.
         
+        Blocks for up to 10 seconds; UI code should use validate_api_key_async.
+        
+        Args:
+            use_cache: Return the cached result, if any, instead of probing.
+            
         Returns:
             Tuple of (success flag, error message)
         """
         if not self.api_key:
             return False, "API key is empty"
         
+        if use_cache:
+            cached = self.key_cache.get(self.api_key)
+            if cached is not None:
+                return cached
+        
         try:
             # Simple test payload that should return quickly
             payload = {
-                "model": DEFAULT_MODEL,
+                "model": self.router.primary.model_for(self.router.pinned_model) or DEFAULT_MODEL,
                 "messages": [
                     {"role": "system", "content": "You are a helpful assistant."},
                     {"role": "user", "content": "Hello, are you working?"}
@@ -415,21 +1663,43 @@ class APIClient:
             }
             
             response = self.session.post(
-                API_ENDPOINT,
+                self.endpoint,
                 headers=self.get_headers(),
                 json=payload,
                 timeout=10
             )
+            self.key_cache.observe(self.api_key, response.status_code)
             
             # Check status code
             if response.status_code == 200:
-                return True, "API key is valid"
+                return True, KEY_VALID_MESSAGE
             elif response.status_code == 401:
-                return False, "Invalid API key"
+                return False, KEY_INVALID_MESSAGE
             else:
                 return False, f"API error: {response.status_code}"
                 
         except requests.exceptions.RequestException as e:
             return False, f"Connection error: {str(e)}"
         except Exception as e:
-            return False, f"Unexpected error: {str(e)}" 
\ No newline at end of file
+            return False, f"Unexpected error: {str(e)}"
+    
+    def validate_api_key_async(self, callback: Callable[[bool, str], None],
+                               use_cache: bool = True) -> Optional[JobHandle]:
+        """Validate the API key without blocking the calling thread.
+        
+        Args:
+            callback: Function to call with (success flag, message); called
+                straight away when the result is cached.
+            use_cache: Return the cached result, if any, instead of probing.
+            
+        Returns:
+            Handle of the probe, or None if the result was known without one.
+        """
+        cached = self.key_cache.get(self.api_key) if use_cache and self.api_key else None
+        if cached is not None or not self.api_key:
+            callback(*(cached or (False, "API key is empty")))
+            return None
+        
+        worker = APIKeyValidationWorker(self, use_cache)
+        worker.finished.connect(callback)
+        return self.executor.submit(worker.run, PRIORITY_INTERACTIVE) 
\ No newline at end of file
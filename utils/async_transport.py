@@ -0,0 +1,167 @@
+"""
+Async transport module for the Spring Test App.
+Contains the non-blocking HTTP transport used by the asyncio API.
+"""
+import asyncio
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.transport import CancelToken, cancellation_scope
+
+# Import aiohttp for non-blocking requests (listed in requirements.txt)
+try:
+    import aiohttp
+    AIOHTTP_SUPPORT = True
+except ImportError:
+    AIOHTTP_SUPPORT = False
+    logging.warning("aiohttp not installed. Async requests will fall back to a thread pool; "
+                    "install the packages in requirements.txt.")
+
+# Default number of concurrent connections per transport
+ASYNC_MAX_CONNECTIONS = 32
+
+
+# Event loop of each thread that runs coroutines with run_coroutine
+_thread_loops = threading.local()
+
+
+def run_coroutine(coroutine):
+    """Run a coroutine to completion on the calling thread.
+
+    Each thread keeps one event loop for all its calls, so worker threads do
+    not create a new loop per request.
+
+    Args:
+        coroutine: The coroutine to run.
+
+    Returns:
+        The coroutine's result.
+    """
+    loop = getattr(_thread_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _thread_loops.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coroutine)
+
+
+class AsyncTransport:
+    """Pooled HTTP transport for coroutines.
+
+    Uses aiohttp, so requests need no thread of their own. Only if aiohttp
+    is missing from the installation are requests sent through a requests
+    session on a bounded thread pool, so the event loop is still never
+    blocked. Either way at most max_connections requests are in flight, and
+    cancelling the awaiting task aborts the request.
+
+    Failures are raised as requests exceptions so the retry policy and the
+    circuit breaker treat both transports the same way.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 max_connections: int = ASYNC_MAX_CONNECTIONS,
+                 use_aiohttp: bool = AIOHTTP_SUPPORT):
+        """Initialize the transport.
+
+        Args:
+            session: Session used when aiohttp is not used.
+            max_connections: Maximum number of requests in flight.
+            use_aiohttp: Send requests with aiohttp instead of the session.
+        """
+        self.session = session or requests.Session()
+        self.max_connections = max(1, max_connections)
+        self.use_aiohttp = use_aiohttp and AIOHTTP_SUPPORT
+        self._client = None  # aiohttp session, bound to the loop that created it
+        self._client_loop = None
+        self._executor = None
+
+    async def post_json(self, url: str, headers: Dict[str, str], payload: Dict[str, Any],
+                        timeout: float) -> Dict[str, Any]:
+        """Send a JSON request and return the decoded JSON response.
+
+        Args:
+            url: Request URL.
+            headers: Request headers.
+            payload: JSON body.
+            timeout: Timeout for the whole request in seconds.
+
+        Returns:
+            The decoded response.
+
+        Raises:
+            requests.exceptions.RequestException: If the request failed.
+            ValueError: If the response is not valid JSON.
+        """
+        if self.use_aiohttp:
+            return await self._post_aiohttp(url, headers, payload, timeout)
+        return await self._post_threaded(url, headers, payload, timeout)
+
+    async def _post_aiohttp(self, url, headers, payload, timeout) -> Dict[str, Any]:
+        """Send a request with aiohttp."""
+        client = self._get_client()
+        try:
+            async with client.post(url, headers=headers, json=payload,
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                body = await response.read()
+                if response.status >= 400:
+                    raise _http_error(url, response.status, response.headers, body)
+        except aiohttp.ClientConnectionError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        except asyncio.TimeoutError:
+            raise requests.exceptions.Timeout(f"Request timed out after {timeout:.0f} seconds")
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.RequestException(str(e))
+        return json.loads(body)
+
+    async def _post_threaded(self, url, headers, payload, timeout) -> Dict[str, Any]:
+        """Send a request through the session on the thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_connections, thread_name_prefix="AsyncTransport")
+
+        token = CancelToken()
+
+        def post():
+            with cancellation_scope(token):
+                response = self.session.post(url, headers=headers, json=payload, timeout=timeout)
+                response.raise_for_status()
+                return response.json()
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, post)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Close the connection so the pool thread is released straight away
+            token.cancel()
+            raise
+
+    def _get_client(self):
+        """Get the aiohttp session for the running loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.closed or self._client_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self._client = aiohttp.ClientSession(connector=connector)
+            self._client_loop = loop
+        return self._client
+
+    async def close(self) -> None:
+        """Close the pooled connections."""
+        if self._client is not None and not self._client.closed:
+            await self._client.close()
+        self._client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _http_error(url: str, status: int, headers, body: bytes) -> requests.exceptions.HTTPError:
+    """Build the error requests would raise for an error response."""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(dict(headers))
+    response._content = body
+    response.url = url
+    return requests.exceptions.HTTPError(f"{status} Error for url: {url}", response=response)
@@ -49,6 +49,17 @@ API_ENDPOINT = "https://chat01.ai/v1/chat/completions"
 DEFAULT_MODEL = "gpt-4o"
 DEFAULT_TEMPERATURE = 0.1
 
+# OpenAI-compatible endpoints requests are routed between. Each entry has a
+# "name", a chat-completions "url" and the "models" it serves (the first is
+# used unless a model is pinned), plus an optional "api_key" of its own and
+# "gzip_requests": True for endpoints that accept gzip-encoded request bodies.
+API_ENDPOINTS = [
+    {"name": "chat01", "url": API_ENDPOINT, "models": [DEFAULT_MODEL]}
+]
+REQUEST_TIMEOUT = 60     # Seconds to wait on the network for a single attempt
+REQUEST_DEADLINE = 120   # Overall time budget for a request, including retries
+PROMPT_TOKEN_BUDGET = 3000  # Estimated tokens allowed per request, including the system prompt
+
 # UI Constants
 APP_TITLE = "Spring Test Sequence Generator"
 APP_VERSION = "1.0.0"
@@ -0,0 +1,272 @@
+"""
+Endpoint router module for the Spring Test App.
+Contains latency-aware selection between several OpenAI-compatible API endpoints.
+"""
+import random
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from utils.hedging import RollingLatency, LATENCY_WINDOW
+from utils.retry_policy import CircuitBreaker, get_circuit_breaker
+
+# Routing defaults
+ROUTER_LATENCY_PERCENTILE = 50   # Latency percentile used to rank endpoints
+ROUTER_ERROR_PENALTY = 4.0       # Score multiplier per unit of error rate
+ROUTER_MAX_ERROR_RATE = 0.5      # Endpoints failing more often than this are used last
+ROUTER_EXPLORE_RATIO = 0.05      # Share of requests sent to a random endpoint to refresh its latency
+
+
+class Endpoint:
+    """An OpenAI-compatible chat-completions endpoint and its recent performance."""
+
+    def __init__(self, name: str, url: str, models: Iterable[str],
+                 api_key: str = "",
+                 compress_requests: bool = False,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 window: int = LATENCY_WINDOW):
+        """Initialize the endpoint.
+
+        Args:
+            name: Name used in logs and statistics.
+            url: Chat-completions URL.
+            models: Models served by the endpoint; the first is used unless a model is pinned.
+            api_key: API key for this endpoint, or empty to use the client's key.
+            compress_requests: Whether the endpoint accepts gzip-encoded request bodies.
+            circuit_breaker: Breaker for the endpoint, or None to use the process-wide one for its URL.
+            window: Number of recent requests used for the latency and error rate.
+        """
+        self.name = name
+        self.url = url
+        self.models = list(models)
+        self.api_key = api_key
+        self.compress_requests = compress_requests
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(url)
+        self.latency = RollingLatency(window)
+        self.requests = 0
+        self._outcomes = deque(maxlen=window)  # True for each failed request
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "Endpoint":
+        """Create an endpoint from a configuration entry.
+
+        Args:
+            config: Dictionary with "url", "models" and optional "name", "api_key"
+                and "gzip_requests".
+
+        Returns:
+            The endpoint.
+        """
+        return cls(config.get("name") or config["url"], config["url"],
+                   config.get("models", []), config.get("api_key", ""),
+                   bool(config.get("gzip_requests", False)))
+
+    def serves(self, model: str) -> bool:
+        """Check whether the endpoint lists a model."""
+        return model in self.models
+
+    def model_for(self, model: Optional[str] = None) -> Optional[str]:
+        """Get the model to request from this endpoint.
+
+        Args:
+            model: Pinned model, or None for the endpoint's default model.
+        """
+        if model:
+            return model
+        return self.models[0] if self.models else None
+
+    @property
+    def error_rate(self) -> float:
+        """Share of recent requests that failed."""
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return sum(self._outcomes) / len(self._outcomes)
+
+    def score(self) -> float:
+        """Get the routing score; lower is better. Unmeasured endpoints score 0 so they get tried."""
+        latency = self.latency.percentile(ROUTER_LATENCY_PERCENTILE)
+        if latency is None:
+            return 0.0
+        return latency * (1.0 + ROUTER_ERROR_PENALTY * self.error_rate)
+
+    @property
+    def unreachable(self) -> bool:
+        """Whether the endpoint's circuit is open or its last request could not reach it."""
+        if self.circuit_breaker.retry_in() > 0.0:
+            return True
+        with self._lock:
+            return bool(self._outcomes) and self._outcomes[-1]
+
+    def record_success(self, seconds: float) -> None:
+        """Record a request that completed.
+
+        Args:
+            seconds: Time the request took.
+        """
+        self.latency.add(seconds)
+        self.circuit_breaker.record_success()
+        with self._lock:
+            self.requests += 1
+            self._outcomes.append(False)
+
+    def record_failure(self, endpoint_failure: bool = True) -> None:
+        """Record a failed request.
+
+        Args:
+            endpoint_failure: Whether the endpoint itself failed (connection error,
+                timeout or 5xx), as opposed to rejecting the request.
+        """
+        if endpoint_failure:
+            self.circuit_breaker.record_failure()
+        else:
+            # The endpoint answered, so it is up even though this request failed
+            self.circuit_breaker.record_success()
+        with self._lock:
+            self.requests += 1
+            self._outcomes.append(endpoint_failure)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get endpoint statistics."""
+        latency = self.latency.percentile(ROUTER_LATENCY_PERCENTILE)
+        return {
+            "name": self.name,
+            "url": self.url,
+            "models": list(self.models),
+            "requests": self.requests,
+            "p50_latency": latency,
+            "error_rate": self.error_rate,
+            "circuit": self.circuit_breaker.get_stats()["state"]
+        }
+
+
+class EndpointRouter:
+    """Sends each request to the fastest healthy endpoint and fails over to the others.
+
+    Endpoints are ranked by their rolling median latency, penalised by their
+    recent error rate. Endpoints whose circuit is open are skipped, and a
+    small share of requests goes to a random endpoint so the latency of
+    endpoints that are not currently preferred stays up to date.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], explore_ratio: float = ROUTER_EXPLORE_RATIO):
+        """Initialize the router.
+
+        Args:
+            endpoints: Endpoints to route between, in order of preference.
+            explore_ratio: Share of requests sent to a random endpoint.
+        """
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.endpoints = list(endpoints)
+        self.explore_ratio = explore_ratio
+        self.pinned_model = None
+
+    @classmethod
+    def from_config(cls, configs: List[Dict[str, Any]]) -> "EndpointRouter":
+        """Create a router from configuration entries such as API_ENDPOINTS.
+
+        Args:
+            configs: Endpoint configuration dictionaries.
+
+        Returns:
+            The router.
+        """
+        return cls([Endpoint.from_dict(config) for config in configs])
+
+    @property
+    def primary(self) -> Endpoint:
+        """The first configured endpoint."""
+        return self.endpoints[0]
+
+    def pin_model(self, model: Optional[str]) -> None:
+        """Pin a model for every request that does not ask for one.
+
+        Args:
+            model: Model to pin, or None to let each endpoint use its default model.
+        """
+        self.pinned_model = model
+
+    def select(self, model: Optional[str] = None,
+               exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """Choose the endpoint for the next attempt of a request.
+
+        Args:
+            model: Model the request needs, or None for any model. Endpoints
+                listing the model are preferred; if none do, any endpoint is used.
+            exclude: Endpoints already tried by this request; they are only
+                chosen again when no other endpoint is available.
+
+        Returns:
+            The endpoint, or None if every endpoint's circuit is open.
+        """
+        excluded = set(id(endpoint) for endpoint in exclude)
+        ranked = self._rank(model, excluded)
+        if not excluded and len(ranked) > 1 and random.random() < self.explore_ratio:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+
+        # Only ask the chosen endpoint's breaker, so half-open probes are not used up by the others
+        for endpoint in ranked:
+            if endpoint.circuit_breaker.allow_request():
+                return endpoint
+        return None
+
+    def preferred(self, model: Optional[str] = None) -> Endpoint:
+        """Get the endpoint a new request would most likely be sent to.
+
+        Unlike select, this does not explore and does not touch any breaker,
+        so it can be called without affecting routing.
+
+        Args:
+            model: Model the request needs, or None for any model.
+
+        Returns:
+            The best ranked endpoint accepting requests, or the best ranked
+            endpoint if none currently does.
+        """
+        ranked = self._rank(model, set())
+        for endpoint in ranked:
+            if endpoint.circuit_breaker.retry_in() == 0.0:
+                return endpoint
+        return ranked[0]
+
+    def _rank(self, model: Optional[str], excluded: Set[int]) -> List[Endpoint]:
+        """Rank the endpoints able to take a request, best first.
+
+        Args:
+            model: Model the request needs, or None for the pinned model.
+            excluded: ids of endpoints already tried; they are ranked last.
+        """
+        model = model or self.pinned_model
+        candidates = self.endpoints
+        if model and any(endpoint.serves(model) for endpoint in candidates):
+            candidates = [endpoint for endpoint in candidates if endpoint.serves(model)]
+
+        return sorted(candidates, key=lambda endpoint: (
+            id(endpoint) in excluded,
+            endpoint.error_rate > ROUTER_MAX_ERROR_RATE,
+            endpoint.score()
+        ))
+
+    def has_alternative(self, exclude: Iterable[Endpoint]) -> bool:
+        """Check whether an endpoint not yet tried by a request could take it.
+
+        Args:
+            exclude: Endpoints already tried.
+        """
+        excluded = set(id(endpoint) for endpoint in exclude)
+        return any(id(endpoint) not in excluded and endpoint.circuit_breaker.retry_in() == 0.0
+                   for endpoint in self.endpoints)
+
+    def is_unreachable(self) -> bool:
+        """Check whether no endpoint can currently be reached."""
+        return all(endpoint.unreachable for endpoint in self.endpoints)
+
+    def retry_in(self) -> float:
+        """Get the seconds until any endpoint accepts requests again."""
+        return min(endpoint.circuit_breaker.retry_in() for endpoint in self.endpoints)
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Get statistics for every endpoint."""
+        return [endpoint.get_stats() for endpoint in self.endpoints]
@@ -0,0 +1,162 @@
+"""
+Hedging module for the Spring Test App.
+Contains latency tracking and the policy for sending hedged API requests.
+"""
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Hedging defaults
+HEDGE_PERCENTILE = 90        # Hedge once a request is slower than this latency percentile
+HEDGE_MIN_DELAY = 2.0        # Never hedge earlier than this many seconds
+HEDGE_MIN_SAMPLES = 10       # Latency samples needed before hedging starts
+HEDGE_MAX_RATIO = 0.1        # At most one hedge per ten requests
+LATENCY_WINDOW = 100         # Number of recent latencies kept
+
+
+class RollingLatency:
+    """Latencies of the most recent requests."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """Initialize the latency window.
+
+        Args:
+            window: Number of recent samples to keep.
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        """Record a request latency.
+
+        Args:
+            seconds: Time from sending the request to receiving the response.
+        """
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Get a latency percentile.
+
+        Args:
+            percent: Percentile to compute (0-100).
+
+        Returns:
+            Latency in seconds, or None if there are no samples.
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percent / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+
+class RequestHedger:
+    """Policy for hedged requests.
+
+    If a request has not completed after the rolling latency percentile, a
+    second identical request is sent and the first response wins. The share
+    of requests that may be hedged is capped so the extra spend is bounded.
+    """
+
+    def __init__(self, enabled: bool = False,
+                 percentile: float = HEDGE_PERCENTILE,
+                 min_delay: float = HEDGE_MIN_DELAY,
+                 min_samples: int = HEDGE_MIN_SAMPLES,
+                 max_hedge_ratio: float = HEDGE_MAX_RATIO,
+                 window: int = LATENCY_WINDOW):
+        """Initialize the hedger.
+
+        Args:
+            enabled: Whether requests are hedged.
+            percentile: Latency percentile after which a request is hedged.
+            min_delay: Minimum time in seconds before a hedge is sent.
+            min_samples: Latency samples needed before hedging starts.
+            max_hedge_ratio: Maximum hedges sent per request.
+            window: Number of recent latencies kept.
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.latency = RollingLatency(window)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.hedges_skipped = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Get how long to wait for a response before hedging.
+
+        Returns:
+            Delay in seconds, or None if there are too few samples to hedge yet.
+        """
+        if len(self.latency) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    def record_request(self) -> None:
+        """Count a request that may be hedged."""
+        with self._lock:
+            self.requests += 1
+
+    def record_latency(self, seconds: float) -> None:
+        """Record the latency of a successful upstream request.
+
+        Args:
+            seconds: Time from sending the request to receiving the response.
+        """
+        self.latency.add(seconds)
+
+    def try_acquire_hedge(self) -> bool:
+        """Reserve a hedge if the spend cap allows it.
+
+        Returns:
+            True if a hedge may be sent.
+        """
+        with self._lock:
+            if self.hedges_sent + 1 > self.max_hedge_ratio * self.requests:
+                self.hedges_skipped += 1
+                return False
+            self.hedges_sent += 1
+            return True
+
+    def record_winner(self, hedge_won: bool) -> None:
+        """Record which request of a hedged pair answered first.
+
+        Args:
+            hedge_won: True if the hedge answered before the original request.
+        """
+        with self._lock:
+            if hedge_won:
+                self.hedge_wins += 1
+            else:
+                self.primary_wins += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedging statistics.
+
+        Returns:
+            Dictionary with request, hedge and win counts and current latencies.
+        """
+        with self._lock:
+            decided = self.hedge_wins + self.primary_wins
+            return {
+                "requests": self.requests,
+                "hedges_sent": self.hedges_sent,
+                "hedges_skipped": self.hedges_skipped,
+                "hedge_wins": self.hedge_wins,
+                "primary_wins": self.primary_wins,
+                "hedge_win_rate": self.hedge_wins / decided if decided else 0.0,
+                "p50_latency": self.latency.percentile(50),
+                "p90_latency": self.latency.percentile(90)
+            }
@@ -0,0 +1,96 @@
+"""
+Key validation module for the Spring Test App.
+Contains the cache of API key validity, fed by probes and by normal traffic.
+"""
+import hashlib
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Seconds a key's validity is trusted before it is checked again
+API_KEY_CACHE_TTL = 3600
+
+# Messages for known key states
+KEY_VALID_MESSAGE = "API key is valid"
+KEY_INVALID_MESSAGE = "Invalid API key"
+
+
+def key_hash(api_key: str) -> str:
+    """Get the hash a key is cached under; the key itself is not stored."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+class APIKeyCache:
+    """Thread-safe cache of whether API keys are valid.
+
+    Results come from validation probes and from the status codes of
+    ordinary requests: a completed request proves the key valid and a 401
+    proves it invalid, so a probe is only needed for keys that have not
+    been used recently.
+    """
+
+    def __init__(self, ttl: float = API_KEY_CACHE_TTL):
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds a result is trusted.
+        """
+        self.ttl = ttl
+        self.observations = 0  # Results learned from normal traffic
+        self._results: Dict[str, Tuple[bool, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str) -> Optional[Tuple[bool, str]]:
+        """Get the cached result for a key.
+
+        Args:
+            api_key: The API key.
+
+        Returns:
+            Tuple of (valid flag, message), or None if unknown or expired.
+        """
+        digest = key_hash(api_key)
+        with self._lock:
+            entry = self._results.get(digest)
+            if entry is None:
+                return None
+            valid, message, checked_at = entry
+            if time.monotonic() - checked_at > self.ttl:
+                del self._results[digest]
+                return None
+            return valid, message
+
+    def record(self, api_key: str, valid: bool, message: str) -> None:
+        """Store the result of checking a key.
+
+        Args:
+            api_key: The API key.
+            valid: Whether the key was accepted.
+            message: Message describing the result.
+        """
+        with self._lock:
+            self._results[key_hash(api_key)] = (valid, message, time.monotonic())
+
+    def observe(self, api_key: str, status_code: int) -> None:
+        """Learn a key's validity from the status code of a normal request.
+
+        Args:
+            api_key: Key the request was sent with.
+            status_code: HTTP status of the response. Codes that say nothing
+                about the key, such as 429 or 5xx, are ignored.
+        """
+        if not api_key:
+            return
+        if 200 <= status_code < 300:
+            self.record(api_key, True, KEY_VALID_MESSAGE)
+        elif status_code == 401:
+            self.record(api_key, False, KEY_INVALID_MESSAGE)
+        else:
+            return
+        with self._lock:
+            self.observations += 1
+
+    def clear(self) -> None:
+        """Forget all results."""
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,177 @@
+"""
+Metrics module for the Spring Test App.
+Contains per-request timing spans and the rotating metrics file writer.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+
+# Metrics file, in the logs directory of the application wherever it is started from
+METRICS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "metrics.jsonl")
+METRICS_MAX_BYTES = 1024 * 1024
+METRICS_BACKUP_COUNT = 5
+
+
+class RequestTrace:
+    """Timings of the phases of a single generation request.
+
+    Phases are recorded as named spans in seconds. A span recorded more than
+    once (for example the network time of several attempts) accumulates.
+    """
+
+    def __init__(self, name: str = "generation"):
+        """Initialize the trace.
+
+        Args:
+            name: Kind of request being traced.
+        """
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.spans = {}
+        self.attributes = {}
+        self.total = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a block of code as a named span.
+
+        Args:
+            name: Name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a named span.
+
+        Args:
+            name: Name of the phase.
+            seconds: Time spent in the phase.
+        """
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def set(self, name: str, seconds: float) -> None:
+        """Set a named span, replacing any earlier value.
+
+        Args:
+            name: Name of the phase.
+            seconds: Time spent in the phase.
+        """
+        with self._lock:
+            self.spans[name] = seconds
+
+    def elapsed(self) -> float:
+        """Get the time in seconds since the trace started."""
+        return time.perf_counter() - self._start
+
+    def finish(self) -> Dict[str, Any]:
+        """Stop the trace and get its timings.
+
+        Returns:
+            Dictionary of the trace timings.
+        """
+        if self.total is None:
+            self.total = self.elapsed()
+        return self.to_dict()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the trace to a dictionary with times in milliseconds."""
+        with self._lock:
+            spans = {name: round(seconds * 1000, 2) for name, seconds in self.spans.items()}
+            attributes = dict(self.attributes)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "total_ms": round((self.total if self.total is not None else self.elapsed()) * 1000, 2),
+            "spans_ms": spans,
+            "attributes": attributes
+        }
+
+
+class MetricsRecorder:
+    """Writes finished traces as JSON lines to a rotating metrics file."""
+
+    def __init__(self, file_path: str = METRICS_FILE,
+                 max_bytes: int = METRICS_MAX_BYTES,
+                 backup_count: int = METRICS_BACKUP_COUNT):
+        """Initialize the recorder.
+
+        Args:
+            file_path: Path of the metrics file.
+            max_bytes: Size at which the file is rotated.
+            backup_count: Number of rotated files to keep.
+        """
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.enabled = True
+        self._logger = None
+        self._lock = threading.Lock()
+
+    def _get_logger(self) -> logging.Logger:
+        """Create the file logger on first use."""
+        with self._lock:
+            if self._logger is None:
+                directory = os.path.dirname(self.file_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(self.file_path, maxBytes=self.max_bytes,
+                                              backupCount=self.backup_count, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger(f"metrics.{id(self)}")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False  # Keep metrics out of the application log
+                logger.addHandler(handler)
+                self._logger = logger
+            return self._logger
+
+    def record(self, timings: Dict[str, Any]) -> None:
+        """Append a trace's timings to the metrics file.
+
+        Args:
+            timings: Dictionary from RequestTrace.finish.
+        """
+        if not self.enabled:
+            return
+        try:
+            self._get_logger().info(json.dumps(timings))
+        except (IOError, OSError) as e:
+            logging.warning(f"Error writing metrics: {str(e)}")
+
+
+# Shared by every component in the process
+_metrics_recorder = MetricsRecorder()
+
+
+def get_metrics_recorder() -> MetricsRecorder:
+    """Get the process-wide metrics recorder."""
+    return _metrics_recorder
+
+
+@contextmanager
+def span(trace: Optional[RequestTrace], name: str):
+    """Time a block of code on a trace, if there is one.
+
+    Args:
+        trace: The trace to record on, or None.
+        name: Name of the phase.
+    """
+    if trace is None:
+        yield
+    else:
+        with trace.span(name):
+            yield
@@ -0,0 +1,157 @@
+"""
+Mock server module for the Spring Test App.
+Contains a local stand-in for the chat-completions endpoint, for offline testing and benchmarking.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Any, Optional
+
+from utils.constants import DEFAULT_MODEL
+
+# Sequence returned when no response text is configured
+DEFAULT_SEQUENCE = [
+    {"Row": "R00", "CMD": "ZF", "Description": "Zero Force", "Condition": "", "Unit": "", "Tolerance": "", "Speed rpm": ""},
+    {"Row": "R01", "CMD": "ZD", "Description": "Zero Displacement", "Condition": "", "Unit": "", "Tolerance": "", "Speed rpm": ""},
+    {"Row": "R02", "CMD": "TH", "Description": "Search Contact", "Condition": "10", "Unit": "N", "Tolerance": "", "Speed rpm": "10"},
+    {"Row": "R03", "CMD": "FL(P)", "Description": "Measure Free Length-Position", "Condition": "", "Unit": "mm", "Tolerance": "50(49,51)", "Speed rpm": ""},
+    {"Row": "R04", "CMD": "Mv(P)", "Description": "L1", "Condition": "40", "Unit": "mm", "Tolerance": "", "Speed rpm": "50"},
+    {"Row": "R05", "CMD": "Fr(P)", "Description": "Force @ Position", "Condition": "", "Unit": "N", "Tolerance": "100(90,110)", "Speed rpm": ""},
+    {"Row": "R06", "CMD": "Mv(P)", "Description": "Return", "Condition": "50", "Unit": "mm", "Tolerance": "", "Speed rpm": "200"},
+    {"Row": "R07", "CMD": "PMsg", "Description": "User Message", "Condition": "Test Completed", "Unit": "", "Tolerance": "", "Speed rpm": ""}
+]
+
+DEFAULT_RESPONSE_TEXT = (
+    "Here is the test sequence.\n---SEQUENCE_DATA_START---\n"
+    + json.dumps(DEFAULT_SEQUENCE)
+    + "\n---SEQUENCE_DATA_END---"
+)
+
+
+class _CompletionHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog large enough for load tests."""
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class MockCompletionServer:
+    """Local HTTP server that answers chat-completions requests with a canned response.
+
+    Supports plain JSON responses and server-sent event streams, with a
+    configurable latency, so the whole generation pipeline can be exercised
+    without network access.
+    """
+
+    def __init__(self, response_text: str = DEFAULT_RESPONSE_TEXT,
+                 latency: float = 0.0,
+                 chunk_size: int = 64,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 responder: Optional[Callable[[Dict[str, Any]], str]] = None):
+        """Initialize the server.
+
+        Args:
+            response_text: Completion text returned for every request.
+            latency: Seconds to wait before answering.
+            chunk_size: Characters per event when streaming.
+            host: Interface to listen on.
+            port: Port to listen on (0 picks a free port).
+            responder: Optional function mapping a request payload to completion text.
+        """
+        self.response_text = response_text
+        self.latency = latency
+        self.chunk_size = max(1, chunk_size)
+        self.responder = responder
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._server = _CompletionHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """URL of the chat-completions endpoint."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self) -> "MockCompletionServer":
+        """Start serving on a background thread.
+
+        Returns:
+            The server, so it can be started inline.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name="MockCompletionServer")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _completion_text(self, payload: Dict[str, Any]) -> str:
+        """Get the completion text for a request."""
+        with self._lock:
+            self.requests_served += 1
+        if self.responder:
+            return self.responder(payload)
+        return self.response_text
+
+    def _make_handler(self):
+        """Create the request handler class bound to this server."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self.send_error(400, "Invalid JSON")
+                    return
+
+                text = server._completion_text(payload)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if payload.get("stream"):
+                    self._send_stream(text, payload)
+                else:
+                    self._send_json(text, payload)
+
+            def _send_json(self, text, payload):
+                body = json.dumps({
+                    "id": "mock-completion",
+                    "object": "chat.completion",
+                    "model": payload.get("model", DEFAULT_MODEL),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": "stop"}]
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self, text, payload):
+                # HTTP/1.0 without a length: the stream ends when the connection closes
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for i in range(0, len(text), server.chunk_size):
+                    event = {"choices": [{"index": 0, "delta": {"content": text[i:i + server.chunk_size]}}]}
+                    self.wfile.write(b"data: " + json.dumps(event).encode("utf-8") + b"\n\n")
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output quiet
+
+        return Handler
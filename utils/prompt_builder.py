@@ -0,0 +1,271 @@
+"""
+Prompt builder module for the Spring Test App.
+Contains prompt assembly with duplicate-context removal and token accounting.
+"""
+import json
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from models.data_models import SpringSpecification
+from utils.text_parser import format_parameter_text
+from utils.response_parser import REQUIRED_COLUMNS
+
+# Rough characters per token for English text and JSON
+CHARS_PER_TOKEN = 4
+
+# Section priorities - lower priority context is trimmed first
+PRIORITY_REQUIRED = 100
+PRIORITY_PARAMETERS = 20
+PRIORITY_EXAMPLES = 15
+PRIORITY_CHAT_HISTORY = 10
+
+# Estimated tokens allowed for few-shot examples of validated sequences
+EXAMPLE_TOKEN_BUDGET = 900
+
+# Introduces the few-shot examples; rows are written as arrays to save tokens
+EXAMPLES_HEADER = (
+    "Validated sequences for similar springs, one row per line as "
+    f"[{', '.join(REQUIRED_COLUMNS)}]. Adapt them to my specification and answer in the required format:\n"
+)
+
+# Parameters that get their own section instead of the parameter list
+SECTION_PARAMETERS = ("prompt", "spring_specification", "Timestamp", "Test Type")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text.
+
+    Args:
+        text: The text to measure.
+
+    Returns:
+        Estimated token count.
+    """
+    if not text:
+        return 0
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+@dataclass
+class PromptSection:
+    """A named part of a prompt.
+
+    A section made of several items (such as chat history entries) is
+    trimmed one item at a time, oldest first, before it is dropped.
+    """
+    name: str
+    items: List[str]
+    priority: int = PRIORITY_REQUIRED
+    separator: str = "\n"
+    header: str = ""
+
+    @property
+    def required(self) -> bool:
+        """Whether the section is never trimmed."""
+        return self.priority >= PRIORITY_REQUIRED
+
+    @property
+    def text(self) -> str:
+        """The section text, or an empty string if it has no items."""
+        if not self.items:
+            return ""
+        return self.header + self.separator.join(self.items)
+
+    @property
+    def tokens(self) -> int:
+        """Estimated token count of the section."""
+        return estimate_tokens(self.text)
+
+
+@dataclass
+class BuiltPrompt:
+    """Result of assembling a prompt."""
+    text: str
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    trimmed: Dict[str, int] = field(default_factory=dict)  # Section name -> items removed
+    budget: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated token count of the whole prompt."""
+        return sum(self.section_tokens.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report to a dictionary."""
+        return {
+            "total_tokens": self.total_tokens,
+            "budget": self.budget,
+            "section_tokens": dict(self.section_tokens),
+            "trimmed": dict(self.trimmed)
+        }
+
+
+class PromptBuilder:
+    """Assembles a prompt from sections within a token budget."""
+
+    def __init__(self, token_budget: int, reserved_tokens: int = 0):
+        """Initialize the builder.
+
+        Args:
+            token_budget: Maximum estimated tokens for the whole request.
+            reserved_tokens: Tokens already used elsewhere, e.g. by the system prompt.
+        """
+        self.token_budget = token_budget
+        self.reserved_tokens = reserved_tokens
+        self.sections = []
+
+    def add_section(self, name: str, text: str, priority: int = PRIORITY_REQUIRED,
+                    header: str = "") -> None:
+        """Add a single-block section.
+
+        Args:
+            name: Section name used in the token report.
+            text: Section text. Empty sections are left out.
+            priority: Trim priority; PRIORITY_REQUIRED sections are never trimmed.
+            header: Optional text placed before the section.
+        """
+        text = (text or "").strip()
+        self.sections.append(PromptSection(name, [text] if text else [], priority, header=header))
+
+    def add_items(self, name: str, items: List[str], priority: int,
+                  header: str = "", separator: str = "\n") -> None:
+        """Add a section of items that can be trimmed one at a time, oldest first.
+
+        Args:
+            name: Section name used in the token report.
+            items: Items in chronological order.
+            priority: Trim priority.
+            header: Optional text placed before the items.
+            separator: Text between items.
+        """
+        items = [item.strip() for item in items if item and item.strip()]
+        self.sections.append(PromptSection(name, items, priority, separator, header))
+
+    def build(self) -> BuiltPrompt:
+        """Assemble the prompt, trimming the least useful context to fit the budget.
+
+        Returns:
+            The prompt text and its token report.
+        """
+        budget = self.token_budget - self.reserved_tokens
+        trimmed = {}
+
+        def total() -> int:
+            return sum(section.tokens for section in self.sections)
+
+        # Trim the lowest-priority sections first, item by item
+        for section in sorted(self.sections, key=lambda s: s.priority):
+            if total() <= budget:
+                break
+            if section.required:
+                continue
+            while section.items and total() > budget:
+                section.items.pop(0)
+                trimmed[section.name] = trimmed.get(section.name, 0) + 1
+
+        if total() > budget:
+            logging.warning(f"Prompt needs about {total()} tokens, over the budget of {budget}")
+
+        parts = [section.text for section in self.sections if section.text]
+        return BuiltPrompt(
+            text="\n\n".join(parts),
+            section_tokens={section.name: section.tokens for section in self.sections if section.text},
+            trimmed=trimmed,
+            budget=budget
+        )
+
+
+def strip_specification_text(prompt: str, specification: Optional[SpringSpecification]) -> str:
+    """Remove specification text that was pasted into a prompt.
+
+    Args:
+        prompt: The operator's prompt.
+        specification: The specification whose text may be in the prompt.
+
+    Returns:
+        The prompt without the specification text.
+    """
+    if specification is None:
+        return prompt.strip()
+    return prompt.replace(specification.to_prompt_text(), "").strip()
+
+
+def specification_text(spec_data: Dict[str, Any]) -> str:
+    """Format the spring specification stored in the parameters.
+
+    Args:
+        spec_data: The "spring_specification" parameter.
+
+    Returns:
+        Specification text, followed by the recommended speeds if present.
+    """
+    text = SpringSpecification.from_dict(spec_data).to_prompt_text().strip()
+    speeds = spec_data.get("optimal_speeds")
+    if speeds:
+        speed_text = ", ".join(f"{name}: {value}" for name, value in speeds.items())
+        text += f"\nRecommended speeds (rpm): {speed_text}"
+    return text
+
+
+def parameter_lines(parameters: Dict[str, Any], exclude_text: str = "") -> str:
+    """Format the extracted parameters that are not covered by other sections.
+
+    Args:
+        parameters: Dictionary of spring parameters.
+        exclude_text: Text already in the prompt; parameter lines found in it are left out.
+
+    Returns:
+        Parameter text, one parameter per line.
+    """
+    extra = {key: value for key, value in parameters.items() if key not in SECTION_PARAMETERS}
+    lines = format_parameter_text(extra).splitlines()
+    return "\n".join(line for line in lines if line.strip() and line not in exclude_text)
+
+
+def format_sequence_example(request: str, specification: SpringSpecification,
+                            rows: List[Dict[str, Any]]) -> str:
+    """Format a validated sequence compactly as a few-shot example.
+
+    Args:
+        request: The request the sequence was generated for.
+        specification: The specification it was validated against.
+        rows: Sequence rows.
+
+    Returns:
+        The request, a one-line specification summary and one line per row.
+    """
+    unit = specification.unit
+    set_points = ", ".join(f"{sp.position_mm:g} {unit} @ {sp.load_n:g} N"
+                           for sp in specification.set_points if sp.enabled)
+    lines = [
+        f"Request: {request}",
+        f"Spring: free length {specification.free_length_mm:g} {unit}, wire {specification.wire_dia_mm:g} {unit}, "
+        f"OD {specification.outer_dia_mm:g} {unit}, {specification.coil_count:g} coils, "
+        f"safety limit {specification.safety_limit_n:g} N, set points {set_points}"
+    ]
+    lines.extend(json.dumps([row.get(column, "") for column in REQUIRED_COLUMNS], separators=(",", ":"))
+                 for row in rows)
+    return "\n".join(lines)
+
+
+def fit_examples(examples: List[str], token_budget: int) -> List[str]:
+    """Keep the leading examples that fit in a token budget.
+
+    Args:
+        examples: Formatted examples, most useful first.
+        token_budget: Estimated tokens allowed for all of them.
+
+    Returns:
+        The examples that fit, most useful first.
+    """
+    fitted = []
+    used = 0
+    for example in examples:
+        tokens = estimate_tokens(example)
+        if used + tokens > token_budget:
+            break
+        fitted.append(example)
+        used += tokens
+    return fitted
@@ -0,0 +1,230 @@
+"""
+Replay module for the Spring Test App.
+Contains transports that record API exchanges to cassette files and replay them offline.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from utils.transport import CancellableHTTPAdapter, current_cancel_token
+
+# Response headers never written to a cassette - secrets, and framing that no longer
+# matches once the body has been decoded
+SKIPPED_HEADERS = {"cookie", "set-cookie", "content-encoding", "content-length", "transfer-encoding"}
+
+
+def request_fingerprint(method: str, url: str, body: Optional[bytes]) -> str:
+    """Get a key identifying a request by its method, URL path and canonical JSON body.
+
+    The host is left out so recordings replay against any endpoint address.
+
+    Args:
+        method: HTTP method.
+        url: Request URL.
+        body: Raw request body.
+
+    Returns:
+        Hex digest identifying the request.
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        canonical = json.dumps(json.loads(body or b"null"), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        canonical = (body or b"").decode("utf-8", "replace")
+    path = urlparse(url).path
+    return hashlib.sha256(f"{method.upper()} {path}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded request/response pairs stored as JSON lines."""
+
+    def __init__(self, file_path: str):
+        """Initialize the cassette, loading any existing recordings.
+
+        Args:
+            file_path: Path of the cassette file.
+        """
+        self.file_path = file_path
+        self.entries = []
+        self._by_key = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        """Load the recordings from the cassette file."""
+        with self._lock:
+            self.entries = []
+            self._by_key = {}
+            if not os.path.exists(self.file_path):
+                return
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._add(json.loads(line))
+                    except ValueError:
+                        continue
+
+    def _add(self, entry: Dict[str, Any]) -> None:
+        """Index an entry. Must be called with the lock held."""
+        self.entries.append(entry)
+        self._by_key.setdefault(entry["key"], []).append(entry)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Add a recording and append it to the cassette file.
+
+        Args:
+            entry: Recording with key, request and response fields.
+        """
+        with self._lock:
+            self._add(entry)
+            directory = os.path.dirname(self.file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def find(self, key: str, index: int = 0) -> Optional[Dict[str, Any]]:
+        """Find the recording for a request.
+
+        Args:
+            key: Request fingerprint.
+            index: Which recording to return when the request was recorded several times.
+
+        Returns:
+            The recording, or None if the request was never recorded.
+        """
+        with self._lock:
+            matches = self._by_key.get(key)
+            if not matches:
+                return None
+            return matches[index % len(matches)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.entries)
+
+
+class RecordingAdapter(CancellableHTTPAdapter):
+    """Transport that sends requests normally and records each exchange to a cassette."""
+
+    def __init__(self, cassette: Cassette, *args, **kwargs):
+        """Initialize the adapter.
+
+        Args:
+            cassette: Cassette to record to.
+        """
+        super().__init__(*args, **kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        start_time = time.perf_counter()
+        response = super().send(request, **kwargs)
+
+        # Reading the body here means streamed responses are delivered in one go while recording
+        content = response.content
+        latency = time.perf_counter() - start_time
+
+        self.cassette.append({
+            "key": request_fingerprint(request.method, request.url, request.body),
+            "recorded_at": time.time(),
+            "request": {
+                "method": request.method,
+                "url": request.url,
+                "body": _decode_body(request.body)
+            },
+            "response": {
+                "status_code": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() not in SKIPPED_HEADERS},
+                "body": content.decode("utf-8", "replace"),
+                "latency": latency
+            }
+        })
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport that answers requests from a cassette without touching the network."""
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0, strict: bool = True):
+        """Initialize the adapter.
+
+        Args:
+            cassette: Cassette to replay from.
+            latency_scale: Multiplier for the recorded latencies (0 replays instantly).
+            strict: Fail requests that were never recorded. Otherwise recordings
+                are replayed in order regardless of the request.
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self._counts = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_fingerprint(request.method, request.url, request.body)
+        with self._lock:
+            index = self._counts.get(key, 0)
+            self._counts[key] = index + 1
+            entry = self.cassette.find(key, index)
+            if entry is None and not self.strict and len(self.cassette):
+                entry = self.cassette.entries[self._next % len(self.cassette)]
+                self._next += 1
+
+        if entry is None:
+            raise requests.exceptions.ConnectionError(
+                f"No recorded response for {request.method} {request.url}", request=request
+            )
+
+        recorded = entry["response"]
+        delay = recorded.get("latency", 0.0) * self.latency_scale
+        if delay > 0:
+            token = current_cancel_token()
+            if token is not None:
+                if token.wait(delay):
+                    raise requests.exceptions.ConnectionError("Request cancelled", request=request)
+            else:
+                time.sleep(delay)
+
+        return _build_response(request, recorded, delay)
+
+
+def _decode_body(body) -> str:
+    """Get a request body as text."""
+    if body is None:
+        return ""
+    if isinstance(body, bytes):
+        return body.decode("utf-8", "replace")
+    return str(body)
+
+
+def _build_response(request, recorded: Dict[str, Any], elapsed: float) -> requests.Response:
+    """Build a response object from a recording."""
+    content = recorded.get("body", "").encode("utf-8")
+    response = requests.Response()
+    response.status_code = recorded.get("status_code", 200)
+    response.headers = CaseInsensitiveDict(recorded.get("headers", {}))
+    response._content = content
+    response.raw = io.BytesIO(content)
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.reason = "OK" if response.status_code < 400 else "Error"
+    response.elapsed = timedelta(seconds=elapsed)
+    return response
+
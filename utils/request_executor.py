@@ -0,0 +1,239 @@
+"""
+Request executor module for the Spring Test App.
+Contains a bounded worker pool with a priority queue for API requests.
+"""
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Request priorities - lower values run first
+PRIORITY_INTERACTIVE = 0   # Chat requests an operator is waiting on
+PRIORITY_CANDIDATE = 1     # Parallel candidates for an interactive request; they never supersede each other
+PRIORITY_BATCH = 10        # Batch jobs that can wait for interactive work
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_FINISHED = "finished"
+JOB_CANCELLED = "cancelled"
+
+
+class JobHandle:
+    """Handle for a job submitted to the request executor."""
+
+    def __init__(self, priority: int, on_cancel: Optional[Callable[[], None]] = None):
+        """Initialize the job handle.
+
+        Args:
+            priority: Job priority (lower runs first).
+            on_cancel: Optional function to call when a running job is cancelled.
+        """
+        self.priority = priority
+        self.state = JOB_QUEUED
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._on_cancel = on_cancel
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def cancel(self) -> bool:
+        """Cancel the job.
+
+        A queued job is dropped before it starts. A running job is asked to
+        stop through its cancel callback.
+
+        Returns:
+            True if the job was cancelled, False if it had already finished.
+        """
+        with self._lock:
+            if self.state in (JOB_FINISHED, JOB_CANCELLED):
+                return False
+            was_running = self.state == JOB_RUNNING
+            self.state = JOB_CANCELLED
+            if self.finished_at is None:
+                self.finished_at = time.monotonic()
+
+        if was_running and self._on_cancel:
+            try:
+                self._on_cancel()
+            except Exception as e:
+                logging.warning(f"Error cancelling job: {str(e)}")
+
+        self._done.set()
+        return True
+
+    def is_cancelled(self) -> bool:
+        """Check whether the job has been cancelled."""
+        return self.state == JOB_CANCELLED
+
+    def is_done(self) -> bool:
+        """Check whether the job has finished or been cancelled."""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the job to finish or be cancelled.
+
+        Args:
+            timeout: Maximum time to wait in seconds, or None to wait forever.
+
+        Returns:
+            True if the job is done.
+        """
+        return self._done.wait(timeout)
+
+    @property
+    def queue_wait_time(self) -> float:
+        """Time in seconds the job spent waiting in the queue."""
+        end = self.started_at or self.finished_at or time.monotonic()
+        return end - self.submitted_at
+
+    @property
+    def run_time(self) -> float:
+        """Time in seconds the job has been running (0 if it never started)."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def _mark_running(self) -> bool:
+        """Move the job to the running state. Returns False if it was cancelled."""
+        with self._lock:
+            if self.state != JOB_QUEUED:
+                return False
+            self.state = JOB_RUNNING
+            self.started_at = time.monotonic()
+            return True
+
+    def _mark_finished(self) -> None:
+        """Move the job to the finished state."""
+        with self._lock:
+            if self.state == JOB_RUNNING:
+                self.state = JOB_FINISHED
+            if self.finished_at is None:
+                self.finished_at = time.monotonic()
+        self._done.set()
+
+
+class RequestExecutor:
+    """Bounded pool of worker threads serving a priority queue of jobs."""
+
+    def __init__(self, max_workers: int = 4):
+        """Initialize the executor.
+
+        Args:
+            max_workers: Maximum number of jobs running at the same time.
+        """
+        self.max_workers = max(1, max_workers)
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()  # Keeps FIFO order within a priority
+        self._threads = []
+        self._lock = threading.Lock()
+        self._running = 0
+        self._shutdown = False
+
+    def submit(self, fn: Callable[[], Any], priority: int = PRIORITY_INTERACTIVE,
+               on_cancel: Optional[Callable[[], None]] = None) -> JobHandle:
+        """Queue a job.
+
+        Args:
+            fn: Function to run on a worker thread.
+            priority: Job priority (lower runs first).
+            on_cancel: Optional function to call when the job is cancelled while running.
+
+        Returns:
+            Handle for the queued job.
+        """
+        if self._shutdown:
+            raise RuntimeError("Executor has been shut down")
+
+        handle = JobHandle(priority, on_cancel)
+        self._queue.put((priority, next(self._sequence), handle, fn))
+        self._ensure_workers()
+        return handle
+
+    def _ensure_workers(self) -> None:
+        """Start worker threads on demand, up to max_workers."""
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._worker_loop, daemon=True,
+                                          name=f"RequestExecutor-{len(self._threads)}")
+                self._threads.append(thread)
+                thread.start()
+
+    def _worker_loop(self) -> None:
+        """Take jobs from the queue and run them."""
+        while True:
+            _, _, handle, fn = self._queue.get()
+            if handle is None:  # Shutdown sentinel
+                return
+
+            # Jobs cancelled while queued are dropped
+            if not handle._mark_running():
+                continue
+
+            with self._lock:
+                self._running += 1
+            try:
+                fn()
+            except Exception as e:
+                logging.error(f"Error in request job: {str(e)}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+                handle._mark_finished()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get executor statistics.
+
+        Returns:
+            Dictionary with worker, running and queued job counts.
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "workers": len(self._threads),
+                "running": self._running,
+                "queued": self._queue.qsize()
+            }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads once the queued jobs have run."""
+        self._shutdown = True
+        with self._lock:
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put((float("inf"), next(self._sequence), None, None))
+
+
+class RateLimiter:
+    """Token bucket that limits how often requests may start."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Initialize the rate limiter.
+
+        Args:
+            rate: Average number of requests allowed per second.
+            burst: Number of requests that may start back to back.
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may start."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
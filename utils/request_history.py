@@ -0,0 +1,173 @@
+"""
+Request history module for the Spring Test App.
+Contains a bounded in-memory log of API requests that can spill to a compressed file.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Default number of requests kept in memory
+REQUEST_HISTORY_SIZE = 50
+
+# Spill file size at which it is rotated
+SPILL_MAX_BYTES = 10 * 1024 * 1024
+
+
+class RequestHistory:
+    """Ring buffer of recent API requests, kept for debugging.
+
+    System prompts are stored once by hash instead of in every entry. When
+    a spill file is configured, entries that fall out of the buffer are
+    appended to it as gzip-compressed JSON lines.
+    """
+
+    def __init__(self, max_entries: int = REQUEST_HISTORY_SIZE,
+                 spill_path: Optional[str] = None,
+                 spill_max_bytes: int = SPILL_MAX_BYTES):
+        """Initialize the request history.
+
+        Args:
+            max_entries: Number of requests kept in memory.
+            spill_path: Optional gzip file that evicted requests are appended to.
+            spill_max_bytes: Size at which the spill file is rotated to a single backup.
+        """
+        self.max_entries = max(1, max_entries)
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self.system_prompts = {}  # Hash -> system prompt text
+        self._entries = deque()
+        self._spilled_prompts = set()  # Hashes already written to the current spill file
+        self._lock = threading.Lock()
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Record a request.
+
+        Args:
+            entry: Dictionary with a "timestamp" and the request "payload".
+        """
+        compact = dict(entry)
+        payload = entry.get("payload")
+        if payload:
+            compact["payload"] = self._compact_payload(payload)
+
+        with self._lock:
+            self._entries.append(compact)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popleft())
+            if evicted and self.spill_path:
+                self._spill(evicted)
+
+    def _compact_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace system prompts in a payload by their hash."""
+        messages = []
+        for message in payload.get("messages", []):
+            if message.get("role") == "system":
+                content = message.get("content", "")
+                prompt_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+                with self._lock:
+                    self.system_prompts.setdefault(prompt_hash, content)
+                messages.append({"role": "system", "content_hash": prompt_hash})
+            else:
+                messages.append(message)
+        return dict(payload, messages=messages)
+
+    def _expand_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Restore the system prompts in a compacted payload."""
+        messages = []
+        for message in payload.get("messages", []):
+            if "content_hash" in message:
+                content = self.system_prompts.get(message["content_hash"], "")
+                messages.append({"role": message["role"], "content": content})
+            else:
+                messages.append(message)
+        return dict(payload, messages=messages)
+
+    def _spill(self, entries: List[Dict[str, Any]]) -> None:
+        """Append evicted entries to the spill file. Must be called with the lock held."""
+        try:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            if os.path.exists(self.spill_path) and os.path.getsize(self.spill_path) >= self.spill_max_bytes:
+                os.replace(self.spill_path, self.spill_path + ".1")
+                self._spilled_prompts.clear()
+
+            lines = []
+            for entry in entries:
+                # Each system prompt is written once per file, ahead of the first entry using it
+                for message in entry.get("payload", {}).get("messages", []):
+                    prompt_hash = message.get("content_hash")
+                    if prompt_hash and prompt_hash not in self._spilled_prompts:
+                        lines.append(json.dumps({"system_prompt": prompt_hash,
+                                                 "content": self.system_prompts.get(prompt_hash, "")}))
+                        self._spilled_prompts.add(prompt_hash)
+                lines.append(json.dumps(entry))
+
+            with gzip.open(self.spill_path, "at", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except (IOError, OSError, TypeError) as e:
+            # Debug history must never break a request
+            logging.warning(f"Error spilling request history: {str(e)}")
+
+    def _read_spilled(self) -> List[Dict[str, Any]]:
+        """Read the entries in the spill file, oldest first."""
+        entries = []
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return entries
+
+        try:
+            with gzip.open(self.spill_path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "system_prompt" in record:
+                        self.system_prompts.setdefault(record["system_prompt"], record["content"])
+                    else:
+                        entries.append(record)
+        except (IOError, OSError, EOFError):
+            pass  # A truncated file still yields the entries read so far
+        return entries
+
+    def last(self, count: int = 10, include_spilled: bool = False) -> List[Dict[str, Any]]:
+        """Get the most recent requests, with their system prompts restored.
+
+        Args:
+            count: Number of requests to return.
+            include_spilled: Read older requests from the spill file when the
+                buffer holds fewer than count.
+
+        Returns:
+            Requests in chronological order.
+        """
+        with self._lock:
+            entries = list(self._entries)[-count:] if count > 0 else []
+            missing = count - len(entries)
+            if include_spilled and missing > 0:
+                entries = self._read_spilled()[-missing:] + entries
+
+        return [dict(entry, payload=self._expand_payload(entry["payload"])) if "payload" in entry else entry
+                for entry in entries]
+
+    def clear(self) -> None:
+        """Remove the requests kept in memory."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.last(len(self)))
+
+    def __getitem__(self, index):
+        return self.last(len(self))[index]
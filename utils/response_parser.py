@@ -0,0 +1,146 @@
+"""
+Response parser module for the Spring Test App.
+Contains parsing of completion text into chat text and normalized sequence rows.
+"""
+import copy
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from utils.metrics import span
+from utils.text_parser import standardize_sequence_data
+
+# Markers separating conversational text from sequence data in hybrid responses
+SEQUENCE_DATA_START = "---SEQUENCE_DATA_START---"
+SEQUENCE_DATA_END = "---SEQUENCE_DATA_END---"
+
+# Columns every sequence row must have, in display order
+REQUIRED_COLUMNS = ["Row", "CMD", "Description", "Condition", "Unit", "Tolerance", "Speed rpm"]
+
+# Row marker used when a response is stored as a flat list of records
+CHAT_ROW = "CHAT"
+
+
+@dataclass
+class ParsedResponse:
+    """A completion split into conversational text and sequence rows."""
+    chat_text: str = ""
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    parse_error: str = ""  # Why sequence data in the response could not be read
+
+    @property
+    def has_sequence(self) -> bool:
+        """Whether the response contains sequence rows."""
+        return bool(self.rows)
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the response has neither chat text nor sequence rows."""
+        return not self.chat_text and not self.rows
+
+    def copy(self) -> "ParsedResponse":
+        """Get a copy that can be modified independently."""
+        return ParsedResponse(self.chat_text, copy.deepcopy(self.rows), self.parse_error)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert the response to a flat list of rows.
+
+        Returns:
+            The sequence rows, preceded by a CHAT row holding the chat text if any.
+        """
+        records = []
+        if self.chat_text:
+            chat_row = {col: "" for col in REQUIRED_COLUMNS}
+            chat_row.update({"Row": CHAT_ROW, "CMD": CHAT_ROW, "Description": self.chat_text})
+            records.append(chat_row)
+        records.extend(dict(row) for row in self.rows)
+        return records
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "ParsedResponse":
+        """Create a response from a list of rows made by to_records.
+
+        Args:
+            records: Rows, optionally including a CHAT row.
+
+        Returns:
+            The parsed response.
+        """
+        response = cls()
+        for record in records:
+            if record.get("Row") == CHAT_ROW:
+                response.chat_text = record.get("Description", "")
+            else:
+                response.rows.append(dict(record))
+        return response
+
+
+def normalize_rows(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Normalize parsed sequence rows to the required columns.
+
+    Args:
+        data: Rows parsed from the response JSON.
+
+    Returns:
+        Standardized rows with exactly the required columns, in order.
+    """
+    return [{col: row.get(col, "") for col in REQUIRED_COLUMNS}
+            for row in standardize_sequence_data(data)]
+
+
+def _sequence_rows(json_text: str, trace=None) -> List[Dict[str, Any]]:
+    """Parse a JSON array of sequence rows.
+
+    Raises:
+        ValueError: If the text is not a JSON array of objects.
+    """
+    with span(trace, "json_parse"):
+        data = json.loads(json_text)
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError("Sequence data is not a list of rows")
+    with span(trace, "rows_build"):
+        return normalize_rows(data)
+
+
+def parse_response_text(response_text: str, trace=None) -> ParsedResponse:
+    """Split completion text into chat text and sequence rows.
+
+    Handles hybrid responses with marked sequence data, bare JSON arrays,
+    and plain conversation.
+
+    Args:
+        response_text: The raw completion text.
+        trace: Optional trace to record the parse phases on.
+
+    Returns:
+        The parsed response. Text that cannot be read as sequence data is
+        returned as chat text.
+    """
+    # Clean up response text - remove markdown backticks if present
+    response_text = response_text.replace("```json", "").replace("```", "").strip()
+
+    # Hybrid response with both text and sequence data
+    if SEQUENCE_DATA_START in response_text and SEQUENCE_DATA_END in response_text:
+        conversation_text, _, rest = response_text.partition(SEQUENCE_DATA_START)
+        sequence_json_text, _, trailing_text = rest.partition(SEQUENCE_DATA_END)
+        conversation_text = conversation_text.strip()
+
+        # Text after the sequence data belongs to the conversation too
+        if trailing_text.strip():
+            conversation_text += "\n\n" + trailing_text.strip()
+
+        try:
+            rows = _sequence_rows(sequence_json_text.strip(), trace)
+        except ValueError as e:  # Includes json.JSONDecodeError
+            return ParsedResponse(chat_text=response_text, parse_error=str(e))
+        return ParsedResponse(chat_text=conversation_text, rows=rows)
+
+    # Sequence data without conversation
+    if response_text.startswith("[") and response_text.endswith("]"):
+        try:
+            return ParsedResponse(rows=_sequence_rows(response_text, trace))
+        except ValueError:
+            return ParsedResponse(chat_text=response_text)
+
+    # No sequence data - this was a conversational response
+    return ParsedResponse(chat_text=response_text)
@@ -0,0 +1,240 @@
+"""
+Retry policy module for the Spring Test App.
+Contains the retry backoff policy and the circuit breaker for API requests.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import requests
+
+# Retry defaults
+RETRY_BASE_DELAY = 1.0       # Smallest wait between attempts, in seconds
+RETRY_MAX_DELAY = 30.0       # Largest wait between attempts, in seconds
+RETRY_AFTER_LIMIT = 120.0    # Longest Retry-After we are willing to honour, in seconds
+
+# HTTP status codes worth retrying
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Circuit breaker defaults
+BREAKER_FAILURE_THRESHOLD = 5   # Consecutive endpoint failures before the circuit opens
+BREAKER_RESET_TIMEOUT = 30.0    # Seconds the circuit stays open before a probe is allowed
+
+# Circuit breaker states
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """Get the HTTP status code of a failed request, if it got a response."""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """Get the wait requested by a Retry-After header.
+
+    Args:
+        error: Exception raised by the failed request.
+
+    Returns:
+        Delay in seconds, or None if the response has no usable header.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # HTTP date form
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """Check whether an error means the endpoint itself is failing.
+
+    Connection errors, timeouts and 5xx responses count. Client errors such
+    as an invalid key or a rate limit do not.
+    """
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    status_code = get_status_code(error)
+    return status_code is not None and status_code >= 500
+
+
+class RetryPolicy:
+    """Retry policy with decorrelated jitter backoff and Retry-After support."""
+
+    def __init__(self, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY,
+                 retry_after_limit: float = RETRY_AFTER_LIMIT):
+        """Initialize the retry policy.
+
+        Args:
+            base_delay: Smallest wait between attempts in seconds.
+            max_delay: Largest backoff wait in seconds.
+            retry_after_limit: Longest Retry-After wait to honour in seconds.
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_after_limit = retry_after_limit
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Check whether a failed request is worth retrying.
+
+        Args:
+            error: Exception raised by the failed request.
+
+        Returns:
+            True for connection errors, timeouts and retryable status codes.
+        """
+        status_code = get_status_code(error)
+        if status_code is not None:
+            return status_code in RETRYABLE_STATUS_CODES
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    def next_delay(self, error: Exception, previous_delay: float = 0.0) -> Optional[float]:
+        """Get how long to wait before the next attempt.
+
+        Args:
+            error: Exception raised by the failed request.
+            previous_delay: Wait before the failed attempt (0 for the first attempt).
+
+        Returns:
+            Delay in seconds, or None if the request should not be retried.
+        """
+        if not self.is_retryable(error):
+            return None
+
+        retry_after = parse_retry_after(error)
+        if retry_after is not None:
+            if retry_after > self.retry_after_limit:
+                return None
+            return retry_after
+
+        # Decorrelated jitter: random between the base and three times the last wait
+        upper = max(self.base_delay, previous_delay * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+
+class CircuitBreaker:
+    """Process-wide circuit breaker for the API endpoint.
+
+    After a run of consecutive endpoint failures the circuit opens and
+    requests fail fast. Once the reset timeout has passed a single probe
+    request is let through (half-open); its outcome closes the circuit or
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        """Initialize the circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit.
+            reset_timeout: Seconds to stay open before probing the endpoint.
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = None
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent now.
+
+        Returns:
+            True if the request may go ahead (possibly as the half-open probe).
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == CIRCUIT_CLOSED:
+                return True
+
+            if self.state == CIRCUIT_OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = CIRCUIT_HALF_OPEN
+                self.probe_started_at = None
+
+            if self.state == CIRCUIT_HALF_OPEN:
+                # One probe at a time; a probe that never reported back is replaced
+                if self.probe_started_at is None or now - self.probe_started_at >= self.reset_timeout:
+                    self.probe_started_at = now
+                    return True
+
+            self.rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        """Get the seconds until the open circuit allows a probe."""
+        with self._lock:
+            if self.state != CIRCUIT_OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        """Record a request that reached the endpoint, closing the circuit."""
+        with self._lock:
+            self.state = CIRCUIT_CLOSED
+            self.consecutive_failures = 0
+            self.probe_started_at = None
+
+    def record_failure(self) -> None:
+        """Record an endpoint failure, opening the circuit if needed."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == CIRCUIT_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = CIRCUIT_OPEN
+                self.opened_at = time.monotonic()
+                self.probe_started_at = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get circuit breaker statistics.
+
+        Returns:
+            Dictionary with the state, failure count and rejected request count.
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "rejected": self.rejected
+            }
+
+
+# Shared by every API client in the process, one per endpoint URL
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(endpoint: str = "") -> CircuitBreaker:
+    """Get the process-wide circuit breaker for an API endpoint.
+
+    Args:
+        endpoint: Endpoint URL, or empty for the default endpoint.
+
+    Returns:
+        The circuit breaker shared by every client using the endpoint.
+    """
+    with _circuit_breakers_lock:
+        if endpoint not in _circuit_breakers:
+            _circuit_breakers[endpoint] = CircuitBreaker()
+        return _circuit_breakers[endpoint]
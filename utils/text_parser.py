@@ -222,12 +222,11 @@ def standardize_sequence_data(data):
             cmd = std_row["CMD"]
             current_desc = std_row.get("Description", "")
             
-            # Special case for Mv(P) with "L1" or "L2" in description
+            # Special case for Mv(P) with a set point ("L1", "L2", ...) in description
             if cmd == "Mv(P)" and current_desc:
-                if "L1" in current_desc:
-                    std_row["Description"] = "L1"
-                elif "L2" in current_desc:
-                    std_row["Description"] = "L2"
+                set_point = re.search(r'\bL(\d+)\b', str(current_desc))
+                if set_point:
+                    std_row["Description"] = f"L{set_point.group(1)}"
                 else:
                     std_row["Description"] = description_map.get(cmd, current_desc)
             else:
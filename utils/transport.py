@@ -0,0 +1,305 @@
+"""
+Transport module for the Spring Test App.
+Contains HTTP transport helpers for cancelling in-flight API requests,
+keeping connections warm and compressing request bodies.
+"""
+import gzip
+import json
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Cancellation token bound to the current thread while a request is in flight
+_local = threading.local()
+
+# Pooled connections per request worker; a hedged request uses a second one
+POOL_CONNECTIONS_PER_WORKER = 2
+
+# Request bodies at least this large are gzipped for endpoints that accept it
+GZIP_MIN_BYTES = 2048
+
+# Connection warm-up
+WARMUP_TIMEOUT = 5           # Seconds allowed for a warm-up request
+WARMUP_IDLE_INTERVAL = 45    # Idle seconds after which connections are warmed again
+WARMUP_ACTIVE_WINDOW = 600   # Stop re-warming once no request has been sent for this many seconds
+
+
+class CancelToken:
+    """Cancellation token for a single API request.
+
+    Connections checked out while the token is bound to a thread are tracked,
+    so cancelling the token can shut their sockets down and unblock a request
+    that is waiting on the network.
+    """
+
+    def __init__(self):
+        """Initialize the token."""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._children = []
+
+    def cancel(self) -> None:
+        """Cancel the request, its child tokens and its connections."""
+        self._event.set()
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+            children = list(self._children)
+        for conn in connections:
+            _abort_connection(conn)
+        for child in children:
+            child.cancel()
+
+    def child(self) -> "CancelToken":
+        """Create a token that is cancelled along with this one.
+
+        Used when a request fans out into several connections that can also
+        be cancelled on their own.
+
+        Returns:
+            The child token.
+        """
+        token = CancelToken()
+        with self._lock:
+            if not self._event.is_set():
+                self._children.append(token)
+                return token
+        token.cancel()
+        return token
+
+    def is_cancelled(self) -> bool:
+        """Check whether the token has been cancelled."""
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep for up to timeout seconds, waking early on cancellation.
+
+        Args:
+            timeout: Maximum time to sleep in seconds.
+
+        Returns:
+            True if the token was cancelled during the wait.
+        """
+        return self._event.wait(max(0.0, timeout))
+
+    def attach(self, conn) -> None:
+        """Track a connection used by the request."""
+        with self._lock:
+            if not self._event.is_set():
+                self._connections.add(conn)
+                return
+        # Cancelled before the connection was handed out
+        _abort_connection(conn)
+
+    def detach(self, conn) -> None:
+        """Stop tracking a connection returned to the pool."""
+        with self._lock:
+            self._connections.discard(conn)
+
+
+def _abort_connection(conn) -> None:
+    """Shut down a connection's socket so blocked reads return immediately."""
+    sock = getattr(conn, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def current_cancel_token() -> Optional[CancelToken]:
+    """Get the cancellation token bound to the current thread, if any."""
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def cancellation_scope(token: CancelToken):
+    """Bind a cancellation token to the current thread for the duration of a request.
+
+    Args:
+        token: The token to bind.
+    """
+    previous = current_cancel_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+class _TrackingPoolMixin:
+    """Connection pool mixin that reports checked-out connections to the bound token."""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        token = current_cancel_token()
+        if token is not None:
+            token.attach(conn)
+            conn._cancel_token = token
+        return conn
+
+    def _put_conn(self, conn):
+        token = getattr(conn, "_cancel_token", None)
+        if token is not None:
+            token.detach(conn)
+            conn._cancel_token = None
+        super()._put_conn(conn)
+
+
+class TrackingHTTPConnectionPool(_TrackingPoolMixin, HTTPConnectionPool):
+    """HTTP connection pool with cancellation tracking."""
+
+
+class TrackingHTTPSConnectionPool(_TrackingPoolMixin, HTTPSConnectionPool):
+    """HTTPS connection pool with cancellation tracking."""
+
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    """Requests adapter whose in-flight requests can be aborted through a CancelToken."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TrackingHTTPConnectionPool,
+            "https": TrackingHTTPSConnectionPool
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection reuse statistics for the adapter's pools.
+
+        Returns:
+            Dictionary with the pool size, connections opened, requests sent,
+            requests that reused a pooled connection and the reuse rate.
+        """
+        pools = self.poolmanager.pools
+        opened = sent = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        reused = max(0, sent - opened)
+        return {
+            "pool_maxsize": self._pool_maxsize,
+            "connections_opened": opened,
+            "requests": sent,
+            "reused": reused,
+            "reuse_rate": reused / sent if sent else 0.0
+        }
+
+
+def encode_json_body(payload: Dict[str, Any], compress: bool = False,
+                     min_bytes: int = GZIP_MIN_BYTES) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize a JSON request body, gzipping it if it is large enough.
+
+    Args:
+        payload: JSON body.
+        compress: Whether the endpoint accepts gzip-encoded request bodies.
+        min_bytes: Smallest body that is compressed.
+
+    Returns:
+        The body and the headers describing it.
+    """
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if compress and len(body) >= min_bytes:
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+class ConnectionWarmer:
+    """Keeps pooled connections to the API endpoints open.
+
+    Warming sends a HEAD request to each endpoint, so DNS, TCP and TLS setup
+    happen before the operator's first request instead of during it. While
+    started, connections are warmed again whenever no request has been sent
+    for idle_interval seconds, before the server closes them as idle. Once
+    nothing has been sent for active_window seconds the application is taken
+    to be unattended and the connections are left to close; the next request
+    resumes warming.
+    """
+
+    def __init__(self, session: requests.Session, urls: Callable[[], List[str]],
+                 idle_interval: float = WARMUP_IDLE_INTERVAL,
+                 timeout: float = WARMUP_TIMEOUT,
+                 active_window: float = WARMUP_ACTIVE_WINDOW):
+        """Initialize the warmer.
+
+        Args:
+            session: Session whose connection pool is warmed.
+            urls: Function returning the endpoint URLs to warm.
+            idle_interval: Idle seconds after which connections are warmed again.
+            timeout: Seconds allowed for each warm-up request.
+            active_window: Seconds after the last request during which connections are kept warm.
+        """
+        self.session = session
+        self.urls = urls
+        self.idle_interval = idle_interval
+        self.timeout = timeout
+        self.active_window = active_window
+        self.warmups = 0
+        self.failures = 0
+        self._last_request = 0.0  # Last request sent by the application
+        self._last_activity = 0.0  # Last request or warm-up on the connections
+        self._stop = threading.Event()
+        self._thread = None
+
+    def touch(self) -> None:
+        """Record that a request is using the connections."""
+        self._last_request = self._last_activity = time.monotonic()
+
+    def warm_up(self) -> None:
+        """Open a connection to every endpoint, blocking until done."""
+        self._last_activity = time.monotonic()
+        for url in self.urls():
+            try:
+                self.session.head(url, timeout=self.timeout, allow_redirects=False)
+                self.warmups += 1
+            except requests.exceptions.RequestException as e:
+                # The request itself will report the problem - warming is best effort
+                self.failures += 1
+                logging.debug(f"Connection warm-up for {url} failed: {e}")
+
+    def start(self) -> None:
+        """Warm the connections now in the background and keep them warm."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._last_request = time.monotonic()  # The operator's first request is expected soon
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ConnectionWarmer")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop keeping the connections warm."""
+        self._stop.set()
+
+    def _run(self) -> None:
+        """Warm up, then re-warm after each idle period while requests are being sent."""
+        self.warm_up()
+        while not self._stop.wait(self.idle_interval / 2):
+            now = time.monotonic()
+            if now - self._last_request >= self.active_window:
+                continue  # Unattended - let the connections close
+            if now - self._last_activity >= self.idle_interval:
+                self.warm_up()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get warm-up statistics."""
+        return {
+            "warmups": self.warmups,
+            "failures": self.failures,
+            "running": self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+        }